@@ -0,0 +1,112 @@
+"""cumulative intervals
+
+Revision ID: 4b1f0c6a2d7e
+Revises: 9e34cd56cc60
+Create Date: 2026-10-18 10:12:41.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b1f0c6a2d7e'
+down_revision: Union[str, Sequence[str], None] = '9e34cd56cc60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('charityproject', 'donation')
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_cumulative_intervals(table_name: str) -> None:
+    """Заполняет отрезки существующих записей пачками по create_date, id."""
+    table = sa.table(
+        table_name,
+        sa.column('id', sa.Integer()),
+        sa.column('full_amount', sa.Integer()),
+        sa.column('create_date'),
+        sa.column('cumulative_start', sa.BigInteger()),
+        sa.column('cumulative_end', sa.BigInteger()),
+    )
+    bind = op.get_bind()
+    set_interval = (
+        table.update()
+        .where(table.c.id == sa.bindparam('row_id'))
+        .values(
+            cumulative_start=sa.bindparam('start'),
+            cumulative_end=sa.bindparam('end'),
+        )
+    )
+    offset = 0
+    last_row = None
+    while True:
+        query = (
+            sa.select(table.c.id, table.c.full_amount, table.c.create_date)
+            .order_by(table.c.create_date, table.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        )
+        if last_row is not None:
+            query = query.where(sa.or_(
+                table.c.create_date > last_row.create_date,
+                sa.and_(
+                    table.c.create_date == last_row.create_date,
+                    table.c.id > last_row.id,
+                ),
+            ))
+        rows = bind.execute(query).all()
+        if not rows:
+            break
+        params = []
+        for row in rows:
+            params.append({
+                'row_id': row.id,
+                'start': offset,
+                'end': offset + row.full_amount,
+            })
+            offset += row.full_amount
+        bind.execute(set_interval, params)
+        last_row = rows[-1]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table_name in TABLES:
+        op.add_column(
+            table_name,
+            sa.Column('cumulative_start', sa.BigInteger(), nullable=True),
+        )
+        op.add_column(
+            table_name,
+            sa.Column('cumulative_end', sa.BigInteger(), nullable=True),
+        )
+        backfill_cumulative_intervals(table_name)
+        op.create_index(
+            op.f(f'ix_{table_name}_cumulative_end'),
+            table_name,
+            ['cumulative_end'],
+            unique=False,
+        )
+        op.create_index(
+            f'ix_{table_name}_fully_invested_cumulative_start',
+            table_name,
+            ['fully_invested', 'cumulative_start'],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table_name in reversed(TABLES):
+        op.drop_index(
+            f'ix_{table_name}_fully_invested_cumulative_start',
+            table_name=table_name,
+        )
+        op.drop_index(
+            op.f(f'ix_{table_name}_cumulative_end'), table_name=table_name
+        )
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.drop_column('cumulative_end')
+            batch_op.drop_column('cumulative_start')
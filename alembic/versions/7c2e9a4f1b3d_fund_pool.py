@@ -0,0 +1,41 @@
+"""fund pool counters
+
+Revision ID: 7c2e9a4f1b3d
+Revises: 4b1f0c6a2d7e
+Create Date: 2026-10-18 11:03:52.187406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e9a4f1b3d'
+down_revision: Union[str, Sequence[str], None] = '4b1f0c6a2d7e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('fund_pool',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('project_capacity', sa.BigInteger(), nullable=False),
+    sa.Column('donation_balance', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(
+        'INSERT INTO fund_pool (id, project_capacity, donation_balance) '
+        'SELECT 1, '
+        '(SELECT COALESCE(SUM(full_amount - COALESCE(invested_amount, 0)), 0) '
+        'FROM charityproject WHERE fully_invested IS FALSE), '
+        '(SELECT COALESCE(SUM(full_amount - COALESCE(invested_amount, 0)), 0) '
+        'FROM donation WHERE fully_invested IS FALSE)'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('fund_pool')
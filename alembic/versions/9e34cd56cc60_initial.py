@@ -30,7 +30,7 @@ def upgrade() -> None:
     sa.Column('close_date', sa.DateTime(timezone=True), nullable=True),
     sa.Column('name', sa.String(length=100), nullable=False),
     sa.Column('description', sa.Text(), nullable=False),
-    sa.CheckConstraint('0 <= invested_amount <= full_amount', name='check_invested_amount_range'),
+    sa.CheckConstraint('invested_amount >= 0 AND invested_amount <= full_amount', name='check_invested_amount_range'),
     sa.CheckConstraint('full_amount > 0', name='check_full_amount_positive'),
     sa.PrimaryKeyConstraint('id'),
     sa.UniqueConstraint('name')
@@ -54,7 +54,7 @@ def upgrade() -> None:
     sa.Column('close_date', sa.DateTime(timezone=True), nullable=True),
     sa.Column('user_id', sa.Integer(), nullable=False),
     sa.Column('comment', sa.Text(), nullable=True),
-    sa.CheckConstraint('0 <= invested_amount <= full_amount', name='check_invested_amount_range'),
+    sa.CheckConstraint('invested_amount >= 0 AND invested_amount <= full_amount', name='check_invested_amount_range'),
     sa.CheckConstraint('full_amount > 0', name='check_full_amount_positive'),
     sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
     sa.PrimaryKeyConstraint('id')
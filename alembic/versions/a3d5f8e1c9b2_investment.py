@@ -0,0 +1,56 @@
+"""investment records
+
+Revision ID: a3d5f8e1c9b2
+Revises: 7c2e9a4f1b3d
+Create Date: 2026-10-18 12:41:09.512873
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d5f8e1c9b2'
+down_revision: Union[str, Sequence[str], None] = '7c2e9a4f1b3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('investment',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('donation_id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.CheckConstraint('amount > 0', name='check_investment_amount'),
+    sa.ForeignKeyConstraint(['donation_id'], ['donation.id'], ),
+    sa.ForeignKeyConstraint(['project_id'], ['charityproject.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_investment_donation_id_project_id',
+        'investment',
+        ['donation_id', 'project_id'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_investment_project_id_donation_id',
+        'investment',
+        ['project_id', 'donation_id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        'ix_investment_project_id_donation_id', table_name='investment'
+    )
+    op.drop_index(
+        'ix_investment_donation_id_project_id', table_name='investment'
+    )
+    op.drop_table('investment')
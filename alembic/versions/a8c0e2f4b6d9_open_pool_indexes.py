@@ -0,0 +1,45 @@
+"""open pool and user donation indexes
+
+Revision ID: a8c0e2f4b6d9
+Revises: f7a9c1e3b5d2
+Create Date: 2026-10-18 20:03:15.822904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8c0e2f4b6d9'
+down_revision: Union[str, Sequence[str], None] = 'f7a9c1e3b5d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('charityproject', 'donation')
+OPEN_CONDITION = sa.column('fully_invested', sa.Boolean()).is_(False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        op.create_index(
+            f'ix_{table}_open_create_date',
+            table,
+            ['create_date'],
+            postgresql_where=OPEN_CONDITION,
+            sqlite_where=OPEN_CONDITION,
+        )
+    op.create_index(
+        'ix_donation_user_id_create_date',
+        'donation',
+        ['user_id', 'create_date'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_donation_user_id_create_date', table_name='donation')
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_open_create_date', table_name=table)
@@ -0,0 +1,35 @@
+"""shared table generation counters
+
+Revision ID: b5d7f9a1c3e6
+Revises: a8c0e2f4b6d9
+Create Date: 2026-10-18 22:41:07.315482
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d7f9a1c3e6'
+down_revision: Union[str, Sequence[str], None] = 'a8c0e2f4b6d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('table_generation',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('generation', sa.BigInteger(), nullable=False),
+    sa.Column('changed_at', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('table_generation')
@@ -0,0 +1,42 @@
+"""allocation pending flag
+
+Revision ID: c6e1b7d4a8f0
+Revises: a3d5f8e1c9b2
+Create Date: 2026-10-18 13:27:44.905116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6e1b7d4a8f0'
+down_revision: Union[str, Sequence[str], None] = 'a3d5f8e1c9b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('charityproject', 'donation')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        op.add_column(
+            table, sa.Column('allocation_pending', sa.Boolean(), nullable=True)
+        )
+        op.create_index(
+            op.f(f'ix_{table}_allocation_pending'),
+            table,
+            ['allocation_pending'],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.drop_index(op.f(f'ix_{table}_allocation_pending'), table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('allocation_pending')
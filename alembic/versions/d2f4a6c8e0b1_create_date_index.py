@@ -0,0 +1,36 @@
+"""create date index
+
+Revision ID: d2f4a6c8e0b1
+Revises: c6e1b7d4a8f0
+Create Date: 2026-10-18 15:12:37.204551
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f4a6c8e0b1'
+down_revision: Union[str, Sequence[str], None] = 'c6e1b7d4a8f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('charityproject', 'donation')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        op.create_index(
+            f'ix_{table}_create_date_id',
+            table,
+            ['create_date', 'id'],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_create_date_id', table_name=table)
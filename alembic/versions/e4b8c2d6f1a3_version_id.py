@@ -0,0 +1,38 @@
+"""optimistic version column
+
+Revision ID: e4b8c2d6f1a3
+Revises: d2f4a6c8e0b1
+Create Date: 2026-10-18 18:04:51.326814
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b8c2d6f1a3'
+down_revision: Union[str, Sequence[str], None] = 'd2f4a6c8e0b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('charityproject', 'donation')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        op.add_column(
+            table,
+            sa.Column(
+                'version_id', sa.Integer(), server_default='1', nullable=False
+            ),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('version_id')
@@ -0,0 +1,45 @@
+"""portable invested amount range check
+
+Revision ID: f7a9c1e3b5d2
+Revises: e4b8c2d6f1a3
+Create Date: 2026-10-18 19:12:37.540218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7a9c1e3b5d2'
+down_revision: Union[str, Sequence[str], None] = 'e4b8c2d6f1a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('charityproject', 'donation')
+CONSTRAINT = 'check_invested_amount_range'
+# Цепочка `0 <= a <= b` в SQLite всегда истинна, а в PostgreSQL
+# не компилируется (boolean <= integer).
+OLD_CONDITION = '0 <= invested_amount <= full_amount'
+NEW_CONDITION = 'invested_amount >= 0 AND invested_amount <= full_amount'
+
+
+def replace_check(condition: str) -> None:
+    """Пересоздает проверку диапазона вложенной суммы."""
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_constraint(CONSTRAINT, type_='check')
+            batch_op.create_check_constraint(CONSTRAINT, condition)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    replace_check(NEW_CONDITION)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Старое условие создавалось только в SQLite, в других СУБД
+    # исходная миграция сразу создает переносимую проверку.
+    if op.get_bind().dialect.name == 'sqlite':
+        replace_check(OLD_CONDITION)
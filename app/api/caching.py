@@ -0,0 +1,191 @@
+from collections import OrderedDict
+import hashlib
+from http import HTTPStatus
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional
+
+from fastapi import Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.db import READ_PRIMARY
+from app.core.generations import table_generations
+
+
+class CachedResponse(NamedTuple):
+    """Закэшированный ответ эндпоинта.
+
+    Attributes:
+        generation: Поколение таблицы, для которого построен ответ.
+        body: Тело ответа.
+        headers: Заголовки ответа, включая `ETag`.
+    """
+
+    generation: int
+    body: bytes
+    headers: Dict[str, str]
+
+    @property
+    def etag(self) -> str:
+        """Сильный ETag тела ответа."""
+        return self.headers['etag']
+
+    @property
+    def size(self) -> int:
+        """Примерный объем ответа в памяти в байтах."""
+        return len(self.body) + sum(
+            len(name) + len(value) for name, value in self.headers.items()
+        )
+
+
+def make_etag(body: bytes) -> str:
+    """Возвращает сильный ETag по содержимому тела ответа.
+
+    ETag зависит только от байтов тела, поэтому совпадает у всех
+    воркеров и не меняется после перезапуска.
+    """
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Проверяет заголовок `If-None-Match` по правилам RFC 9110.
+
+    Для `If-None-Match` используется слабое сравнение: префикс
+    `W/` не учитывается.
+
+    Args:
+        if_none_match: Значение заголовка запроса.
+        etag: Текущий ETag ответа.
+
+    Returns:
+        True, если клиент уже получил этот ответ.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    return any(
+        tag.strip().removeprefix('W/') == etag
+        for tag in if_none_match.split(',')
+    )
+
+
+class ResponseCache:
+    """LRU-кэш готовых ответов с ограничением объема памяти.
+
+    Ответ хранится вместе с поколением таблицы, из которой он
+    построен, и выдается, только пока поколение не изменилось.
+    Когда суммарный объем ответов превышает
+    `response_cache_max_bytes`, вытесняются давно не
+    запрашивавшиеся ответы. Ответ больше всего бюджета не
+    кэшируется.
+    """
+
+    def __init__(self) -> None:
+        """Создает пустой кэш."""
+        self._entries: OrderedDict = OrderedDict()
+        self.size = 0
+
+    def get(self, key: str, generation: int) -> Optional[CachedResponse]:
+        """Возвращает ответ, построенный для текущего поколения.
+
+        Устаревший ответ удаляется из кэша.
+
+        Args:
+            key: Адрес запроса.
+            generation: Текущее поколение таблицы.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.generation != generation:
+            self._discard(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(
+        self, key: str, generation: int, response: Response
+    ) -> CachedResponse:
+        """Сохраняет ответ и вытесняет старые сверх бюджета памяти.
+
+        Args:
+            key: Адрес запроса.
+            generation: Поколение таблицы, прочитанное до запроса к БД.
+            response: Построенный ответ эндпоинта.
+
+        Returns:
+            Ответ с заголовком `ETag`, даже если он не поместился
+            в кэш.
+        """
+        headers = {
+            name: value
+            for name, value in response.headers.items()
+            if name != 'content-length'
+        }
+        headers['etag'] = make_etag(response.body)
+        entry = CachedResponse(generation, response.body, headers)
+        self._discard(key)
+        if entry.size > settings.response_cache_max_bytes:
+            return entry
+        self._entries[key] = entry
+        self.size += entry.size
+        while self.size > settings.response_cache_max_bytes:
+            self._discard(next(iter(self._entries)))
+        return entry
+
+    def _discard(self, key: str) -> None:
+        """Удаляет ответ из кэша, если он там есть."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+
+    def __len__(self) -> int:
+        """Возвращает число закэшированных ответов."""
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """Удаляет все ответы."""
+        self._entries.clear()
+        self.size = 0
+
+
+response_cache = ResponseCache()
+
+
+async def cached_response(
+    request: Request,
+    table: str,
+    session: AsyncSession,
+    build: Callable[[], Awaitable[Response]],
+) -> Response:
+    """Выдает ответ из кэша или строит и кэширует его.
+
+    Поколение таблицы читается до запроса к БД. При промахе сессия
+    чтения переключается на основную БД, чтобы отстающая реплика
+    не закэшировала старые данные под новым поколением. Если ETag
+    из `If-None-Match` совпадает с текущим, возвращается 304 без
+    тела.
+
+    Args:
+        request: Запрос эндпоинта.
+        table: Таблица, от данных которой зависит ответ.
+        session: Сессия чтения эндпоинта, еще не начавшая транзакцию.
+        build: Корутинная функция без аргументов, строящая ответ.
+
+    Returns:
+        Ответ с заголовком `ETag` или 304.
+    """
+    key = request.url.path
+    if request.url.query:
+        key = f'{key}?{request.url.query}'
+    generation = table_generations.get(table)
+    entry = response_cache.get(key, generation)
+    if entry is None:
+        session.info[READ_PRIMARY] = True
+        entry = response_cache.put(key, generation, await build())
+    if etag_matches(request.headers.get('if-none-match'), entry.etag):
+        return Response(
+            status_code=HTTPStatus.NOT_MODIFIED,
+            headers={'etag': entry.etag},
+        )
+    return Response(entry.body, headers=entry.headers)
@@ -1,6 +1,7 @@
 from .auth import router as auth_router
 from .charity_projects import router as charity_project_router
 from .donation import router as donation_router
+from .metrics import router as metrics_router
 from .user import router as user_router
 
 
@@ -8,5 +9,6 @@ __all__ = [
     'auth_router',
     'charity_project_router',
     'donation_router',
+    'metrics_router',
     'user_router',
 ]
@@ -1,24 +1,35 @@
+from functools import partial
 from typing import List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Body, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.caching import cached_response
+from app.api.pagination import PageParams, page_params, page_response
 from app.api.validators import (
     check_full_amount_not_less_than_invested,
     check_name_duplicate,
+    check_names_duplicate,
     check_project_can_be_deleted,
+    check_project_can_be_updated,
     check_project_exists,
     check_project_not_closed,
 )
-from app.core.db import get_async_session
+from app.core.config import settings
+from app.core.db import get_async_read_session, get_async_session
+from app.core.serialization import schema_fields
 from app.core.user import current_superuser
-from app.models import User
+from app.crud.charity_project import charity_project_crud
+from app.models import CharityProject, User
 from app.schemas.charity_project import (
     CharityProjectCreate,
     CharityProjectDB,
     CharityProjectUpdate,
 )
+from app.schemas.investment import InvestmentDB
 from app.services.charity_project_service import charity_project_service
+from app.services.export import MEDIA_TYPES, ExportFormat, stream_export
 
 
 router = APIRouter()
@@ -42,6 +53,29 @@ async def create_charity_project(
     return await charity_project_service.create_project(project, session)
 
 
+@router.post(
+    '/batch',
+    response_model=List[CharityProjectDB],
+    summary='Создать несколько благотворительных проектов',
+)
+async def create_charity_projects(
+    projects: List[CharityProjectCreate] = Body(
+        ..., min_items=1, max_items=settings.batch_max_size
+    ),
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_superuser),
+):
+    """Создает пачку благотворительных проектов.
+
+    Доступно только суперпользователям. Все проекты создаются
+    и инвестируются в одной транзакции.
+    """
+    await check_names_duplicate(
+        (project.name for project in projects), session
+    )
+    return await charity_project_service.create_projects(projects, session)
+
+
 @router.get(
     '/',
     response_model=List[CharityProjectDB],
@@ -49,13 +83,74 @@ async def create_charity_project(
     summary='Получить список всех проектов',
 )
 async def get_all_charity_projects(
-    session: AsyncSession = Depends(get_async_session),
+    request: Request,
+    page: PageParams = Depends(page_params(charity_project_crud)),
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    """Возвращает список благотворительных проектов постранично.
+
+    Доступно всем пользователям, включая анонимных. Проекты
+    упорядочены по дате создания; курсор следующей страницы
+    передается в заголовке `X-Next-Cursor`. Ответ кэшируется до
+    следующего изменения проектов и выдается с заголовком `ETag`;
+    запрос с совпадающим `If-None-Match` получает 304.
+    """
+
+    async def build_response():
+        projects = await charity_project_service.get_projects_page(
+            session, page.limit, page.after, schema_fields(CharityProjectDB)
+        )
+        return page_response(projects, CharityProjectDB)
+
+    return await cached_response(
+        request, CharityProject.__tablename__, session, build_response
+    )
+
+
+@router.get(
+    '/export',
+    response_class=StreamingResponse,
+    summary='Выгрузить все проектов',
+)
+async def export_charity_projects(
+    export_format: ExportFormat = Query('ndjson', alias='format'),
+    session: AsyncSession = Depends(get_async_read_session),
+    user: User = Depends(current_superuser),
 ):
-    """Возвращает список всех благотворительных проектов.
+    """Выгружает таблицу проектов в NDJSON или CSV.
 
-    Доступно всем пользователям, включая анонимных.
+    Доступно только суперпользователям. Строки передаются
+    потоком по мере чтения серверным курсором.
     """
-    return await charity_project_service.get_all_projects(session)
+    return StreamingResponse(
+        stream_export(CharityProject, export_format, session),
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            'Content-Disposition': (
+                f'attachment; filename="charity_project.{export_format}"'
+            ),
+        },
+    )
+
+
+@router.get(
+    '/{project_id}/allocations',
+    response_model=List[InvestmentDB],
+    summary='Получить пожертвования, вложенные в проект',
+)
+async def get_charity_project_allocations(
+    project_id: int,
+    session: AsyncSession = Depends(get_async_read_session),
+    user: User = Depends(current_superuser),
+):
+    """Возвращает, из каких пожертвований собран проект.
+
+    Доступно только суперпользователям.
+    """
+    await check_project_exists(project_id, session)
+    return await charity_project_service.get_project_allocations(
+        project_id, session
+    )
 
 
 @router.patch(
@@ -90,7 +185,10 @@ async def update_charity_project(
     )
 
     return await charity_project_service.update_project(
-        project, project_in, session
+        project,
+        project_in,
+        session,
+        check=partial(check_project_can_be_updated, project_update=project_in),
     )
 
 
@@ -112,4 +210,6 @@ async def delete_charity_project(
     """
     project = await check_project_exists(project_id, session)
     await check_project_can_be_deleted(project)
-    return await charity_project_service.delete_project(project, session)
+    return await charity_project_service.delete_project(
+        project, session, check=check_project_can_be_deleted
+    )
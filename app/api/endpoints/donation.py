@@ -1,18 +1,47 @@
+from http import HTTPStatus
 from typing import List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Body, Depends, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db import get_async_session
-from app.core.user import current_superuser, current_user
+from app.api.pagination import PageParams, page_params, page_response
+from app.api.validators import check_donation_exists, check_donation_owner
+from app.core.config import settings
+from app.core.db import (
+    get_async_read_session,
+    get_async_session,
+    read_your_writes,
+)
+from app.core.serialization import schema_fields
+from app.core.user import (
+    current_superuser,
+    current_user,
+    get_user_read_session,
+)
+from app.crud.donation import donation_crud
+from app.models import Donation
 from app.models.user import User
 from app.schemas.donation import DonationCreate, DonationDB, DonationUserDB
+from app.schemas.investment import InvestmentDB
 from app.services.donation_service import donation_service
+from app.services.export import MEDIA_TYPES, ExportFormat, stream_export
+from app.services.group_commit import donation_group_committer
 
 
 router = APIRouter()
 
 
+def set_intake_status(response: Response) -> None:
+    """Выставляет 202 для пожертвований, распределяемых в фоне.
+
+    Args:
+        response: Ответ эндпоинта приема пожертвований.
+    """
+    if settings.allocation_mode == 'async':
+        response.status_code = HTTPStatus.ACCEPTED
+
+
 @router.post(
     '/',
     response_model=DonationUserDB,
@@ -21,15 +50,51 @@ router = APIRouter()
 )
 async def create_donation(
     donation_in: DonationCreate,
-    session: AsyncSession = Depends(get_async_session),
+    response: Response,
     user: User = Depends(current_user),
 ):
     """Создает новое пожертвование от текущего пользователя.
 
     Средства автоматически распределяются по активным
-    благотворительным проектам.
+    благотворительным проектам. В асинхронном режиме
+    распределения возвращает 202, а средства распределяет
+    фоновый обработчик. При включенном групповом commit
+    одновременные запросы фиксируются одной транзакцией.
+    Транзакцию открывает `donation_group_committer`, поэтому
+    сессия запроса не создается.
     """
-    return await donation_service.create_donation(donation_in, user, session)
+    set_intake_status(response)
+    donation = await donation_group_committer.submit(donation_in, user)
+    read_your_writes.mark(user.id)
+    return donation
+
+
+@router.post(
+    '/batch',
+    response_model=List[DonationUserDB],
+    response_model_exclude_none=True,
+    summary='Сделать несколько пожертвований',
+)
+async def create_donations(
+    response: Response,
+    donations_in: List[DonationCreate] = Body(
+        ..., min_items=1, max_items=settings.batch_max_size
+    ),
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_user),
+):
+    """Создает пачку пожертвований текущего пользователя.
+
+    Все пожертвования сохраняются и распределяются по проектам
+    в одной транзакции. Результаты возвращаются в порядке
+    поступления.
+    """
+    set_intake_status(response)
+    donations = await donation_service.create_donations(
+        donations_in, user, session
+    )
+    read_your_writes.mark(user.id)
+    return donations
 
 
 @router.get(
@@ -39,14 +104,19 @@ async def create_donation(
     summary='Получить список всех пожертвований',
 )
 async def get_all_donations(
-    session: AsyncSession = Depends(get_async_session),
+    page: PageParams = Depends(page_params(donation_crud)),
+    session: AsyncSession = Depends(get_async_read_session),
     user: User = Depends(current_superuser),
 ):
-    """Возвращает список всех пожертвований в системе.
+    """Возвращает список всех пожертвований в системе постранично.
 
-    Доступно только суперпользователям.
+    Доступно только суперпользователям. Курсор следующей страницы
+    передается в заголовке `X-Next-Cursor`.
     """
-    return await donation_service.get_all_donations(session)
+    donations = await donation_service.get_donations_page(
+        session, page.limit, page.after, schema_fields(DonationDB)
+    )
+    return page_response(donations, DonationDB)
 
 
 @router.get(
@@ -56,8 +126,65 @@ async def get_all_donations(
     summary='Получить список моих пожертвований',
 )
 async def get_my_donations(
+    page: PageParams = Depends(page_params(donation_crud)),
     user: User = Depends(current_user),
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_user_read_session),
+):
+    """Возвращает список пожертвований текущего пользователя.
+
+    Список выдается постранично, курсор следующей страницы
+    передается в заголовке `X-Next-Cursor`. Сразу после
+    пожертвования список читается с основной БД.
+    """
+    donations = await donation_service.get_user_donations_page(
+        user.id, session, page.limit, page.after,
+        schema_fields(DonationUserDB),
+    )
+    return page_response(donations, DonationUserDB)
+
+
+@router.get(
+    '/export',
+    response_class=StreamingResponse,
+    summary='Выгрузить все пожертвований',
+)
+async def export_donations(
+    export_format: ExportFormat = Query('ndjson', alias='format'),
+    session: AsyncSession = Depends(get_async_read_session),
+    user: User = Depends(current_superuser),
 ):
-    """Возвращает список пожертвований текущего пользователя."""
-    return await donation_service.get_user_donations(user.id, session)
+    """Выгружает таблицу пожертвований в NDJSON или CSV.
+
+    Доступно только суперпользователям. Строки передаются
+    потоком по мере чтения серверным курсором.
+    """
+    return StreamingResponse(
+        stream_export(Donation, export_format, session),
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            'Content-Disposition': (
+                f'attachment; filename="donation.{export_format}"'
+            ),
+        },
+    )
+
+
+@router.get(
+    '/{donation_id}/allocations',
+    response_model=List[InvestmentDB],
+    summary='Получить распределение пожертвования по проектам',
+)
+async def get_donation_allocations(
+    donation_id: int,
+    user: User = Depends(current_user),
+    session: AsyncSession = Depends(get_user_read_session),
+):
+    """Возвращает, в какие проекты вложено пожертвование.
+
+    Доступно владельцу пожертвования и суперпользователям.
+    """
+    donation = await check_donation_exists(donation_id, session)
+    await check_donation_owner(donation, user)
+    return await donation_service.get_donation_allocations(
+        donation_id, session
+    )
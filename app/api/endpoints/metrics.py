@@ -0,0 +1,23 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import metrics
+
+
+router = APIRouter()
+
+
+@router.get(
+    '',
+    response_class=PlainTextResponse,
+    summary='Получить метрики процесса',
+)
+async def get_metrics():
+    """Возвращает метрики процесса в текстовом формате Prometheus.
+
+    Доступно всем, чтобы сборщик метрик мог читать их без токена.
+    Каждый воркер отдает только свои значения.
+    """
+    return PlainTextResponse(
+        metrics.render(), media_type='text/plain; version=0.0.4'
+    )
@@ -3,7 +3,7 @@ from http import HTTPStatus
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db import get_async_session
+from app.core.db import get_async_read_session, get_async_session
 from app.core.user import current_superuser, current_user
 from app.models.user import User
 from app.schemas.user import UserRead, UserUpdate
@@ -33,14 +33,17 @@ async def patch_current_user(
     Returns:
         User: Обновленные данные пользователя
     """
+    # Текущий пользователь прочитан сессией только для чтения,
+    # изменения вносятся в его копию из основной БД.
+    db_user = await session.get(User, user.id)
     if update_data.email is not None:
-        user.email = update_data.email
+        db_user.email = update_data.email
 
-    session.add(user)
+    session.add(db_user)
     await session.commit()
-    await session.refresh(user)
+    await session.refresh(db_user)
 
-    return user
+    return db_user
 
 
 @router.get(
@@ -68,7 +71,7 @@ async def get_current_user(user: User = Depends(current_user)) -> User:
 )
 async def get_user(
     user_id: str,
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_async_read_session),
     user: User = Depends(current_superuser),
 ) -> User:
     """
@@ -0,0 +1,109 @@
+from http import HTTPStatus
+from typing import Any, Callable, NamedTuple, Optional, Tuple, Type
+
+from fastapi import HTTPException, Query, Response
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.serialization import (
+    FastJSONResponse,
+    rows_to_dicts,
+    schema_fields,
+)
+from app.crud.base import CRUDBase, Page
+
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+class PageParams(NamedTuple):
+    """Параметры запрошенной страницы списка.
+
+    Attributes:
+        limit: Размер страницы или None для всего списка.
+        after: Значения ключа из курсора предыдущей страницы.
+    """
+
+    limit: Optional[int]
+    after: Optional[Tuple[Any, ...]]
+
+
+def page_params(crud: CRUDBase) -> Callable[..., PageParams]:
+    """Создает зависимость с параметрами страницы для CRUD.
+
+    Args:
+        crud: CRUD, курсоры которого принимает эндпоинт.
+
+    Returns:
+        Зависимость FastAPI, возвращающая `PageParams`.
+    """
+
+    def get_page_params(
+        limit: Optional[int] = Query(
+            None,
+            ge=1,
+            le=settings.page_size_max,
+            description='Размер страницы.',
+        ),
+        cursor: Optional[str] = Query(
+            None,
+            description=(
+                f'Курсор следующей страницы из заголовка {NEXT_CURSOR_HEADER}.'
+            ),
+        ),
+    ) -> PageParams:
+        """Проверяет курсор и подставляет размер страницы по умолчанию.
+
+        Raises:
+            HTTPException: Если курсор поврежден.
+        """
+        if cursor is None:
+            after = None
+        else:
+            try:
+                after = crud.decode_cursor(cursor)
+            except ValueError:
+                raise HTTPException(
+                    status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                    detail='Некорректный курсор страницы.',
+                ) from None
+        if limit is None and after is None and (
+            settings.legacy_unpaginated_lists
+        ):
+            return PageParams(None, None)
+        return PageParams(limit or settings.page_size_default, after)
+
+    return get_page_params
+
+
+def set_next_cursor(response: Response, page: Page) -> None:
+    """Передает курсор следующей страницы в заголовке ответа.
+
+    Args:
+        response: Ответ эндпоинта списка.
+        page: Выданная страница.
+    """
+    if page.next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+
+
+def page_response(page: Page, schema: Type[BaseModel]) -> FastJSONResponse:
+    """Кодирует страницу строк выборки в ответ со списком.
+
+    Строки, выбранные по полям схемы, кодируются в JSON напрямую,
+    без создания схем pydantic и `jsonable_encoder`. Набор полей
+    совпадает с `response_model=List[schema]` при
+    `response_model_exclude_none=True`.
+
+    Args:
+        page: Страница строк, выбранных по `schema_fields(schema)`.
+        schema: Схема ответа эндпоинта.
+
+    Returns:
+        Ответ со списком и курсором следующей страницы.
+    """
+    response = FastJSONResponse(
+        rows_to_dicts(schema_fields(schema), page.items)
+    )
+    set_next_cursor(response, page)
+    return response
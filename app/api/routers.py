@@ -4,6 +4,7 @@ from app.api.endpoints import (
     auth_router,
     charity_project_router,
     donation_router,
+    metrics_router,
     user_router,
 )
 
@@ -25,3 +26,8 @@ main_router.include_router(
     tags=['Users'],
 )
 main_router.include_router(auth_router, tags=['Auth'])
+main_router.include_router(
+    metrics_router,
+    prefix='/metrics',
+    tags=['Metrics'],
+)
@@ -1,11 +1,13 @@
 from http import HTTPStatus
-from typing import Optional
+from typing import Iterable, Optional
 
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.charity_project import charity_project_crud
-from app.models.charity_project import CharityProject
+from app.crud.donation import donation_crud
+from app.models import CharityProject, Donation, User
+from app.schemas.charity_project import CharityProjectUpdate
 
 
 async def check_name_duplicate(
@@ -34,6 +36,34 @@ async def check_name_duplicate(
         )
 
 
+async def check_names_duplicate(
+    names: Iterable[str],
+    session: AsyncSession,
+) -> None:
+    """Имена пачки проектов уникальны в пачке и в базе данных.
+
+    Все имена проверяются одним запросом.
+
+    Args:
+        names: Имена проектов для проверки.
+        session: Асинхронная сессия базы данных.
+
+    Raises:
+        HTTPException: Если имя повторяется в пачке или уже существует.
+    """
+    names = list(names)
+    if len(set(names)) != len(names):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail='Имена проектов в пачке повторяются.',
+        )
+    if await charity_project_crud.get_existing_names(names, session):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail='Проект с таким именем уже существует.',
+        )
+
+
 async def check_project_exists(
     project_id: int,
     session: AsyncSession,
@@ -96,6 +126,29 @@ async def check_full_amount_not_less_than_invested(
         )
 
 
+async def check_project_can_be_updated(
+    project: CharityProject,
+    project_update: CharityProjectUpdate,
+) -> None:
+    """Проект можно обновить переданными данными.
+
+    Проверки не обращаются к БД, поэтому их можно повторить для
+    проекта, перечитанного после конфликта параллельных записей.
+
+    Args:
+        project: Проект для проверки.
+        project_update: Данные для обновления.
+
+    Raises:
+        HTTPException: Если проект закрыт или новая сумма меньше
+            уже вложенной.
+    """
+    await check_project_not_closed(project)
+    await check_full_amount_not_less_than_invested(
+        project, project_update.full_amount
+    )
+
+
 async def check_project_can_be_deleted(project: CharityProject) -> None:
     """Проект может быть удален без нарушения целостности данных.
 
@@ -119,3 +172,45 @@ async def check_project_can_be_deleted(project: CharityProject) -> None:
             status_code=HTTPStatus.BAD_REQUEST,
             detail='Закрытый проект нельзя удалить!',
         )
+
+
+async def check_donation_exists(
+    donation_id: int,
+    session: AsyncSession,
+) -> Donation:
+    """Пожертвование существует в базе данных.
+
+    Args:
+        donation_id: ID пожертвования для проверки.
+        session: Асинхронная сессия базы данных.
+
+    Returns:
+        Найденное пожертвование.
+
+    Raises:
+        HTTPException: Если пожертвование не найдено.
+    """
+    donation = await donation_crud.get(donation_id, session)
+    if not donation:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail='Пожертвование не найдено.',
+        )
+    return donation
+
+
+async def check_donation_owner(donation: Donation, user: User) -> None:
+    """Пожертвование принадлежит пользователю или он суперпользователь.
+
+    Args:
+        donation: Пожертвование для проверки.
+        user: Текущий пользователь.
+
+    Raises:
+        HTTPException: Если у пользователя нет доступа к пожертвованию.
+    """
+    if donation.user_id != user.id and not user.is_superuser:
+        raise HTTPException(
+            status_code=HTTPStatus.FORBIDDEN,
+            detail='Нет доступа к чужому пожертвованию.',
+        )
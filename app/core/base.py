@@ -1,10 +1,20 @@
 from app.core.db import Base
-from app.models import CharityProject, Donation, User
+from app.models import (
+    CharityProject,
+    Donation,
+    FundPool,
+    Investment,
+    TableGeneration,
+    User,
+)
 
 
 __all__ = [
     'Base',
     'CharityProject',
     'Donation',
+    'FundPool',
+    'Investment',
+    'TableGeneration',
     'User',
 ]
@@ -1,4 +1,6 @@
-from pydantic import BaseSettings
+from typing import Literal, Optional
+
+from pydantic import BaseSettings, validator
 
 
 class Settings(BaseSettings):
@@ -12,6 +14,53 @@ class Settings(BaseSettings):
     secret: str = 'SECRET'
     first_superuser_email: str = 'root@admin.ru'
     first_superuser_password: str = 'root'
+    investing_engine: Literal[
+        'loop', 'prefix_sum', 'sql', 'interval', 'ledger'
+    ] = 'loop'
+    ledger_reconcile_interval: float = 60.0
+    batch_max_size: int = 1000
+    allocation_mode: Literal['sync', 'async'] = 'sync'
+    group_commit_window: float = 0.0
+    group_commit_max_size: int = 100
+    allocation_retry_attempts: int = 5
+    allocation_retry_delay: float = 0.01
+    fund_pool_shards: int = 16
+    sqlite_journal_mode: Optional[str] = 'WAL'
+    sqlite_busy_timeout: Optional[int] = 5000
+    sqlite_synchronous: Optional[str] = 'NORMAL'
+    sqlite_cache_size: Optional[int] = -64000
+    sqlite_mmap_size: Optional[int] = 268435456
+    pool_size: int = 5
+    pool_max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    asyncpg_statement_cache_size: int = 100
+    read_replica_url: Optional[str] = None
+    read_your_writes_window: float = 5.0
+    page_size_default: int = 100
+    page_size_max: int = 1000
+    legacy_unpaginated_lists: bool = False
+    export_chunk_size: int = 1000
+    response_cache_max_bytes: int = 16 * 1024 * 1024
+    query_cache_scope: Literal['off', 'request', 'process'] = 'request'
+    query_cache_max_entries: int = 10000
+    query_cache_ttl: float = 30.0
+    invalidation_poll_interval: float = 1.0
+    user_cache_ttl: float = 60.0
+    user_cache_max_entries: int = 10000
+
+    @validator(
+        'sqlite_journal_mode',
+        'sqlite_busy_timeout',
+        'sqlite_synchronous',
+        'sqlite_cache_size',
+        'sqlite_mmap_size',
+        pre=True,
+    )
+    def empty_pragma_to_none(cls, value):
+        """Пустое значение PRAGMA оставляет значение SQLite по умолчанию."""
+        return None if value == '' else value
 
     class Config:
         env_file = '.env'
@@ -1,11 +1,23 @@
-from typing import AsyncGenerator
+from collections import OrderedDict
+import time
+from typing import Any, AsyncGenerator, Dict
 
-from sqlalchemy import Column, Integer
+from sqlalchemy import Column, Integer, event
+from sqlalchemy.engine import Connection, make_url
+from sqlalchemy.exc import InvalidRequestError
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     create_async_engine,
 )
-from sqlalchemy.orm import declarative_base, declared_attr, sessionmaker
+from sqlalchemy.orm import (
+    ORMExecuteState,
+    Session,
+    SessionTransaction,
+    declarative_base,
+    declared_attr,
+    sessionmaker,
+)
 
 from app.core.config import settings
 
@@ -23,10 +35,207 @@ class PreBase:
 
 Base = declarative_base(cls=PreBase)
 
-engine = create_async_engine(settings.database_url)
+
+def sqlite_pragmas() -> Dict[str, Any]:
+    """Возвращает PRAGMA профиля SQLite из настроек.
+
+    Пустые значения пропускаются, для них SQLite использует
+    собственные значения по умолчанию.
+
+    Returns:
+        Словарь `имя PRAGMA -> значение` в порядке применения.
+    """
+    pragmas = {
+        'journal_mode': settings.sqlite_journal_mode,
+        'busy_timeout': settings.sqlite_busy_timeout,
+        'synchronous': settings.sqlite_synchronous,
+        'cache_size': settings.sqlite_cache_size,
+        'mmap_size': settings.sqlite_mmap_size,
+    }
+    return {
+        name: value for name, value in pragmas.items() if value is not None
+    }
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Применяет PRAGMA профиля SQLite к новому соединению."""
+    cursor = dbapi_connection.cursor()
+    for name, value in sqlite_pragmas().items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+    cursor.close()
+
+
+def configure_sqlite(async_engine: AsyncEngine) -> None:
+    """Подключает профиль SQLite к движку, если он работает с SQLite.
+
+    Args:
+        async_engine: Асинхронный движок SQLAlchemy.
+    """
+    if async_engine.dialect.name == 'sqlite':
+        event.listen(async_engine.sync_engine, 'connect', set_sqlite_pragmas)
+
+
+def engine_options(database_url: str) -> Dict[str, Any]:
+    """Возвращает параметры пула соединений для адреса БД.
+
+    Для SQLite параметры не задаются: соединения с файлом дешевые,
+    и SQLAlchemy сам выбирает подходящий пул. Для серверных СУБД
+    размер пула, ожидание соединения, пересоздание старых соединений
+    и проверка перед выдачей берутся из настроек `APP_POOL_*`, а для
+    asyncpg дополнительно задается размер кэша подготовленных
+    выражений.
+
+    Args:
+        database_url: Адрес базы данных SQLAlchemy.
+
+    Returns:
+        Именованные аргументы для `create_async_engine`.
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() == 'sqlite':
+        return {}
+    options = {
+        'pool_size': settings.pool_size,
+        'max_overflow': settings.pool_max_overflow,
+        'pool_timeout': settings.pool_timeout,
+        'pool_recycle': settings.pool_recycle,
+        'pool_pre_ping': settings.pool_pre_ping,
+    }
+    if url.get_driver_name() == 'asyncpg':
+        options['connect_args'] = {
+            'prepared_statement_cache_size': (
+                settings.asyncpg_statement_cache_size
+            ),
+            'statement_cache_size': settings.asyncpg_statement_cache_size,
+        }
+    return options
+
+
+engine = create_async_engine(
+    settings.database_url, **engine_options(settings.database_url)
+)
+configure_sqlite(engine)
 
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession)
 
+if settings.read_replica_url:
+    read_engine = create_async_engine(
+        settings.read_replica_url, **engine_options(settings.read_replica_url)
+    )
+    configure_sqlite(read_engine)
+else:
+    read_engine = engine
+
+# Ключ `Session.info`, направляющий сессию чтения на основную БД.
+READ_PRIMARY = 'read_primary'
+
+
+class ReadOnlySession(Session):
+    """Сессия транзакций только для чтения.
+
+    Работает с репликой, если она задана в настройках, иначе с
+    основной БД. Флаг `READ_PRIMARY` в `info` переключает сессию
+    реплики на основную БД; его нужно выставить до первого запроса.
+
+    В PostgreSQL транзакция открывается как `READ ONLY`. В SQLite
+    таких транзакций нет, поэтому изменения отклоняются на уровне
+    ORM: и при `flush`, и при выполнении INSERT, UPDATE, DELETE.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        """Возвращает основную БД, если сессия читает свои записи."""
+        if self.info.get(READ_PRIMARY) and (
+            self.bind is read_engine.sync_engine
+        ):
+            return engine.sync_engine
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+@event.listens_for(ReadOnlySession, 'after_begin')
+def set_read_only_transaction(
+    session: Session,
+    transaction: SessionTransaction,
+    connection: Connection,
+) -> None:
+    """Открывает транзакцию PostgreSQL в режиме только для чтения."""
+    if connection.dialect.name == 'postgresql':
+        connection.exec_driver_sql('SET TRANSACTION READ ONLY')
+
+
+@event.listens_for(ReadOnlySession, 'before_flush')
+def reject_flush(session: Session, flush_context, instances) -> None:
+    """Запрещает сохранять изменения объектов в сессии чтения."""
+    raise InvalidRequestError('Сессия только для чтения не сохраняет данные.')
+
+
+@event.listens_for(ReadOnlySession, 'do_orm_execute')
+def reject_writes(orm_execute_state: ORMExecuteState) -> None:
+    """Запрещает INSERT, UPDATE и DELETE в сессии чтения."""
+    if any((
+        orm_execute_state.is_insert,
+        orm_execute_state.is_update,
+        orm_execute_state.is_delete,
+    )):
+        raise InvalidRequestError(
+            'Сессия только для чтения не изменяет данные.'
+        )
+
+
+AsyncReadSessionLocal = sessionmaker(
+    read_engine, class_=AsyncSession, sync_session_class=ReadOnlySession
+)
+
+
+class ReadYourWrites:
+    """Пользователи, которые должны читать свои записи с основной БД.
+
+    Реплика может отставать от основной БД, и только что созданное
+    пожертвование не попало бы в ответ. Поэтому после записи
+    пользователь в течение `read_your_writes_window` секунд читает
+    с основной БД. Записи хранятся в памяти процесса: запрос к
+    другому воркеру читает с реплики.
+    """
+
+    def __init__(self) -> None:
+        """Создает пустой реестр записей."""
+        self._writes: OrderedDict = OrderedDict()
+
+    def mark(self, user_id: int) -> None:
+        """Запоминает запись пользователя и забывает устаревшие.
+
+        Args:
+            user_id: Идентификатор пользователя.
+        """
+        now = time.monotonic()
+        self._writes[user_id] = now
+        self._writes.move_to_end(user_id)
+        window = settings.read_your_writes_window
+        while self._writes and (
+            now - next(iter(self._writes.values())) >= window
+        ):
+            self._writes.popitem(last=False)
+
+    def use_primary(self, user_id: int) -> bool:
+        """Пользователь недавно записывал данные.
+
+        Args:
+            user_id: Идентификатор пользователя.
+
+        Returns:
+            True, если чтение нужно выполнить на основной БД.
+        """
+        written = self._writes.get(user_id)
+        return written is not None and (
+            time.monotonic() - written < settings.read_your_writes_window
+        )
+
+    def reset(self) -> None:
+        """Забывает все записи."""
+        self._writes.clear()
+
+
+read_your_writes = ReadYourWrites()
+
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     """Генератор асинхронных сессий для работы с БД.
@@ -36,3 +245,15 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     """
     async with AsyncSessionLocal() as async_session:
         yield async_session
+
+
+async def get_async_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """Генератор асинхронных сессий только для чтения.
+
+    Сессии работают с репликой, если она задана в настройках.
+
+    Yields:
+        Асинхронная сессия SQLAlchemy только для чтения.
+    """
+    async with AsyncReadSessionLocal() as async_session:
+        yield async_session
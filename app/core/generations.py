@@ -0,0 +1,229 @@
+import time
+from typing import Dict, Iterable, Set
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app.core.config import settings
+from app.models.table_generation import TableGeneration
+
+
+# Ключ `Session.info` с именами таблиц, измененных в транзакции.
+WRITTEN_TABLES_KEY = 'written_tables'
+# Ключ `Session.info` со счетчиками таблиц, записанными перед commit.
+PUBLISHED_GENERATIONS_KEY = 'published_generations'
+
+INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+class TableGenerations:
+    """Поколения таблиц, известные процессу.
+
+    Поколение таблицы растет после commit каждой транзакции,
+    изменившей ее строки через ORM: при flush объектов и при
+    выполнении INSERT, UPDATE, DELETE через сессию. Кэш, хранящий
+    поколение вместе с данными, считает их устаревшими, как только
+    поколение таблицы изменилось.
+
+    Поколение увеличивается после commit, а не до него: читатель,
+    запомнивший поколение до запроса, может закэшировать данные
+    новее поколения, но не старее.
+
+    Записи других воркеров приходят через общие счетчики
+    `TableGeneration` (см. `app.services.invalidation`). Любое
+    новое значение общего счетчика, в том числе меньшее после
+    пересоздания БД, увеличивает поколение процесса.
+    """
+
+    def __init__(self) -> None:
+        """Создает счетчики с нулевыми поколениями."""
+        self._values: Dict[str, int] = {}
+        self._shared: Dict[str, int] = {}
+
+    def get(self, table: str) -> int:
+        """Возвращает текущее поколение таблицы.
+
+        Args:
+            table: Имя таблицы.
+        """
+        return self._values.get(table, 0)
+
+    def bump(self, tables: Iterable[str]) -> None:
+        """Увеличивает поколения измененных таблиц.
+
+        Args:
+            tables: Имена таблиц.
+        """
+        for table in tables:
+            self._values[table] = self._values.get(table, 0) + 1
+
+    def observe(self, table: str, shared_generation: int) -> bool:
+        """Учитывает значение общего счетчика таблицы.
+
+        Args:
+            table: Имя таблицы.
+            shared_generation: Значение счетчика `TableGeneration`.
+
+        Returns:
+            True, если значение новое и поколение увеличено.
+        """
+        if self._shared.get(table) == shared_generation:
+            return False
+        self._shared[table] = shared_generation
+        self.bump([table])
+        return True
+
+    def publish(self, table: str, shared_generation: int) -> None:
+        """Учитывает собственную запись процесса в таблицу.
+
+        Поколение увеличивается всегда, даже если значение общего
+        счетчика уже встречалось (например, после пересоздания БД),
+        а запомненное значение не дает опросу сбросить кэши
+        повторно.
+
+        Args:
+            table: Имя таблицы.
+            shared_generation: Значение счетчика после записи.
+        """
+        self._shared[table] = shared_generation
+        self.bump([table])
+
+
+table_generations = TableGenerations()
+
+
+def shared_generations_enabled() -> bool:
+    """Проверяет, ведутся ли общие счетчики таблиц.
+
+    Счетчики и их опрос нужны только общему кэшу запросов
+    процесса (`query_cache_scope` равен `process`). В остальных
+    режимах транзакции записи не обновляют строки
+    `TableGeneration` и не ждут их блокировок.
+    """
+    return (
+        settings.query_cache_scope == 'process' and
+        settings.invalidation_poll_interval > 0
+    )
+
+
+def written_tables(session: Session) -> Set[str]:
+    """Возвращает множество таблиц, измененных в транзакции сессии."""
+    return session.info.setdefault(WRITTEN_TABLES_KEY, set())
+
+
+def publish_generations(
+    connection: Connection, tables: Iterable[str]
+) -> Dict[str, int]:
+    """Увеличивает общие счетчики таблиц в текущей транзакции.
+
+    Строки счетчиков обновляются в порядке имен таблиц, чтобы
+    параллельные транзакции PostgreSQL не взаимоблокировались.
+    В PostgreSQL новые значения возвращает сам `INSERT ... RETURNING`,
+    в SQLite они читаются отдельным запросом.
+
+    Args:
+        connection: Соединение транзакции записи.
+        tables: Имена измененных таблиц.
+
+    Returns:
+        Новые значения счетчиков или пустой словарь, если СУБД не
+        поддерживает `INSERT ... ON CONFLICT`.
+    """
+    insert = INSERTS.get(connection.dialect.name)
+    if insert is None:
+        return {}
+    tables = sorted(tables)
+    statement = insert(TableGeneration).values([
+        {'name': table, 'generation': 1, 'changed_at': time.time()}
+        for table in tables
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=[TableGeneration.name],
+        set_={
+            'generation': TableGeneration.generation + 1,
+            'changed_at': statement.excluded.changed_at,
+        },
+    )
+    columns = (TableGeneration.name, TableGeneration.generation)
+    if connection.dialect.full_returning:
+        return dict(connection.execute(statement.returning(*columns)).all())
+    connection.execute(statement)
+    result = connection.execute(
+        select(*columns).where(TableGeneration.name.in_(tables))
+    )
+    return dict(result.all())
+
+
+@event.listens_for(Session, 'after_flush')
+def collect_flushed_tables(session, flush_context) -> None:
+    """Запоминает таблицы объектов, сохраненных при flush."""
+    tables = written_tables(session)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        tables.update(table.name for table in inspect(obj).mapper.tables)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def collect_executed_tables(orm_execute_state: ORMExecuteState) -> None:
+    """Запоминает таблицы INSERT, UPDATE и DELETE через сессию."""
+    if any((
+        orm_execute_state.is_insert,
+        orm_execute_state.is_update,
+        orm_execute_state.is_delete,
+    )):
+        written_tables(orm_execute_state.session).add(
+            orm_execute_state.statement.table.name
+        )
+
+
+@event.listens_for(Session, 'before_commit')
+def publish_written_tables(session) -> None:
+    """Увеличивает общие счетчики измененных таблиц перед commit.
+
+    Оставшиеся изменения сначала отправляются в БД, чтобы в
+    счетчики попали и таблицы последнего flush. Счетчики
+    обновляются в конце транзакции, поэтому блокировка их строк
+    держится только на время commit. Без общих счетчиков (см.
+    `shared_generations_enabled`) поколения растут только в
+    этом процессе.
+    """
+    if not shared_generations_enabled() or (
+        session.in_nested_transaction()
+    ):
+        return
+    session.flush()
+    tables = session.info.get(WRITTEN_TABLES_KEY)
+    if tables:
+        session.info[PUBLISHED_GENERATIONS_KEY] = publish_generations(
+            session.connection(), tables
+        )
+
+
+@event.listens_for(Session, 'after_commit')
+def bump_table_generations(session) -> None:
+    """Увеличивает поколения таблиц после фиксации транзакции."""
+    tables = session.info.pop(WRITTEN_TABLES_KEY, None)
+    published = session.info.pop(PUBLISHED_GENERATIONS_KEY, {})
+    if not tables:
+        return
+    for table in tables:
+        if table in published:
+            table_generations.publish(table, published[table])
+        else:
+            table_generations.bump([table])
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_written_tables(session) -> None:
+    """Забывает изменения транзакции после отката.
+
+    Откат SAVEPOINT не завершает транзакцию, поэтому изменения
+    сохраняются до ее commit или отката.
+    """
+    if not session.in_nested_transaction():
+        session.info.pop(WRITTEN_TABLES_KEY, None)
+        session.info.pop(PUBLISHED_GENERATIONS_KEY, None)
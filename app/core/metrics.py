@@ -0,0 +1,76 @@
+from collections import defaultdict
+from typing import DefaultDict, Dict, Tuple
+
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def format_value(value: float) -> str:
+    """Форматирует значение без потери точности целых счетчиков."""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Metrics:
+    """Счетчики процесса в текстовом формате Prometheus.
+
+    Метрика описывается один раз через `describe`, после чего ее
+    значения с разными метками увеличиваются через `inc`. Значения
+    хранятся в памяти процесса: каждый воркер отдает свои.
+    """
+
+    def __init__(self) -> None:
+        """Создает пустой реестр метрик."""
+        self._descriptions: Dict[str, Tuple[str, str]] = {}
+        self._values: DefaultDict[str, Dict[Labels, float]] = defaultdict(
+            dict
+        )
+
+    def describe(
+        self, name: str, description: str, kind: str = 'counter'
+    ) -> None:
+        """Регистрирует метрику.
+
+        Args:
+            name: Имя метрики.
+            description: Описание для строки `# HELP`.
+            kind: Тип метрики Prometheus: `counter` или `gauge`.
+        """
+        self._descriptions[name] = (description, kind)
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        """Увеличивает значение метрики с заданными метками."""
+        key = tuple(sorted(labels.items()))
+        values = self._values[name]
+        values[key] = values.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        """Задает значение метрики с заданными метками."""
+        self._values[name][tuple(sorted(labels.items()))] = value
+
+    def value(self, name: str, **labels: str) -> float:
+        """Возвращает значение метрики, 0 для незаписанной."""
+        return self._values[name].get(tuple(sorted(labels.items())), 0)
+
+    def render(self) -> str:
+        """Возвращает все метрики в текстовом формате Prometheus."""
+        lines = []
+        for name, (description, kind) in sorted(self._descriptions.items()):
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in sorted(self._values[name].items()):
+                label_text = ','.join(
+                    f'{label}="{label_value}"'
+                    for label, label_value in labels
+                )
+                if label_text:
+                    label_text = f'{{{label_text}}}'
+                lines.append(f'{name}{label_text} {format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self) -> None:
+        """Обнуляет значения всех метрик."""
+        self._values.clear()
+
+
+metrics = Metrics()
@@ -0,0 +1,85 @@
+from datetime import date, datetime
+import json
+from typing import Any, Dict, Iterable, List, Sequence, Type
+
+from pydantic import BaseModel
+from starlette.responses import Response
+
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """Сериализует значения, которые модуль json не знает."""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f'Тип {type(value).__name__} не сериализуется в JSON')
+
+
+def dumps(content: Any) -> bytes:
+    """Кодирует значение в JSON-байты.
+
+    Используется orjson, если он установлен, иначе стандартный
+    модуль json в том же компактном виде, что и `JSONResponse`.
+    Даты кодируются в ISO 8601, как в `jsonable_encoder`.
+
+    Args:
+        content: Значение из словарей, списков и простых типов.
+
+    Returns:
+        JSON в кодировке UTF-8.
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content,
+        default=_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(',', ':'),
+    ).encode('utf-8')
+
+
+class FastJSONResponse(Response):
+    """JSON-ответ, кодируемый без `jsonable_encoder`."""
+
+    media_type = 'application/json'
+
+    def render(self, content: Any) -> bytes:
+        """Кодирует содержимое ответа."""
+        return dumps(content)
+
+
+def schema_fields(schema: Type[BaseModel]) -> List[str]:
+    """Возвращает имена полей схемы в порядке вывода."""
+    return list(schema.__fields__)
+
+
+def rows_to_dicts(
+    fields: Sequence[str], rows: Iterable[Sequence[Any]]
+) -> List[Dict[str, Any]]:
+    """Превращает строки выборки в словари полей схемы.
+
+    Поля со значением None пропускаются, как при
+    `response_model_exclude_none=True`.
+
+    Args:
+        fields: Имена полей в порядке столбцов строки. Лишние
+            столбцы в конце строки отбрасываются.
+        rows: Строки выборки.
+
+    Returns:
+        Словари для кодирования в JSON.
+    """
+    return [
+        {
+            field: value
+            # Лишние столбцы в конце строки отбрасываются.
+            for field, value in zip(fields, row, strict=False)
+            if value is not None
+        }
+        for row in rows
+    ]
@@ -10,14 +10,25 @@ from fastapi_users import (
 )
 from fastapi_users.authentication import (
     AuthenticationBackend,
+    Authenticator,
     BearerTransport,
     JWTStrategy,
 )
 from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
+import jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.core.db import get_async_session
+from app.core.db import (
+    READ_PRIMARY,
+    AsyncReadSessionLocal,
+    engine,
+    get_async_read_session,
+    get_async_session,
+    read_engine,
+    read_your_writes,
+)
+from app.core.user_cache import user_cache
 from app.models.user import User
 from app.schemas.user import UserCreate
 
@@ -40,9 +51,95 @@ async def get_user_db(
     yield SQLAlchemyUserDatabase(session, User)
 
 
+class ReadUserDatabase(SQLAlchemyUserDatabase):
+    """База пользователей для проверки токенов на реплике.
+
+    Пользователь, только что зарегистрированный на основной БД,
+    может еще не появиться на реплике, поэтому при промахе он
+    ищется на основной БД.
+    """
+
+    async def get(self, id: int) -> Optional[User]:
+        """
+        Возвращает пользователя по идентификатору.
+
+        Args:
+            id: Идентификатор пользователя
+
+        Returns:
+            Optional[User]: Пользователь или None, если его нет
+        """
+        user = await super().get(id)
+        if user is not None or read_engine is engine:
+            return user
+        async with AsyncReadSessionLocal(info={READ_PRIMARY: True}) as session:
+            return await SQLAlchemyUserDatabase(session, User).get(id)
+
+
+async def get_read_user_db(
+    session: AsyncSession = Depends(get_async_read_session),
+) -> AsyncGenerator[SQLAlchemyUserDatabase, None]:
+    """
+    Генератор базы данных пользователей только для чтения.
+
+    Args:
+        session: Асинхронная сессия только для чтения
+
+    Yields:
+        SQLAlchemyUserDatabase: База данных пользователей
+    """
+    yield ReadUserDatabase(session, User)
+
+
 bearer_transport = BearerTransport(tokenUrl='auth/jwt/login')
 
 
+class CachedJWTStrategy(JWTStrategy):
+    """Стратегия JWT, запоминающая пользователей токенов.
+
+    Повторная проверка того же токена берет пользователя из
+    `user_cache` без разбора токена и запроса к БД.
+    """
+
+    async def read_token(
+        self,
+        token: Optional[str],
+        user_manager: BaseUserManager[User, int],
+    ) -> Optional[User]:
+        """
+        Возвращает пользователя по токену.
+
+        Args:
+            token: Токен доступа
+            user_manager: Менеджер пользователей
+
+        Returns:
+            Optional[User]: Пользователь или None, если токен
+                            недействителен
+        """
+        if token is None:
+            return None
+        user = user_cache.get(token)
+        if user is not None:
+            return user
+        # Поколение берется до чтения: запись, сделанная во время
+        # чтения, сделает сохраненного пользователя устаревшим. Промах
+        # читается с основной БД, чтобы отстающая реплика не попала
+        # в кэш под новым поколением.
+        generation = user_cache.generation()
+        user_db = getattr(user_manager, 'user_db', None)
+        if settings.user_cache_ttl > 0 and isinstance(
+            user_db, SQLAlchemyUserDatabase
+        ):
+            user_db.session.info[READ_PRIMARY] = True
+        user = await super().read_token(token, user_manager)
+        if user is not None:
+            # Подпись и срок токена уже проверены.
+            claims = jwt.decode(token, options={'verify_signature': False})
+            user_cache.put(token, user, generation, claims.get('exp'))
+        return user
+
+
 def get_jwt_strategy() -> JWTStrategy:
     """
     Создает стратегию JWT для аутентификации.
@@ -50,7 +147,7 @@ def get_jwt_strategy() -> JWTStrategy:
     Returns:
         JWTStrategy: Стратегия JWT с настройками из конфигурации
     """
-    return JWTStrategy(secret=settings.secret, lifetime_seconds=3600)
+    return CachedJWTStrategy(secret=settings.secret, lifetime_seconds=3600)
 
 
 auth_backend = AuthenticationBackend(
@@ -115,10 +212,54 @@ async def get_user_manager(
     yield UserManager(user_db)
 
 
+async def get_read_user_manager(
+    user_db: SQLAlchemyUserDatabase = Depends(get_read_user_db),
+) -> AsyncGenerator[UserManager, None]:
+    """
+    Генератор менеджера пользователей для проверки токенов.
+
+    Args:
+        user_db: База данных пользователей только для чтения
+
+    Yields:
+        UserManager: Менеджер пользователей
+    """
+    yield UserManager(user_db)
+
+
 fastapi_users = FastAPIUsers[User, int](
     get_user_manager,
     [auth_backend],
 )
 
-current_user = fastapi_users.current_user(active=True)
-current_superuser = fastapi_users.current_user(active=True, superuser=True)
+# Текущий пользователь определяется по сессии только для чтения,
+# роутеры fastapi-users работают с основной БД.
+read_authenticator = Authenticator([auth_backend], get_read_user_manager)
+current_user = read_authenticator.current_user(active=True)
+current_superuser = read_authenticator.current_user(
+    active=True, superuser=True
+)
+
+
+async def get_user_read_session(
+    user: User = Depends(current_user),
+    session: AsyncSession = Depends(get_async_read_session, use_cache=False),
+) -> AsyncSession:
+    """
+    Возвращает сессию чтения данных текущего пользователя.
+
+    Пользователь, недавно сделавший пожертвование, читает с основной
+    БД, чтобы увидеть его, даже если реплика отстает. Сессия не
+    разделяется с проверкой токена, поэтому выбор БД происходит до
+    ее первого запроса.
+
+    Args:
+        user: Текущий пользователь
+        session: Асинхронная сессия только для чтения
+
+    Returns:
+        AsyncSession: Сессия только для чтения
+    """
+    if read_your_writes.use_primary(user.id):
+        session.info[READ_PRIMARY] = True
+    return session
@@ -0,0 +1,104 @@
+from collections import OrderedDict
+import time
+from typing import Optional
+
+from app.core.config import settings
+from app.core.generations import table_generations
+from app.core.metrics import metrics
+from app.crud.cache import ObjectState
+from app.models.user import User
+
+
+HITS_METRIC = 'qrkot_user_cache_hits_total'
+MISSES_METRIC = 'qrkot_user_cache_misses_total'
+
+metrics.describe(
+    HITS_METRIC, 'Проверки токенов, пользователь которых взят из кэша.'
+)
+metrics.describe(
+    MISSES_METRIC, 'Проверки токенов, прочитавшие пользователя из БД.'
+)
+
+
+class UserCache:
+    """Кэш пользователей, найденных по токенам доступа.
+
+    Ключ записи состоит из токена и поколения таблицы пользователей.
+    Commit любого изменения пользователей, в том числе
+    `PATCH /users/me` и снятия флага `is_active` через
+    `PATCH /users/{id}`, увеличивает поколение (см.
+    `app.core.generations`), и все записи перестают совпадать.
+    Изменения в других воркерах учитываются через опрос общих
+    счетчиков таблиц.
+
+    Запись живет не дольше `user_cache_ttl` секунд и не дольше
+    срока действия токена. Число записей ограничено
+    `user_cache_max_entries`, при `user_cache_ttl` равном 0 кэш
+    выключен.
+
+    Хранятся значения столбцов, а каждое попадание создает новый
+    объект `User` вне сессии, поэтому запросы не делят объекты.
+    """
+
+    def __init__(self) -> None:
+        """Создает пустой кэш."""
+        self._entries: OrderedDict = OrderedDict()
+
+    @staticmethod
+    def generation() -> int:
+        """Возвращает текущее поколение таблицы пользователей."""
+        return table_generations.get(User.__table__.name)
+
+    def get(self, token: str) -> Optional[User]:
+        """Возвращает пользователя токена из кэша.
+
+        Args:
+            token: Токен доступа.
+
+        Returns:
+            Пользователь или None, если записи нет или она устарела.
+        """
+        if settings.user_cache_ttl <= 0:
+            return None
+        key = (token, self.generation())
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.time():
+            self._entries.move_to_end(key)
+            metrics.inc(HITS_METRIC)
+            return entry[1].detached()
+        self._entries.pop(key, None)
+        metrics.inc(MISSES_METRIC)
+        return None
+
+    def put(
+        self,
+        token: str,
+        user: User,
+        generation: int,
+        expires_at: Optional[float] = None,
+    ) -> None:
+        """Сохраняет пользователя токена.
+
+        Args:
+            token: Токен доступа.
+            user: Пользователь, найденный по токену.
+            generation: Поколение таблицы пользователей до чтения.
+            expires_at: Время истечения токена в секундах Unix.
+        """
+        if settings.user_cache_ttl <= 0:
+            return
+        deadline = time.time() + settings.user_cache_ttl
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        key = (token, generation)
+        self._entries[key] = (deadline, ObjectState.capture(user))
+        self._entries.move_to_end(key)
+        while len(self._entries) > settings.user_cache_max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Удаляет все записи."""
+        self._entries.clear()
+
+
+user_cache = UserCache()
@@ -1,15 +1,27 @@
-from app.crud.base import CRUDBase
+from app.crud.base import CRUDBase, Page
+from app.crud.base_investment import CRUDBaseInvestment
+from app.crud.cache import QueryCache, query_cache
 from app.crud.charity_project import (
     CRUDCharityProject,
     charity_project_crud,
 )
 from app.crud.donation import CRUDDonation, donation_crud
+from app.crud.fund_pool import CRUDFundPool, fund_pool_crud
+from app.crud.investment import CRUDInvestment, investment_crud
 
 
 __all__ = [
     'CRUDBase',
+    'Page',
+    'CRUDBaseInvestment',
+    'QueryCache',
+    'query_cache',
     'CRUDCharityProject',
     'charity_project_crud',
     'CRUDDonation',
     'donation_crud',
+    'CRUDFundPool',
+    'fund_pool_crud',
+    'CRUDInvestment',
+    'investment_crud',
 ]
@@ -1,11 +1,28 @@
-from typing import Any, Dict, Generic, Optional, Sequence, Type, TypeVar
+import base64
+import binascii
+from datetime import datetime
+import json
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import inspect, select, tuple_
+from sqlalchemy.engine import Result
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.db import Base
+from app.crud.cache import query_cache
 
 
 ModelType = TypeVar('ModelType', bound=Base)
@@ -13,13 +30,38 @@ CreateSchemaType = TypeVar('CreateSchemaType', bound=BaseModel)
 UpdateSchemaType = TypeVar('UpdateSchemaType', bound=BaseModel)
 
 
+def scalars_all(result: Result) -> List[Any]:
+    """Возвращает объекты ORM из результата запроса."""
+    return result.scalars().all()
+
+
+class Page(NamedTuple):
+    """Страница выборки.
+
+    Attributes:
+        items: Объекты страницы.
+        next_cursor: Курсор следующей страницы или None, если
+            страница последняя.
+    """
+
+    items: List[Any]
+    next_cursor: Optional[str]
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     """Базовый CRUD класс для работы с данными.
 
     Предоставляет стандартные операции создания, чтения,
-    обновления и удаления.
+    обновления и удаления. Чтения `get`, `get_multi`, `find_by` и
+    `find_one_by` проходят через кэш запросов `query_cache`.
+
+    Attributes:
+        cursor_columns: Столбцы ключа постраничной выборки. Вместе
+            они должны однозначно задавать порядок записей.
     """
 
+    cursor_columns: Tuple[str, ...] = ('create_date', 'id')
+
     def __init__(self, model: Type[ModelType]) -> None:
         """Инициализирует CRUD с указанной моделью.
 
@@ -33,6 +75,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj_in: CreateSchemaType,
         session: AsyncSession,
         extra_data: Optional[Dict[str, Any]] = None,
+        commit: bool = True,
     ) -> ModelType:
         """Создает новый объект в базе данных.
 
@@ -40,6 +83,9 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             obj_in: Схема создания объекта.
             session: Асинхронная сессия базы данных.
             extra_data: Дополнительные данные для объекта.
+            commit: Зафиксировать транзакцию. Если False, объект
+                только вставляется через flush, а фиксация остается
+                за вызывающим кодом.
 
         Returns:
             Созданный объект.
@@ -49,10 +95,66 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             obj_data.update(extra_data)
         db_obj = self.model(**obj_data)
         session.add(db_obj)
-        await session.commit()
-        await session.refresh(db_obj)
+        await self._save(session, commit, db_obj)
         return db_obj
 
+    async def create_multi(
+        self,
+        objs_in: Sequence[CreateSchemaType],
+        session: AsyncSession,
+        extra_data: Optional[Dict[str, Any]] = None,
+        extra_data_items: Optional[Sequence[Dict[str, Any]]] = None,
+    ) -> List[ModelType]:
+        """Создает несколько объектов одной пачкой.
+
+        Объекты вставляются одним flush в текущей транзакции,
+        фиксация остается за вызывающим кодом.
+
+        Args:
+            objs_in: Схемы создания объектов.
+            session: Асинхронная сессия базы данных.
+            extra_data: Дополнительные данные для каждого объекта.
+            extra_data_items: Дополнительные данные отдельно для
+                каждого объекта, в порядке `objs_in`.
+
+        Returns:
+            Созданные объекты в исходном порядке.
+        """
+        db_objs = []
+        for position, obj_in in enumerate(objs_in):
+            obj_data = obj_in.dict()
+            if extra_data:
+                obj_data.update(extra_data)
+            if extra_data_items:
+                obj_data.update(extra_data_items[position])
+            db_objs.append(self.model(**obj_data))
+        session.add_all(db_objs)
+        await session.flush()
+        return db_objs
+
+    async def refresh_multi(
+        self, db_objs: Sequence[ModelType], session: AsyncSession
+    ) -> None:
+        """Перечитывает объекты из БД одним запросом.
+
+        Используется после единственного commit вместо
+        `session.refresh` для каждого объекта. Идентификаторы
+        берутся из карты идентичности, поэтому метод можно
+        вызывать для объектов, истекших после commit.
+
+        Args:
+            db_objs: Объекты для обновления.
+            session: Асинхронная сессия БД.
+        """
+        if not db_objs:
+            return
+        obj_ids = [inspect(obj).identity[0] for obj in db_objs]
+        await session.execute(
+            select(self.model)
+            .where(self.model.id.in_(obj_ids))
+            .execution_options(populate_existing=True)
+        )
+
     async def get(
         self, obj_id: int, session: AsyncSession
     ) -> Optional[ModelType]:
@@ -65,22 +167,164 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         Returns:
             Найденный объект или None.
         """
-        result = await session.execute(
-            select(self.model).where(self.model.id == obj_id)
+        return await query_cache.fetch(
+            session,
+            self.model,
+            ('get', obj_id),
+            select(self.model).where(self.model.id == obj_id),
+            Result.scalar_one_or_none,
+        )
+
+    def encode_cursor(self, db_obj: Any) -> str:
+        """Возвращает непрозрачный курсор, указывающий на объект.
+
+        Args:
+            db_obj: Последний объект или строка выборки страницы.
+
+        Returns:
+            Строка base64url со значениями `cursor_columns` объекта.
+        """
+        values = [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in (
+                getattr(db_obj, name) for name in self.cursor_columns
+            )
+        ]
+        return base64.urlsafe_b64encode(
+            json.dumps(values).encode()
+        ).decode().rstrip('=')
+
+    def decode_cursor(self, cursor: str) -> Tuple[Any, ...]:
+        """Восстанавливает значения ключа из курсора.
+
+        Args:
+            cursor: Курсор, полученный от `encode_cursor`.
+
+        Returns:
+            Значения `cursor_columns` объекта, после которого
+            начинается страница.
+
+        Raises:
+            ValueError: Если курсор поврежден или выдан для другого
+                ключа.
+        """
+        try:
+            values = json.loads(
+                base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            )
+        except (binascii.Error, UnicodeDecodeError) as error:
+            raise ValueError('Некорректный курсор.') from error
+        if not isinstance(values, list) or (
+            len(values) != len(self.cursor_columns)
+        ):
+            raise ValueError('Некорректный курсор.')
+        decoded = []
+        for name, value in zip(self.cursor_columns, values, strict=True):
+            python_type = getattr(self.model, name).type.python_type
+            try:
+                if python_type is datetime:
+                    value = datetime.fromisoformat(value)
+                elif not isinstance(value, python_type):
+                    raise TypeError(name)
+            except TypeError as error:
+                raise ValueError('Некорректный курсор.') from error
+            decoded.append(value)
+        return tuple(decoded)
+
+    async def get_multi(
+        self,
+        session: AsyncSession,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[Any, ...]] = None,
+        fields: Optional[Sequence[str]] = None,
+        **filter_kwargs: Any,
+    ) -> Sequence[Any]:
+        """Получает объекты из БД в порядке `cursor_columns`.
+
+        Без `limit` возвращаются все объекты. С `limit` выборка
+        постраничная по ключу (keyset): объекты после `after`
+        читаются по индексу без OFFSET, поэтому стоимость страницы
+        не растет с ее номером.
+
+        С `fields` вместо объектов ORM читаются строки только с
+        этими столбцами, что заметно дешевле для больших списков.
+        Недостающие столбцы ключа добавляются в конец строки.
+
+        Args:
+            session: Асинхронная сессия БД.
+            limit: Максимальное число объектов.
+            after: Значения ключа, после которых начинается выборка.
+            fields: Имена столбцов или гибридных свойств модели.
+            **filter_kwargs: Критерии фильтрации, как в `find_by`.
+
+        Returns:
+            Список объектов или строк выборки.
+        """
+        columns = [getattr(self.model, name) for name in self.cursor_columns]
+        if fields is None:
+            query = select(self.model)
+        else:
+            names = list(fields) + [
+                name for name in self.cursor_columns if name not in fields
+            ]
+            query = select(*(getattr(self.model, name) for name in names))
+        query = query.order_by(*columns)
+        for key, value in filter_kwargs.items():
+            query = query.where(getattr(self.model, key) == value)
+        if after is not None:
+            query = query.where(tuple_(*columns) > tuple(after))
+        if limit is not None:
+            query = query.limit(limit)
+        return await query_cache.fetch(
+            session,
+            self.model,
+            (
+                'get_multi',
+                limit,
+                after,
+                None if fields is None else tuple(fields),
+                tuple(sorted(filter_kwargs.items())),
+            ),
+            query,
+            scalars_all if fields is None else Result.all,
         )
-        return result.scalar_one_or_none()
 
-    async def get_multi(self, session: AsyncSession) -> Sequence[ModelType]:
-        """Получает все объекты из БД.
+    async def get_page(
+        self,
+        session: AsyncSession,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[Any, ...]] = None,
+        fields: Optional[Sequence[str]] = None,
+        **filter_kwargs: Any,
+    ) -> Page:
+        """Получает страницу объектов и курсор следующей страницы.
+
+        Читается на один объект больше `limit`, чтобы курсор
+        выдавался, только если следующая страница не пуста.
 
         Args:
             session: Асинхронная сессия БД.
+            limit: Размер страницы. Без него возвращаются все
+                объекты одной страницей.
+            after: Значения ключа из курсора предыдущей страницы.
+            fields: Имена столбцов для выборки строк, как в
+                `get_multi`.
+            **filter_kwargs: Критерии фильтрации, как в `find_by`.
 
         Returns:
-            Список всех объектов.
+            Страница объектов или строк выборки.
         """
-        result = await session.execute(select(self.model))
-        return result.scalars().all()
+        if limit is None:
+            items = await self.get_multi(
+                session, fields=fields, **filter_kwargs
+            )
+            return Page(list(items), None)
+        items = list(await self.get_multi(
+            session, limit + 1, after, fields, **filter_kwargs
+        ))
+        if len(items) <= limit:
+            return Page(items, None)
+        return Page(items[:limit], self.encode_cursor(items[limit - 1]))
 
     async def find_by(
         self, session: AsyncSession, **filter_kwargs: Any
@@ -101,8 +345,13 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         for key, value in filter_kwargs.items():
             if hasattr(self.model, key):
                 query = query.where(getattr(self.model, key) == value)
-        result = await session.execute(query)
-        return result.scalars().all()
+        return await query_cache.fetch(
+            session,
+            self.model,
+            ('find_by', tuple(sorted(filter_kwargs.items()))),
+            query,
+            scalars_all,
+        )
 
     async def find_one_by(
         self, session: AsyncSession, **filter_kwargs: Any
@@ -123,14 +372,20 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         for key, value in filter_kwargs.items():
             if hasattr(self.model, key):
                 query = query.where(getattr(self.model, key) == value)
-        result = await session.execute(query)
-        return result.scalar_one_or_none()
+        return await query_cache.fetch(
+            session,
+            self.model,
+            ('find_one_by', tuple(sorted(filter_kwargs.items()))),
+            query,
+            Result.scalar_one_or_none,
+        )
 
     async def update(
         self,
         db_obj: ModelType,
         obj_in: UpdateSchemaType,
         session: AsyncSession,
+        commit: bool = True,
     ) -> ModelType:
         """Обновляет существующий объект.
 
@@ -138,6 +393,8 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             db_obj: Объект для обновления.
             obj_in: Схема обновления с новыми данными.
             session: Асинхронная сессия БД.
+            commit: Зафиксировать транзакцию. Если False, изменения
+                только отправляются в БД через flush.
 
         Returns:
             Обновленный объект.
@@ -149,22 +406,42 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             if field in update_data:
                 setattr(db_obj, field, update_data[field])
         session.add(db_obj)
-        await session.commit()
-        await session.refresh(db_obj)
+        await self._save(session, commit, db_obj)
         return db_obj
 
     async def remove(
-        self, db_obj: ModelType, session: AsyncSession
+        self, db_obj: ModelType, session: AsyncSession, commit: bool = True
     ) -> ModelType:
         """Удаляет объект из БД.
 
         Args:
             db_obj: Объект для удаления.
             session: Асинхронная сессия БД.
+            commit: Зафиксировать транзакцию. Если False, удаление
+                только отправляется в БД через flush.
 
         Returns:
             Удаленный объект.
         """
         await session.delete(db_obj)
-        await session.commit()
+        if commit:
+            await session.commit()
+        else:
+            await session.flush()
         return db_obj
+
+    async def _save(
+        self, session: AsyncSession, commit: bool, db_obj: ModelType
+    ) -> None:
+        """Фиксирует транзакцию или только отправляет изменения в БД.
+
+        Args:
+            session: Асинхронная сессия БД.
+            commit: Зафиксировать транзакцию и перечитать объект.
+            db_obj: Сохраняемый объект.
+        """
+        if not commit:
+            await session.flush()
+            return
+        await session.commit()
+        await session.refresh(db_obj)
@@ -0,0 +1,378 @@
+from datetime import datetime, timezone
+from itertools import pairwise
+from typing import Dict, Sequence
+
+from sqlalchemy import (
+    and_,
+    bindparam,
+    case,
+    false,
+    func,
+    null,
+    select,
+    true,
+    tuple_,
+    update,
+)
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.crud.base import (
+    CreateSchemaType,
+    CRUDBase,
+    ModelType,
+    UpdateSchemaType,
+)
+
+
+def is_contiguous_prefix(rows: Sequence[Row]) -> bool:
+    """Открытые записи диапазона подходят для арифметики отрезков.
+
+    Отрезки должны идти встык в порядке FIFO, а вложения могут
+    быть только у первой записи.
+
+    Args:
+        rows: Записи с полями `cumulative_start`, `cumulative_end`
+            и `invested_amount` в порядке `(create_date, id)`.
+
+    Returns:
+        True, если записи образуют непрерывную очередь.
+    """
+    for previous, row in pairwise(rows):
+        if row.cumulative_start != previous.cumulative_end:
+            return False
+        if row.invested_amount:
+            return False
+    return True
+
+
+class CRUDBaseInvestment(
+    CRUDBase[ModelType, CreateSchemaType, UpdateSchemaType]
+):
+    """Базовый CRUD для моделей, участвующих в инвестировании.
+
+    Содержит общие запросы к открытому пулу проектов или
+    пожертвований и распределение средств на стороне БД.
+    """
+
+    @property
+    def is_open(self) -> ColumnElement:
+        """Условие записи открытого пула источников средств.
+
+        Записи, ожидающие фонового распределения, еще не заняли
+        место в очереди FIFO и источниками не считаются.
+        """
+        return and_(
+            self.model.fully_invested.is_(False),
+            self.model.allocation_pending.isnot(True),
+        )
+
+    @staticmethod
+    def lock_for_allocation(query: Select, session: AsyncSession) -> Select:
+        """Блокирует читаемые для распределения строки в PostgreSQL.
+
+        Строки, уже заблокированные другой транзакцией, пропускаются
+        (`SKIP LOCKED`): параллельные распределения берут разные
+        источники и не ждут друг друга. В SQLite блокировок строк
+        нет, запись сериализуется блокировкой `writer_lock`.
+
+        Args:
+            query: Запрос открытых записей.
+            session: Асинхронная сессия базы данных.
+
+        Returns:
+            Запрос с `FOR UPDATE SKIP LOCKED` для PostgreSQL,
+            иначе исходный запрос.
+        """
+        if session.bind.dialect.name == 'postgresql':
+            return query.with_for_update(skip_locked=True)
+        return query
+
+    async def get_active(self, session: AsyncSession) -> Sequence[ModelType]:
+        """Получает все открытые объекты в порядке FIFO.
+
+        В PostgreSQL объекты блокируются до конца транзакции.
+
+        Args:
+            session: Асинхронная сессия базы данных.
+
+        Returns:
+            Список открытых объектов, отсортированных по дате создания.
+        """
+        result = await session.execute(
+            self.lock_for_allocation(
+                select(self.model)
+                .where(self.is_open)
+                .order_by(self.model.create_date, self.model.id),
+                session,
+            )
+        )
+        return result.scalars().all()
+
+    async def _update_read_rows(
+        self, rows: Sequence[Row], values: dict, session: AsyncSession
+    ) -> None:
+        """Обновляет прочитанные строки, если их версии не изменились.
+
+        Args:
+            rows: Строки с полями `id` и `version_id`.
+            values: Новые значения колонок.
+            session: Асинхронная сессия базы данных.
+
+        Raises:
+            StaleDataError: Если часть строк изменилась после чтения.
+        """
+        model = self.model
+        result = await session.execute(
+            update(model)
+            .where(
+                tuple_(model.id, model.version_id).in_(
+                    [(row.id, row.version_id) for row in rows]
+                )
+            )
+            .values(version_id=model.version_id + 1, **values)
+            .execution_options(synchronize_session=False)
+        )
+        if 0 <= result.rowcount < len(rows):
+            raise StaleDataError(
+                f'{model.__tablename__}: ожидалось обновление '
+                f'{len(rows)} строк, обновлено {result.rowcount}.'
+            )
+
+    async def invest_in_db(
+        self, required: int, session: AsyncSession
+    ) -> Dict[int, int]:
+        """Распределяет сумму по открытым объектам средствами SQL.
+
+        Накопленные остатки считаются оконной функцией
+        `SUM() OVER (ORDER BY create_date, id)`, поэтому в память
+        попадают только затронутые строки. Затем одним UPDATE
+        заполняются и закрываются эти строки, если их версии
+        не изменились с момента чтения.
+
+        Args:
+            required: Сумма, которую нужно распределить.
+            session: Асинхронная сессия базы данных.
+
+        Returns:
+            Словарь `id -> вложенная сумма` в порядке FIFO.
+
+        Raises:
+            StaleDataError: Если строки изменила другая транзакция.
+        """
+        if required <= 0:
+            return {}
+        model = self.model
+        available = model.full_amount - model.invested_amount
+        pool = (
+            select(
+                model.id.label('id'),
+                model.version_id.label('version_id'),
+                available.label('available'),
+                func.sum(available)
+                .over(order_by=(model.create_date, model.id))
+                .label('running_total'),
+            )
+            .where(
+                self.is_open,
+                model.full_amount > model.invested_amount,
+            )
+            .subquery()
+        )
+        rows = (
+            await session.execute(
+                select(
+                    pool.c.id,
+                    pool.c.version_id,
+                    pool.c.available,
+                    pool.c.running_total,
+                )
+                .where(pool.c.running_total - pool.c.available < required)
+                .order_by(pool.c.running_total)
+            )
+        ).all()
+        if not rows:
+            return {}
+
+        amounts = {row.id: row.available for row in rows}
+        last = rows[-1]
+        partial_id = None
+        if last.running_total > required:
+            partial_id = last.id
+            amounts[partial_id] = required - (
+                last.running_total - last.available
+            )
+
+        close_date = datetime.now(timezone.utc)
+        if partial_id is None:
+            values = {
+                'invested_amount': model.full_amount,
+                'fully_invested': true(),
+                'close_date': close_date,
+            }
+        else:
+            is_partial = model.id == partial_id
+            values = {
+                'invested_amount': case(
+                    (is_partial,
+                     model.invested_amount + amounts[partial_id]),
+                    else_=model.full_amount,
+                ),
+                'fully_invested': case((is_partial, false()), else_=true()),
+                'close_date': case(
+                    (is_partial, null()), else_=close_date
+                ),
+            }
+        await self._update_read_rows(rows, values, session)
+        return amounts
+
+    async def invest_by_interval(
+        self, required: int, session: AsyncSession
+    ) -> Dict[int, int]:
+        """Распределяет сумму по открытым объектам через отрезки.
+
+        Каждая запись занимает отрезок
+        `[cumulative_start, cumulative_end)` на числовой прямой
+        таблицы. Прямая строится в порядке `(create_date, id)`, как
+        и очередь FIFO остальных алгоритмов, а уже распределенная
+        часть пула образует ее начало. Распределение сдвигает эту
+        границу на `required`: отрезки левее новой границы
+        закрываются, а отрезок, через который она проходит,
+        заполняется частично. Все это делает один UPDATE по
+        диапазону, число запросов не зависит от размера открытого
+        пула.
+
+        Если в диапазоне есть закрытые записи, записи, ожидающие
+        фонового распределения, или частично заполненные записи
+        после первой открытой (например, созданные в обход
+        распределения), арифметика отрезков неприменима, и
+        распределение выполняется `invest_in_db`.
+
+        Args:
+            required: Сумма, которую нужно распределить.
+            session: Асинхронная сессия базы данных.
+
+        Returns:
+            Словарь `id -> вложенная сумма` в порядке FIFO.
+
+        Raises:
+            StaleDataError: Если строки изменила другая транзакция.
+        """
+        if required <= 0:
+            return {}
+        model = self.model
+        is_open = self.is_open
+        first = (
+            await session.execute(
+                select(model.cumulative_start, model.invested_amount)
+                .where(is_open)
+                .order_by(model.create_date, model.id)
+                .limit(1)
+            )
+        ).first()
+        if first is None:
+            return {}
+        frontier = first.cumulative_start + first.invested_amount
+        new_frontier = frontier + required
+
+        in_range = (
+            model.cumulative_start >= first.cumulative_start,
+            model.cumulative_start < new_frontier,
+        )
+        rows = (
+            await session.execute(
+                select(
+                    model.id,
+                    model.version_id,
+                    model.cumulative_start,
+                    model.cumulative_end,
+                    model.invested_amount,
+                )
+                .where(is_open, *in_range)
+                .order_by(model.create_date, model.id)
+            )
+        ).all()
+        closed_in_range = (
+            await session.execute(
+                select(model.id)
+                .where(model.fully_invested.is_(True), *in_range)
+                .limit(1)
+            )
+        ).first()
+        if closed_in_range is not None or not is_contiguous_prefix(rows):
+            return await self.invest_in_db(required, session)
+
+        amounts = {
+            row.id: min(row.cumulative_end, new_frontier) - (
+                row.cumulative_start + row.invested_amount
+            )
+            for row in rows
+        }
+
+        is_covered = model.cumulative_end <= new_frontier
+        await self._update_read_rows(rows, {
+            'invested_amount': case(
+                (is_covered, model.full_amount),
+                else_=new_frontier - model.cumulative_start,
+            ),
+            'fully_invested': is_covered,
+            'close_date': case(
+                (is_covered, datetime.now(timezone.utc)),
+                else_=model.close_date,
+            ),
+        }, session)
+        return {
+            obj_id: amount for obj_id, amount in amounts.items() if amount
+        }
+
+    async def add_invested_amounts(
+        self, amounts: Dict[int, int], session: AsyncSession
+    ) -> None:
+        """Увеличивает вложенные суммы заданных записей.
+
+        Записи, получившие всю сумму, закрываются. Обновление
+        выполняется одним executemany и не затрагивает строки,
+        которые переполнились бы от прибавки.
+
+        Args:
+            amounts: Словарь `id -> добавляемая сумма`.
+            session: Асинхронная сессия базы данных.
+
+        Raises:
+            StaleDataError: Если часть записей уже изменилась в БД.
+        """
+        if not amounts:
+            return
+        model = self.model
+        new_invested = model.invested_amount + bindparam('amount')
+        is_covered = new_invested >= model.full_amount
+        result = await session.execute(
+            update(model)
+            .where(
+                model.id == bindparam('row_id'),
+                self.is_open,
+                new_invested <= model.full_amount,
+            )
+            .values(
+                version_id=model.version_id + 1,
+                invested_amount=new_invested,
+                fully_invested=is_covered,
+                close_date=case(
+                    (is_covered, datetime.now(timezone.utc)),
+                    else_=model.close_date,
+                ),
+            )
+            .execution_options(synchronize_session=False),
+            [
+                {'row_id': obj_id, 'amount': amount}
+                for obj_id, amount in amounts.items()
+            ],
+        )
+        if 0 <= result.rowcount < len(amounts):
+            raise StaleDataError(
+                f'{model.__tablename__}: ожидалось обновление '
+                f'{len(amounts)} строк, обновлено {result.rowcount}.'
+            )
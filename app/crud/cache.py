@@ -0,0 +1,209 @@
+from collections import OrderedDict
+import time
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Type
+
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Result
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.sql import Select
+
+from app.core.config import settings
+from app.core.db import Base
+from app.core.generations import WRITTEN_TABLES_KEY, table_generations
+from app.core.metrics import metrics
+
+
+# Ключ `Session.info` с кэшем запросов в области `request`.
+QUERY_CACHE_KEY = 'query_cache'
+
+HITS_METRIC = 'qrkot_query_cache_hits_total'
+MISSES_METRIC = 'qrkot_query_cache_misses_total'
+
+metrics.describe(HITS_METRIC, 'Чтения CRUD, выданные из кэша запросов.')
+metrics.describe(MISSES_METRIC, 'Чтения CRUD, выполненные в БД.')
+
+
+class ObjectState(NamedTuple):
+    """Значения столбцов объекта ORM, отвязанные от сессии."""
+
+    model: Type[Base]
+    values: Dict[str, Any]
+
+    @classmethod
+    def capture(cls, obj: Base) -> 'ObjectState':
+        """Запоминает значения столбцов объекта."""
+        return cls(type(obj), {
+            attr.key: getattr(obj, attr.key)
+            for attr in inspect(obj).mapper.column_attrs
+        })
+
+    def restore(self, session: AsyncSession) -> Base:
+        """Возвращает объект с этими значениями в сессии без запроса к БД.
+
+        Если объект с тем же ключом уже загружен в сессию, возвращается
+        он, чтобы не перезаписать его состояние.
+        """
+        mapper = inspect(self.model)
+        identity_key = mapper.identity_key_from_primary_key([
+            self.values[column.key] for column in mapper.primary_key
+        ])
+        existing = session.identity_map.get(identity_key)
+        if existing is not None:
+            return existing
+        obj = self.detached()
+        session.add(obj)
+        return obj
+
+    def detached(self) -> Base:
+        """Создает объект с этими значениями вне сессии."""
+        obj = inspect(self.model).class_manager.new_instance()
+        for key, value in self.values.items():
+            set_committed_value(obj, key, value)
+        make_transient_to_detached(obj)
+        return obj
+
+
+def capture(result: Any) -> Any:
+    """Превращает результат чтения в значение для общего кэша."""
+    if isinstance(result, Base):
+        return ObjectState.capture(result)
+    if isinstance(result, list):
+        return [capture(item) for item in result]
+    return result
+
+
+def restore(value: Any, session: AsyncSession) -> Any:
+    """Восстанавливает результат чтения из общего кэша в сессию."""
+    if isinstance(value, ObjectState):
+        return value.restore(session)
+    if isinstance(value, list):
+        return [restore(item, session) for item in value]
+    return value
+
+
+class QueryCache:
+    """Кэш результатов чтения `CRUDBase` с учетом поколений таблиц.
+
+    Ключ записи состоит из модели, метода с аргументами, поколения
+    таблицы модели и базы данных сессии. Commit любой транзакции,
+    изменившей таблицу, увеличивает ее поколение (см.
+    `app.core.generations`), поэтому записи после `create`,
+    `update`, `remove` и распределения средств перестают совпадать
+    и вытесняются по LRU. Пока сессия сама изменила таблицу и не
+    зафиксировала транзакцию, ее чтения идут мимо кэша.
+
+    Область кэша задается `query_cache_scope`:
+
+    - `off` - кэш выключен;
+    - `request` - кэш живет в `Session.info` до commit или отката
+      и хранит объекты самой сессии, поэтому повторные проверки и
+      чтения одного запроса не обращаются к БД;
+    - `process` - общий кэш процесса со сроком жизни
+      `query_cache_ttl`. Хранятся значения столбцов, а каждое
+      попадание создает объекты в сессии вызывающего кода.
+      Промах читается с `populate_existing`, чтобы в кэш не попали
+      устаревшие объекты из карты идентичности сессии.
+
+    Число записей ограничено `query_cache_max_entries` в каждой
+    области.
+    """
+
+    def __init__(self) -> None:
+        """Создает пустой общий кэш."""
+        self._entries: OrderedDict = OrderedDict()
+
+    async def fetch(
+        self,
+        session: AsyncSession,
+        model: Type[Base],
+        key: Hashable,
+        query: Select,
+        extract: Callable[[Result], Any],
+    ) -> Any:
+        """Возвращает результат чтения из кэша или из БД.
+
+        Args:
+            session: Асинхронная сессия БД.
+            model: Модель, из таблицы которой читает запрос.
+            key: Метод CRUD и его аргументы.
+            query: Запрос чтения.
+            extract: Функция, получающая результат из `Result`.
+
+        Returns:
+            Результат `extract`.
+        """
+        scope = settings.query_cache_scope
+        table = model.__table__.name
+        if scope == 'off' or self._has_pending_writes(session, table):
+            return extract(await session.execute(query))
+        full_key = (
+            model,
+            key,
+            table_generations.get(table),
+            session.sync_session.get_bind(),
+        )
+        if scope == 'request':
+            entries = session.info.setdefault(QUERY_CACHE_KEY, OrderedDict())
+            if full_key in entries:
+                entries.move_to_end(full_key)
+                metrics.inc(HITS_METRIC, table=table, scope=scope)
+                result = entries[full_key]
+                return list(result) if isinstance(result, list) else result
+            metrics.inc(MISSES_METRIC, table=table, scope=scope)
+            result = extract(await session.execute(query))
+            self._store(entries, full_key, result)
+            return result
+
+        entry = self._entries.get(full_key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(full_key)
+            metrics.inc(HITS_METRIC, table=table, scope=scope)
+            return restore(entry[1], session)
+        metrics.inc(MISSES_METRIC, table=table, scope=scope)
+        result = extract(await session.execute(
+            query.execution_options(populate_existing=True)
+        ))
+        self._store(
+            self._entries,
+            full_key,
+            (time.monotonic() + settings.query_cache_ttl, capture(result)),
+        )
+        return result
+
+    @staticmethod
+    def _has_pending_writes(session: AsyncSession, table: str) -> bool:
+        """Сессия изменила таблицу в незафиксированной транзакции."""
+        if table in session.info.get(WRITTEN_TABLES_KEY, ()):
+            return True
+        return any(
+            obj.__table__.name == table
+            for obj in (*session.new, *session.dirty, *session.deleted)
+        )
+
+    @staticmethod
+    def _store(entries: OrderedDict, key: Hashable, value: Any) -> None:
+        """Сохраняет запись и вытесняет старые сверх лимита."""
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > settings.query_cache_max_entries:
+            entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Удаляет все записи общего кэша."""
+        self._entries.clear()
+
+
+query_cache = QueryCache()
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def clear_session_cache(session) -> None:
+    """Удаляет кэш области `request` по завершении транзакции.
+
+    После commit или отката объекты сессии истекают, и выдавать
+    их из кэша нельзя.
+    """
+    session.info.pop(QUERY_CACHE_KEY, None)
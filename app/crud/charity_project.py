@@ -1,9 +1,9 @@
-from typing import Optional, Sequence
+from typing import Iterable, Optional, Sequence, Set
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud.base import CRUDBase
+from app.crud.base_investment import CRUDBaseInvestment
 from app.models.charity_project import CharityProject
 from app.schemas.charity_project import (
     CharityProjectCreate,
@@ -12,7 +12,9 @@ from app.schemas.charity_project import (
 
 
 class CRUDCharityProject(
-    CRUDBase[CharityProject, CharityProjectCreate, CharityProjectUpdate]
+    CRUDBaseInvestment[
+        CharityProject, CharityProjectCreate, CharityProjectUpdate
+    ]
 ):
     """CRUD для работы с благотворительными проектами.
 
@@ -34,6 +36,25 @@ class CRUDCharityProject(
         """
         return await self.find_one_by(session, name=project_name)
 
+    async def get_existing_names(
+        self, project_names: Iterable[str], session: AsyncSession
+    ) -> Set[str]:
+        """Получает имена, уже занятые проектами, одним запросом.
+
+        Args:
+            project_names: Имена проектов для проверки.
+            session: Асинхронная сессия базы данных.
+
+        Returns:
+            Множество найденных в БД имен.
+        """
+        result = await session.execute(
+            select(self.model.name).where(
+                self.model.name.in_(list(project_names))
+            )
+        )
+        return set(result.scalars().all())
+
     async def get_active_projects(
         self, session: AsyncSession
     ) -> Sequence[CharityProject]:
@@ -47,12 +68,7 @@ class CRUDCharityProject(
         Returns:
             Список активных проектов.
         """
-        result = await session.execute(
-            select(CharityProject)
-            .where(CharityProject.fully_invested.is_(False))
-            .order_by(CharityProject.create_date)
-        )
-        return result.scalars().all()
+        return await self.get_active(session)
 
 
 charity_project_crud = CRUDCharityProject(CharityProject)
@@ -1,14 +1,15 @@
 from typing import Sequence
 
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud.base import CRUDBase
+from app.crud.base_investment import CRUDBaseInvestment
 from app.models.donation import Donation
 from app.schemas.donation import DonationCreate, DonationUpdate
 
 
-class CRUDDonation(CRUDBase[Donation, DonationCreate, DonationUpdate]):
+class CRUDDonation(
+    CRUDBaseInvestment[Donation, DonationCreate, DonationUpdate]
+):
     """CRUD для работы с пожертвованиями.
 
     Предоставляет методы для создания, получения, обновления
@@ -25,9 +26,9 @@ class CRUDDonation(CRUDBase[Donation, DonationCreate, DonationUpdate]):
             user_id: ID пользователя.
 
         Returns:
-            Список пожертвований пользователя.
+            Список пожертвований пользователя в порядке создания.
         """
-        return await self.find_by(session, user_id=user_id)
+        return await self.get_multi(session, user_id=user_id)
 
     async def get_active_donations(
         self, session: AsyncSession
@@ -43,12 +44,7 @@ class CRUDDonation(CRUDBase[Donation, DonationCreate, DonationUpdate]):
         Returns:
             Список активных пожертвований.
         """
-        result = await session.execute(
-            select(Donation)
-            .where(Donation.fully_invested.is_(False))
-            .order_by(Donation.create_date)
-        )
-        return result.scalars().all()
+        return await self.get_active(session)
 
 
 donation_crud = CRUDDonation(Donation)
@@ -0,0 +1,229 @@
+from collections import defaultdict
+import random
+from typing import Dict, Optional, Type
+
+from pydantic import BaseModel
+from sqlalchemy import (
+    BigInteger,
+    cast,
+    event,
+    func,
+    inspect,
+    select,
+    update,
+)
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.generations import INSERTS
+from app.crud.base import CRUDBase
+from app.models.base_investment import BaseInvestment
+from app.models.charity_project import CharityProject
+from app.models.donation import Donation
+from app.models.fund_pool import FundPool
+
+
+FUND_POOL_ID = 1
+# Ключ `Connection.info` с номером строки счетчиков соединения.
+FUND_POOL_SHARD_KEY = 'fund_pool_shard'
+COUNTER_COLUMNS: Dict[Type[BaseInvestment], str] = {
+    CharityProject: 'project_capacity',
+    Donation: 'donation_balance',
+}
+
+
+def remaining_amount(obj: BaseInvestment, previous: bool = False) -> int:
+    """Возвращает нераспределенный остаток записи.
+
+    Args:
+        obj: Проект или пожертвование.
+        previous: Взять значения до текущего flush.
+
+    Returns:
+        Остаток записи или 0, если она закрыта или ожидает фонового
+        распределения и еще не входит в открытый пул.
+    """
+    values = {}
+    attrs = inspect(obj).attrs
+    for name in (
+        'full_amount',
+        'invested_amount',
+        'fully_invested',
+        'allocation_pending',
+    ):
+        history = attrs[name].history
+        values[name] = (
+            history.deleted[0]
+            if previous and history.deleted
+            else getattr(obj, name)
+        )
+    if values['fully_invested'] or values['allocation_pending']:
+        return 0
+    return values['full_amount'] - (values['invested_amount'] or 0)
+
+
+def counters_shard(connection: Connection) -> int:
+    """Возвращает строку счетчиков, которую изменяет соединение.
+
+    Номер выбирается случайно при первом использовании соединения
+    из пула и дальше не меняется, поэтому транзакция блокирует не
+    больше одной строки счетчиков, а параллельные транзакции
+    обычно изменяют разные строки.
+
+    Args:
+        connection: Соединение текущей транзакции.
+
+    Returns:
+        Идентификатор строки от `FUND_POOL_ID` до `fund_pool_shards`.
+    """
+    shards = max(settings.fund_pool_shards, 1)
+    shard = connection.info.get(FUND_POOL_SHARD_KEY)
+    if shard is None or shard > shards:
+        shard = connection.info[FUND_POOL_SHARD_KEY] = random.randint(
+            FUND_POOL_ID, shards
+        )
+    return shard
+
+
+def shift_counters(
+    connection: Connection, deltas: Dict[Type[BaseInvestment], int]
+) -> None:
+    """Изменяет счетчики пула на заданные величины.
+
+    Счетчики разбиты на `fund_pool_shards` строк, их значения
+    складываются при чтении. Изменение попадает в строку
+    соединения одним `INSERT ... ON CONFLICT DO UPDATE`, поэтому
+    параллельные транзакции не ждут блокировки одной общей строки
+    и не создают ее дважды. СУБД без такого запроса изменяют
+    только строку `FUND_POOL_ID`, созданную миграцией.
+
+    Args:
+        connection: Соединение текущей транзакции.
+        deltas: Изменения остатков по моделям.
+    """
+    deltas = {
+        COUNTER_COLUMNS[model]: delta
+        for model, delta in deltas.items()
+        if delta
+    }
+    if not deltas:
+        return
+    insert = INSERTS.get(connection.dialect.name)
+    if insert is None:
+        connection.execute(
+            update(FundPool)
+            .where(FundPool.id == FUND_POOL_ID)
+            .values(**{
+                column: getattr(FundPool, column) + delta
+                for column, delta in deltas.items()
+            })
+        )
+        return
+    statement = insert(FundPool).values(
+        id=counters_shard(connection),
+        **{
+            column: deltas.get(column, 0)
+            for column in COUNTER_COLUMNS.values()
+        },
+    )
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=[FundPool.id],
+        set_={
+            column: (
+                getattr(FundPool, column) +
+                getattr(statement.excluded, column)
+            )
+            for column in deltas
+        },
+    ))
+
+
+class CRUDFundPool(CRUDBase[FundPool, BaseModel, BaseModel]):
+    """CRUD для счетчиков открытого пула фонда."""
+
+    cursor_columns = ('id',)
+
+    async def get_counters(
+        self, session: AsyncSession
+    ) -> Optional[Dict[str, int]]:
+        """Получает текущие значения счетчиков.
+
+        Args:
+            session: Асинхронная сессия базы данных.
+
+        Returns:
+            Суммы счетчиков всех строк по именам столбцов или None,
+            если строк еще нет.
+        """
+        result = await session.execute(select(
+            func.count().label('shards'),
+            *(
+                cast(func.sum(getattr(FundPool, column)), BigInteger)
+                .label(column)
+                for column in COUNTER_COLUMNS.values()
+            ),
+        ))
+        row = result.one()._mapping
+        if not row['shards']:
+            return None
+        return {column: row[column] for column in COUNTER_COLUMNS.values()}
+
+    async def get_available(
+        self, model: Type[BaseInvestment], session: AsyncSession
+    ) -> Optional[int]:
+        """Получает нераспределенный остаток открытых записей модели.
+
+        Args:
+            model: Модель проектов или пожертвований.
+            session: Асинхронная сессия базы данных.
+
+        Returns:
+            Суммарный остаток или None, если счетчики неизвестны.
+        """
+        counters = await self.get_counters(session)
+        if counters is None:
+            return None
+        return counters[COUNTER_COLUMNS[model]]
+
+    async def shift(
+        self,
+        deltas: Dict[Type[BaseInvestment], int],
+        session: AsyncSession,
+    ) -> None:
+        """Изменяет счетчики в текущей транзакции.
+
+        Используется там, где записи обновляются в обход ORM.
+
+        Args:
+            deltas: Изменения остатков по моделям.
+            session: Асинхронная сессия базы данных.
+        """
+        await session.run_sync(
+            lambda sync_session: shift_counters(
+                sync_session.connection(), deltas
+            )
+        )
+
+
+fund_pool_crud = CRUDFundPool(FundPool)
+
+
+@event.listens_for(Session, 'after_flush')
+def track_fund_pool(session, flush_context) -> None:
+    """Обновляет счетчики пула по изменениям ORM-объектов flush."""
+    deltas: Dict[Type[BaseInvestment], int] = defaultdict(int)
+    for obj in session.new:
+        if isinstance(obj, BaseInvestment):
+            deltas[type(obj)] += remaining_amount(obj)
+    for obj in session.dirty:
+        if isinstance(obj, BaseInvestment):
+            deltas[type(obj)] += (
+                remaining_amount(obj) -
+                remaining_amount(obj, previous=True)
+            )
+    for obj in session.deleted:
+        if isinstance(obj, BaseInvestment):
+            deltas[type(obj)] -= remaining_amount(obj, previous=True)
+    shift_counters(session.connection(), deltas)
@@ -0,0 +1,84 @@
+from typing import Sequence, Tuple
+
+from pydantic import BaseModel
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import CRUDBase
+from app.models.investment import Investment
+
+
+class CRUDInvestment(CRUDBase[Investment, BaseModel, BaseModel]):
+    """CRUD для записей о вложениях пожертвований в проекты."""
+
+    cursor_columns = ('created_at', 'id')
+
+    async def create_allocations(
+        self,
+        allocations: Sequence[Tuple[int, int, int]],
+        session: AsyncSession,
+    ) -> None:
+        """Сохраняет записи о вложениях одним executemany.
+
+        Args:
+            allocations: Тройки `(donation_id, project_id, amount)`.
+            session: Асинхронная сессия базы данных.
+        """
+        if not allocations:
+            return
+        await session.execute(
+            insert(self.model),
+            [
+                {
+                    'donation_id': donation_id,
+                    'project_id': project_id,
+                    'amount': amount,
+                }
+                for donation_id, project_id, amount in allocations
+            ],
+        )
+
+    async def get_by_donation(
+        self, donation_id: int, session: AsyncSession
+    ) -> Sequence[Investment]:
+        """Получает вложения пожертвования.
+
+        Запрос обслуживается индексом `(donation_id, project_id)`.
+
+        Args:
+            donation_id: ID пожертвования.
+            session: Асинхронная сессия базы данных.
+
+        Returns:
+            Список вложений пожертвования по проектам.
+        """
+        result = await session.execute(
+            select(self.model)
+            .where(self.model.donation_id == donation_id)
+            .order_by(self.model.project_id, self.model.id)
+        )
+        return result.scalars().all()
+
+    async def get_by_project(
+        self, project_id: int, session: AsyncSession
+    ) -> Sequence[Investment]:
+        """Получает вложения в проект.
+
+        Запрос обслуживается индексом `(project_id, donation_id)`.
+
+        Args:
+            project_id: ID проекта.
+            session: Асинхронная сессия базы данных.
+
+        Returns:
+            Список вложений в проект по пожертвованиям.
+        """
+        result = await session.execute(
+            select(self.model)
+            .where(self.model.project_id == project_id)
+            .order_by(self.model.donation_id, self.model.id)
+        )
+        return result.scalars().all()
+
+
+investment_crud = CRUDInvestment(Investment)
@@ -2,6 +2,11 @@ from fastapi import FastAPI
 
 from app.api.routers import main_router
 from app.core.config import settings
+from app.core.generations import shared_generations_enabled
+from app.services.allocation_worker import allocation_worker
+from app.services.group_commit import donation_group_committer
+from app.services.invalidation import invalidation_poller
+from app.services.ledger import open_pool_ledger
 
 
 app = FastAPI(
@@ -9,3 +14,23 @@ app = FastAPI(
 )
 
 app.include_router(main_router)
+
+
+@app.on_event('startup')
+async def startup() -> None:
+    """Запускает фоновые задачи приложения."""
+    if settings.investing_engine == 'ledger':
+        open_pool_ledger.start()
+    if settings.allocation_mode == 'async':
+        allocation_worker.start()
+    if shared_generations_enabled():
+        invalidation_poller.start()
+
+
+@app.on_event('shutdown')
+async def shutdown() -> None:
+    """Останавливает фоновые задачи приложения."""
+    await donation_group_committer.stop()
+    await allocation_worker.stop()
+    await open_pool_ledger.stop()
+    await invalidation_poller.stop()
@@ -1,10 +1,16 @@
 from app.models.charity_project import CharityProject
 from app.models.donation import Donation
+from app.models.fund_pool import FundPool
+from app.models.investment import Investment
+from app.models.table_generation import TableGeneration
 from app.models.user import User
 
 
 __all__ = [
     'CharityProject',
     'Donation',
+    'FundPool',
+    'Investment',
+    'TableGeneration',
     'User',
 ]
@@ -1,10 +1,42 @@
+from collections import defaultdict
 from datetime import datetime, timezone
+from typing import Dict, Optional, Sequence, Tuple
+import zlib
 
-from sqlalchemy import Boolean, CheckConstraint, Column, DateTime, Integer
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    CheckConstraint,
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    Table,
+    bindparam,
+    case,
+    column,
+    event,
+    func,
+    inspect,
+    select,
+    update,
+)
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Session, declared_attr, object_session
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.core.db import Base
 
 
+CUMULATIVE_OFFSETS_KEY = 'cumulative_offsets'
+
+# Условие частичного индекса открытых записей. Записывается так же,
+# как в запросах пула (`IS false`), чтобы планировщик мог доказать,
+# что условие запроса влечет условие индекса.
+OPEN_CONDITION = column('fully_invested', Boolean).is_(False)
+
+
 class BaseInvestment(Base):
     """Базовая абстрактная модель для инвестиций.
 
@@ -18,6 +50,14 @@ class BaseInvestment(Base):
         fully_invested: Флаг полного инвестирования.
         create_date: Дата и время создания записи.
         close_date: Дата и время закрытия.
+        cumulative_start: Начало отрезка записи на общей числовой
+            прямой сумм таблицы (сумма full_amount предыдущих записей).
+        cumulative_end: Конец отрезка (cumulative_start + full_amount).
+        allocation_pending: Флаг ожидания распределения фоновым
+            обработчиком. None для записей, распределенных сразу.
+        version_id: Версия записи для оптимистичной блокировки.
+            Увеличивается при каждом изменении вложенной суммы,
+            устаревшая запись вызывает `StaleDataError`.
 
     Constraints:
         - full_amount должна быть больше 0.
@@ -35,14 +75,65 @@ class BaseInvestment(Base):
         nullable=False,
     )
     close_date = Column(DateTime(timezone=True), nullable=True)
+    cumulative_start = Column(BigInteger, nullable=True)
+    cumulative_end = Column(BigInteger, nullable=True, index=True)
+    allocation_pending = Column(Boolean, nullable=True, index=True)
+    version_id = Column(Integer, nullable=False, server_default='1')
 
-    __table_args__ = (
-        CheckConstraint('full_amount > 0', name='check_full_amount_positive'),
-        CheckConstraint(
-            '0 <= invested_amount <= full_amount',
-            name='check_invested_amount_range',
-        ),
-    )
+    @declared_attr
+    def __mapper_args__(cls) -> dict:
+        """Включает проверку версии записи при каждом flush."""
+        return {'version_id_col': cls.version_id}
+
+    @declared_attr
+    def __table_args__(cls) -> tuple:
+        """Возвращает ограничения и индексы таблицы модели."""
+        return (
+            CheckConstraint(
+                'full_amount > 0', name='check_full_amount_positive'
+            ),
+            CheckConstraint(
+                'invested_amount >= 0 AND invested_amount <= full_amount',
+                name='check_invested_amount_range',
+            ),
+            Index(
+                f'ix_{cls.__tablename__}_fully_invested_cumulative_start',
+                'fully_invested',
+                'cumulative_start',
+            ),
+            Index(
+                f'ix_{cls.__tablename__}_create_date_id',
+                'create_date',
+                'id',
+            ),
+            Index(
+                f'ix_{cls.__tablename__}_open_create_date',
+                'create_date',
+                postgresql_where=OPEN_CONDITION,
+                sqlite_where=OPEN_CONDITION,
+            ),
+        )
+
+    @hybrid_property
+    def allocation_status(self) -> Optional[str]:
+        """Возвращает статус фонового распределения записи.
+
+        Returns:
+            'pending', если запись ждет распределения, 'done', если
+            фоновое распределение выполнено, или None для записей,
+            распределенных сразу при создании.
+        """
+        if self.allocation_pending is None:
+            return None
+        return 'pending' if self.allocation_pending else 'done'
+
+    @allocation_status.expression
+    def allocation_status(cls):
+        """Статус фонового распределения как выражение SQL."""
+        return case(
+            (cls.allocation_pending.is_(True), 'pending'),
+            (cls.allocation_pending.is_(False), 'done'),
+        ).label('allocation_status')
 
     def __repr__(self) -> str:
         """Возвращает строковое представление объекта."""
@@ -54,3 +145,185 @@ class BaseInvestment(Base):
             f'create_date={self.create_date}, '
             f'close_date={self.close_date}'
         )
+
+
+def lock_cumulative_line(connection: Connection, table: Table) -> None:
+    """Сериализует назначение отрезков числовой прямой таблицы.
+
+    В PostgreSQL берется транзакционная advisory-блокировка, поэтому
+    параллельные транзакции не получат пересекающиеся отрезки. В
+    SQLite запись и так выполняет один писатель: конфликтующая
+    транзакция получит ошибку блокировки, а не пересечение.
+    """
+    if connection.dialect.name == 'postgresql':
+        connection.execute(
+            select(func.pg_advisory_xact_lock(
+                zlib.crc32(f'cumulative:{table.name}'.encode())
+            ))
+        )
+
+
+@event.listens_for(BaseInvestment, 'before_insert', propagate=True)
+def assign_cumulative_interval(mapper, connection, target) -> None:
+    """Назначает новой записи отрезок в конце числовой прямой таблицы.
+
+    Конец прямой запрашивается один раз за flush, дальше
+    значения для пачки новых записей считаются в памяти. Если
+    новая запись оказалась не последней в порядке
+    `(create_date, id)`, прямая перестраивается после flush
+    (`reorder_cumulative_intervals`).
+    """
+    table = mapper.local_table
+    offsets = object_session(target).info.setdefault(
+        CUMULATIVE_OFFSETS_KEY, {}
+    )
+    start = offsets.get(table.name)
+    if start is None:
+        lock_cumulative_line(connection, table)
+        start = connection.scalar(
+            select(func.coalesce(func.max(table.c.cumulative_end), 0))
+        )
+    target.cumulative_start = start
+    target.cumulative_end = start + target.full_amount
+    offsets[table.name] = target.cumulative_end
+
+
+def renumber_cumulative_tail(
+    connection: Connection, table: Table, new_ids: Sequence[int]
+) -> Dict[int, Tuple[int, int]]:
+    """Перестраивает хвост числовой прямой в порядке FIFO.
+
+    Отрезки новых записей выдаются в конце прямой. Если новая
+    запись старше существующих (`create_date` задан явно), хвост
+    прямой начиная с нее перенумеровывается в порядке
+    `(create_date, id)`. В обычном случае выполняются два
+    индексных запроса без изменений.
+
+    Args:
+        connection: Соединение текущей транзакции.
+        table: Таблица проектов или пожертвований.
+        new_ids: ID записей, вставленных в этом flush.
+
+    Returns:
+        Новые отрезки `id -> (start, end)` перенумерованных записей.
+    """
+    ordered = connection.execute(
+        select(table.c.id, table.c.cumulative_start)
+        .where(table.c.id.in_(new_ids))
+        .order_by(table.c.create_date, table.c.id)
+    ).all()
+    first_date = (
+        select(table.c.create_date)
+        .where(table.c.id == ordered[0].id)
+        .scalar_subquery()
+    )
+    starts = [row.cumulative_start for row in ordered]
+    has_older_tail = connection.execute(
+        select(table.c.id)
+        .where(
+            table.c.create_date > first_date,
+            table.c.id.not_in(new_ids),
+        )
+        .limit(1)
+    ).first()
+    if has_older_tail is None and starts == sorted(starts):
+        return {}
+    in_tail = table.c.create_date >= first_date
+    offset = connection.scalar(
+        select(func.min(table.c.cumulative_start)).where(in_tail)
+    )
+    intervals = {}
+    params = []
+    for row in connection.execute(
+        select(table.c.id, table.c.full_amount)
+        .where(in_tail)
+        .order_by(table.c.create_date, table.c.id)
+    ):
+        intervals[row.id] = (offset, offset + row.full_amount)
+        params.append({
+            'row_id': row.id,
+            'start': offset,
+            'end': offset + row.full_amount,
+        })
+        offset += row.full_amount
+    connection.execute(
+        update(table)
+        .where(table.c.id == bindparam('row_id'))
+        .values(
+            cumulative_start=bindparam('start'),
+            cumulative_end=bindparam('end'),
+        ),
+        params,
+    )
+    return intervals
+
+
+@event.listens_for(BaseInvestment, 'before_update', propagate=True)
+def shift_cumulative_interval(mapper, connection, target) -> None:
+    """Сдвигает последующие отрезки при изменении full_amount.
+
+    UPDATE затрагивает все записи правее измененной, то есть
+    стоит O(n). Это допустимо, потому что full_amount меняется
+    только при редактировании проекта суперпользователем.
+    """
+    history = inspect(target).attrs.full_amount.history
+    if not history.deleted or target.cumulative_end is None:
+        return
+    delta = target.full_amount - history.deleted[0]
+    if not delta:
+        return
+    table = mapper.local_table
+    connection.execute(
+        update(table)
+        .where(table.c.cumulative_start >= target.cumulative_end)
+        .values(
+            cumulative_start=table.c.cumulative_start + delta,
+            cumulative_end=table.c.cumulative_end + delta,
+        )
+    )
+    target.cumulative_end += delta
+
+
+@event.listens_for(BaseInvestment, 'after_delete', propagate=True)
+def close_cumulative_gap(mapper, connection, target) -> None:
+    """Убирает разрыв на числовой прямой после удаления записи.
+
+    Как и `shift_cumulative_interval`, сдвигает все записи правее
+    удаленной. Удаляются только проекты без вложений, поэтому
+    операция редкая.
+    """
+    if target.cumulative_end is None:
+        return
+    table = mapper.local_table
+    connection.execute(
+        update(table)
+        .where(table.c.cumulative_start >= target.cumulative_end)
+        .values(
+            cumulative_start=table.c.cumulative_start - target.full_amount,
+            cumulative_end=table.c.cumulative_end - target.full_amount,
+        )
+    )
+
+
+@event.listens_for(Session, 'after_flush')
+def reorder_cumulative_intervals(session, flush_context) -> None:
+    """Сохраняет порядок FIFO на числовой прямой после вставок.
+
+    Также сбрасывает кэш концов числовых прямых этого flush.
+    """
+    if session.info.pop(CUMULATIVE_OFFSETS_KEY, None) is None:
+        return
+    new_by_table = defaultdict(list)
+    for obj in session.new:
+        if isinstance(obj, BaseInvestment):
+            new_by_table[obj.__table__].append(obj)
+    connection = session.connection()
+    for table, objs in new_by_table.items():
+        intervals = renumber_cumulative_tail(
+            connection, table, [obj.id for obj in objs]
+        )
+        for obj in objs:
+            if obj.id in intervals:
+                start, end = intervals[obj.id]
+                set_committed_value(obj, 'cumulative_start', start)
+                set_committed_value(obj, 'cumulative_end', end)
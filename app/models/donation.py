@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, Text
+from sqlalchemy import Column, ForeignKey, Index, Integer, Text
 
 from app.models.base_investment import BaseInvestment
 
@@ -21,3 +21,10 @@ class Donation(BaseInvestment):
 
     user_id = Column(Integer, ForeignKey('user.id'), nullable=False)
     comment = Column(Text, nullable=True)
+
+
+Index(
+    'ix_donation_user_id_create_date',
+    Donation.user_id,
+    Donation.create_date,
+)
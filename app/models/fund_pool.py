@@ -0,0 +1,33 @@
+from sqlalchemy import BigInteger, Column
+
+from app.core.db import Base
+
+
+class FundPool(Base):
+    """Агрегированные остатки открытого пула фонда.
+
+    Остатки разбиты на несколько строк, значения которых
+    складываются при чтении. Каждая транзакция распределения
+    изменяет одну строку своего соединения (см.
+    `app.crud.fund_pool`), поэтому параллельные транзакции в
+    PostgreSQL не выстраиваются в очередь за блокировкой одной
+    строки. Счетчики позволяют не выполнять выборку открытых
+    записей, когда распределять нечего.
+
+    Attributes:
+        project_capacity: Сумма, которую еще ждут открытые проекты.
+        donation_balance: Нераспределенная сумма пожертвований.
+    """
+
+    __tablename__ = 'fund_pool'
+
+    project_capacity = Column(BigInteger, nullable=False, default=0)
+    donation_balance = Column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        """Возвращает строковое представление объекта."""
+        return (
+            f'{type(self).__name__} '
+            f'project_capacity={self.project_capacity}, '
+            f'donation_balance={self.donation_balance}'
+        )
@@ -0,0 +1,67 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import (
+    CheckConstraint,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+)
+
+from app.core.db import Base
+
+
+class Investment(Base):
+    """Запись о вложении пожертвования в проект.
+
+    Создается при каждом распределении средств и позволяет
+    ответить, куда ушли деньги пожертвования и из каких
+    пожертвований собран проект, без пересчета истории.
+
+    Attributes:
+        donation_id: ID пожертвования (внешний ключ).
+        project_id: ID проекта (внешний ключ).
+        amount: Вложенная сумма.
+        created_at: Дата и время распределения.
+
+    Constraints:
+        - amount должна быть больше 0.
+    """
+
+    __tablename__ = 'investment'
+    __table_args__ = (
+        CheckConstraint('amount > 0', name='check_investment_amount'),
+        Index(
+            'ix_investment_donation_id_project_id',
+            'donation_id',
+            'project_id',
+        ),
+        Index(
+            'ix_investment_project_id_donation_id',
+            'project_id',
+            'donation_id',
+        ),
+    )
+
+    donation_id = Column(
+        Integer, ForeignKey('donation.id'), nullable=False
+    )
+    project_id = Column(
+        Integer, ForeignKey('charityproject.id'), nullable=False
+    )
+    amount = Column(Integer, nullable=False)
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    def __repr__(self) -> str:
+        """Возвращает строковое представление объекта."""
+        return (
+            f'{type(self).__name__} '
+            f'donation_id={self.donation_id}, '
+            f'project_id={self.project_id}, '
+            f'amount={self.amount}'
+        )
@@ -0,0 +1,31 @@
+from sqlalchemy import BigInteger, Column, Float, String
+
+from app.core.db import Base
+
+
+class TableGeneration(Base):
+    """Счетчик зафиксированных записей в таблицу, общий для воркеров.
+
+    Каждая транзакция, изменившая таблицу, увеличивает ее счетчик
+    перед commit. Воркеры периодически читают счетчики и сбрасывают
+    кэши таблиц, которые изменили другие процессы.
+
+    Attributes:
+        name: Имя таблицы.
+        generation: Число зафиксированных транзакций записи.
+        changed_at: Время последней записи (Unix time, секунды) для
+            измерения задержки сброса кэшей.
+    """
+
+    __tablename__ = 'table_generation'
+
+    name = Column(String(100), unique=True, nullable=False)
+    generation = Column(BigInteger, nullable=False, default=0)
+    changed_at = Column(Float, nullable=False)
+
+    def __repr__(self) -> str:
+        """Возвращает строковое представление объекта."""
+        return (
+            f'{type(self).__name__} name={self.name}, '
+            f'generation={self.generation}'
+        )
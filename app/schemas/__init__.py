@@ -11,6 +11,7 @@ from app.schemas.donation import (
     DonationUpdate,
     DonationUserDB,
 )
+from app.schemas.investment import InvestmentDB
 from app.schemas.user import UserCreate, UserRead, UserUpdate
 
 
@@ -24,6 +25,7 @@ __all__ = [
     'DonationUpdate',
     'DonationUserDB',
     'DonationDB',
+    'InvestmentDB',
     'UserRead',
     'UserCreate',
     'UserUpdate',
@@ -84,11 +84,14 @@ class DonationUserDB(DonationBase):
         full_amount: Сумма пожертвования.
         comment: Комментарий к пожертвованию (если был указан).
         create_date: Дата и время создания пожертвования.
+        allocation_status: Статус фонового распределения
+            ('pending' или 'done'), только в асинхронном режиме.
     """
 
     id: int
     create_date: datetime
     full_amount: int
+    allocation_status: Optional[str] = None
 
     class Config:
         orm_mode = True
@@ -110,6 +113,8 @@ class DonationDB(DonationBase):
         comment: Комментарий к пожертвованию (если был указан).
         create_date: Дата и время создания пожертвования.
         close_date: Дата полного распределения (None, если есть остаток).
+        allocation_status: Статус фонового распределения
+            ('pending' или 'done'), только в асинхронном режиме.
     """
 
     id: int
@@ -119,6 +124,7 @@ class DonationDB(DonationBase):
     create_date: datetime
     close_date: Optional[datetime] = None
     full_amount: int
+    allocation_status: Optional[str] = None
 
     class Config:
         orm_mode = True
@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class InvestmentDB(BaseModel):
+    """Схема записи о вложении пожертвования в проект.
+
+    Attributes:
+        donation_id: ID пожертвования.
+        project_id: ID проекта.
+        amount: Вложенная сумма.
+        created_at: Дата и время распределения.
+    """
+
+    donation_id: int
+    project_id: int
+    amount: int
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
@@ -1,13 +1,21 @@
+from app.services.allocation_worker import (
+    AllocationWorker,
+    allocation_worker,
+)
 from app.services.charity_project_service import (
     CharityProjectService,
     charity_project_service,
 )
 from app.services.donation_service import DonationService, donation_service
-from app.services.investing import invest
+from app.services.investing import allocate, allocate_many, invest
 
 
 __all__ = [
+    'allocate',
+    'allocate_many',
     'invest',
+    'AllocationWorker',
+    'allocation_worker',
     'CharityProjectService',
     'charity_project_service',
     'DonationService',
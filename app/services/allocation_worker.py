@@ -0,0 +1,186 @@
+import asyncio
+from functools import partial
+from itertools import groupby
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.crud.base_investment import CRUDBaseInvestment
+from app.crud.charity_project import charity_project_crud
+from app.crud.donation import donation_crud
+from app.models import CharityProject, Donation
+from app.models.base_investment import BaseInvestment
+from app.services.concurrency import run_with_retry
+from app.services.investing import allocate_many
+
+
+logger = logging.getLogger(__name__)
+
+SOURCE_CRUDS = {
+    CharityProject: donation_crud,
+    Donation: charity_project_crud,
+}
+TARGET_CRUDS = {
+    CharityProject: charity_project_crud,
+    Donation: donation_crud,
+}
+
+
+def pending_allocation_data() -> Dict[str, Any]:
+    """Возвращает поля новой записи для режима распределения.
+
+    Returns:
+        `{'allocation_pending': True}` в асинхронном режиме,
+        иначе пустой словарь.
+    """
+    if settings.allocation_mode == 'async':
+        return {'allocation_pending': True}
+    return {}
+
+
+async def allocate_or_defer(
+    targets: Sequence[BaseInvestment],
+    source_crud: CRUDBaseInvestment,
+    session: AsyncSession,
+) -> None:
+    """Распределяет средства сразу или откладывает до обработчика.
+
+    В асинхронном режиме записи только помечаются ожидающими,
+    после commit нужно вызвать `allocation_worker.notify()`.
+
+    Args:
+        targets: Цели распределения в порядке создания.
+        source_crud: CRUD модели источников средств.
+        session: Асинхронная сессия базы данных.
+    """
+    if settings.allocation_mode == 'async':
+        for target in targets:
+            target.allocation_pending = True
+        return
+    await allocate_many(targets, source_crud, session)
+
+
+class AllocationWorker:
+    """Фоновый обработчик распределения средств.
+
+    Используется при `allocation_mode = 'async'`. Эндпоинты только
+    сохраняют записи с флагом `allocation_pending` и будят
+    обработчик. Обработчик объединяет все накопившиеся записи и
+    распределяет их в порядке поступления (FIFO), по одной
+    транзакции на пачку подряд идущих записей одной модели.
+    Ожидающие записи не служат источниками средств, пока до них
+    не дойдет очередь. Флаг в БД служит источником истины,
+    поэтому записи, не распределенные до остановки процесса,
+    подхватываются при следующем запуске.
+
+    Attributes:
+        session_factory: Фабрика сессий для транзакций обработчика.
+    """
+
+    def __init__(
+        self, session_factory: sessionmaker = AsyncSessionLocal
+    ) -> None:
+        """Создает остановленный обработчик."""
+        self.session_factory = session_factory
+        self.queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def notify(self) -> None:
+        """Сообщает обработчику о новых записях.
+
+        Если обработчик не запущен, записи останутся в ожидании
+        до его запуска.
+        """
+        if self.queue is not None:
+            self.queue.put_nowait(True)
+
+    async def _read_pending(
+        self, session: AsyncSession
+    ) -> List[BaseInvestment]:
+        """Читает очередную пачку ожидающих записей в порядке FIFO."""
+        pending = []
+        for model in SOURCE_CRUDS:
+            result = await session.execute(
+                select(model)
+                .where(model.allocation_pending.is_(True))
+                .order_by(model.create_date, model.id)
+                .limit(settings.batch_max_size)
+            )
+            pending.extend(result.scalars().all())
+        pending.sort(key=lambda obj: (obj.create_date, obj.id))
+        return pending[:settings.batch_max_size]
+
+    @staticmethod
+    async def _allocate_run(
+        targets: List[BaseInvestment], session: AsyncSession
+    ) -> None:
+        """Распределяет пачку записей одной модели и фиксирует ее."""
+        model = type(targets[0])
+        await TARGET_CRUDS[model].refresh_multi(targets, session)
+        await allocate_many(targets, SOURCE_CRUDS[model], session)
+        for obj in targets:
+            obj.allocation_pending = False
+        await session.commit()
+
+    async def process_pending(self) -> int:
+        """Распределяет все ожидающие записи.
+
+        Подряд идущие записи одной модели распределяются одним
+        вызовом `allocate_many` и фиксируются одной транзакцией.
+        После нее записи перестают быть ожидающими и становятся
+        источниками для следующих записей другой модели. Записи
+        следующей пачки перечитываются из БД перед распределением.
+
+        Returns:
+            Число обработанных записей.
+        """
+        processed = 0
+        while True:
+            async with self.session_factory() as session:
+                pending = await self._read_pending(session)
+                if not pending:
+                    return processed
+                for _model, run in groupby(pending, key=type):
+                    await run_with_retry(
+                        partial(self._allocate_run, list(run), session),
+                        session,
+                    )
+            processed += len(pending)
+
+    async def _run(self) -> None:
+        """Ждет сигналов и распределяет накопившиеся записи."""
+        while True:
+            stop = not await self.queue.get()
+            while not self.queue.empty():
+                stop = not self.queue.get_nowait() or stop
+            try:
+                await self.process_pending()
+            except Exception:
+                logger.exception('Не удалось распределить средства.')
+            if stop:
+                return
+
+    def start(self) -> None:
+        """Запускает обработчик и подхватывает записи прошлого запуска."""
+        if self._task is not None:
+            return
+        self.queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+        self.notify()
+
+    async def stop(self) -> None:
+        """Распределяет оставшиеся записи и останавливает обработчик."""
+        if self._task is None:
+            return
+        self.queue.put_nowait(False)
+        await self._task
+        self._task = None
+        self.queue = None
+
+
+allocation_worker = AllocationWorker()
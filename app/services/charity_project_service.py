@@ -1,16 +1,37 @@
 from datetime import datetime, timezone
-from typing import List, Optional
+from functools import partial
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.crud.base import Page
 from app.crud.charity_project import charity_project_crud
 from app.crud.donation import donation_crud
+from app.crud.investment import investment_crud
 from app.models.charity_project import CharityProject
+from app.models.investment import Investment
 from app.schemas.charity_project import (
     CharityProjectCreate,
     CharityProjectUpdate,
 )
-from app.services.investing import invest
+from app.services.allocation_worker import (
+    allocate_or_defer,
+    allocation_worker,
+    pending_allocation_data,
+)
+from app.services.coalescing import coalesce
+from app.services.concurrency import run_with_retry
+
+
+ProjectCheck = Callable[[CharityProject], Awaitable[None]]
 
 
 class CharityProjectService:
@@ -27,6 +48,11 @@ class CharityProjectService:
     ) -> CharityProject:
         """Создает новый проект и автоматически инвестирует средства.
 
+        Создание, распределение и фиксация выполняются в одной
+        транзакции, поэтому запись не бывает сохранена без
+        распределения средств. При конфликте с параллельной
+        транзакцией она повторяется.
+
         Args:
             project_data: Данные для создания проекта.
             session: Асинхронная сессия базы данных.
@@ -34,55 +60,98 @@ class CharityProjectService:
         Returns:
             Созданный и проинвестированный проект.
         """
-        new_project = await charity_project_crud.create(
-            project_data, session, extra_data=None
-        )
+        async def create() -> CharityProject:
+            new_project = await charity_project_crud.create(
+                project_data,
+                session,
+                extra_data=pending_allocation_data(),
+                commit=False,
+            )
+            await allocate_or_defer([new_project], donation_crud, session)
+            await session.commit()
+            return new_project
+
+        new_project = await run_with_retry(create, session)
+        await charity_project_crud.refresh_multi([new_project], session)
+        allocation_worker.notify()
 
-        active_donations = await donation_crud.get_active_donations(session)
-        updated_donations = invest(
-            target=new_project, sources=active_donations
-        )
+        return new_project
 
-        session.add_all(updated_donations)
-        await session.commit()
-        await session.refresh(new_project)
+    async def create_projects(
+        self,
+        projects_data: List[CharityProjectCreate],
+        session: AsyncSession,
+    ) -> List[CharityProject]:
+        """Создает пачку проектов в одной транзакции.
 
-        return new_project
+        Проекты вставляются одним flush в исходном порядке,
+        открытые пожертвования распределяются по ним за один
+        проход (FIFO), после чего транзакция фиксируется один раз.
+
+        Args:
+            projects_data: Данные для создания проектов.
+            session: Асинхронная сессия базы данных.
+
+        Returns:
+            Созданные и проинвестированные проекты в исходном порядке.
+        """
+        async def create() -> List[CharityProject]:
+            new_projects = await charity_project_crud.create_multi(
+                projects_data, session, extra_data=pending_allocation_data()
+            )
+            await allocate_or_defer(new_projects, donation_crud, session)
+            await session.commit()
+            return new_projects
+
+        new_projects = await run_with_retry(create, session)
+        await charity_project_crud.refresh_multi(new_projects, session)
+        allocation_worker.notify()
+
+        return new_projects
 
     async def update_project(
         self,
         project: CharityProject,
         project_update: CharityProjectUpdate,
         session: AsyncSession,
+        check: Optional[ProjectCheck] = None,
     ) -> CharityProject:
         """Обновляет проект и проверяет статус финансирования.
 
         Если после обновления проект достиг полного финансирования,
-        автоматически закрывает его.
+        автоматически закрывает его. При конфликте с параллельной
+        транзакцией проект перечитывается, снова проверяется через
+        `check` и обновление повторяется.
 
         Args:
             project: Проект для обновления.
             project_update: Данные для обновления.
             session: Асинхронная сессия базы данных.
+            check: Проверка перечитанного проекта перед повтором,
+                например, что его не закрыло параллельное
+                пожертвование.
 
         Returns:
             Обновленный проект.
         """
-        updated_project = await charity_project_crud.update(
-            project, project_update, session
-        )
-
-        if self._is_fully_funded(updated_project):
-            self._close_project(updated_project)
-
-        active_donations = await donation_crud.get_active_donations(session)
-        updated_donations = invest(
-            target=updated_project, sources=active_donations
+        async def update() -> CharityProject:
+            updated_project = await charity_project_crud.update(
+                project, project_update, session, commit=False
+            )
+            if self._is_fully_funded(updated_project):
+                self._close_project(updated_project)
+            await allocate_or_defer([updated_project], donation_crud, session)
+            await session.commit()
+            return updated_project
+
+        updated_project = await run_with_retry(
+            update,
+            session,
+            reload=[project],
+            check=partial(check, project) if check else None,
         )
-
-        session.add_all(updated_donations)
-        await session.commit()
-        await session.refresh(updated_project)
+        await charity_project_crud.refresh_multi([updated_project], session)
+        allocation_worker.notify()
 
         return updated_project
 
@@ -90,37 +159,65 @@ class CharityProjectService:
         self,
         project: CharityProject,
         session: AsyncSession,
+        check: Optional[ProjectCheck] = None,
     ) -> CharityProject:
         """Удаляет благотворительный проект.
 
+        При блокировке базы данных или конфликте с параллельной
+        транзакцией проект перечитывается, снова проверяется через
+        `check` и удаление повторяется.
+
         Args:
             project: Проект для удаления.
             session: Асинхронная сессия базы данных.
+            check: Проверка перечитанного проекта перед повтором,
+                например, что в него не вложили средства.
 
         Returns:
             Удаленный проект.
         """
-        return await charity_project_crud.remove(project, session)
+        return await run_with_retry(
+            partial(charity_project_crud.remove, project, session),
+            session,
+            reload=[project],
+            check=partial(check, project) if check else None,
+        )
 
-    async def get_all_projects(
-        self, session: AsyncSession
-    ) -> List[CharityProject]:
-        """Получает все благотворительные проекты.
+    @coalesce(CharityProject.__tablename__)
+    async def get_projects_page(
+        self,
+        session: AsyncSession,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[Any, ...]] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Page:
+        """Получает страницу благотворительных проектов.
+
+        Одинаковые параллельные запросы с сессией чтения выполняются
+        один раз.
 
         Args:
             session: Асинхронная сессия базы данных.
+            limit: Размер страницы, без него - все проекты.
+            after: Значения ключа из курсора предыдущей страницы.
+            fields: Поля для выборки строк вместо объектов ORM.
 
         Returns:
-            Список всех проектов.
+            Страница проектов в порядке создания.
         """
-        projects = await charity_project_crud.get_multi(session)
-        return list(projects)
+        return await charity_project_crud.get_page(
+            session, limit, after, fields
+        )
 
+    @coalesce(CharityProject.__tablename__)
     async def get_project_by_id(
         self, project_id: int, session: AsyncSession
     ) -> Optional[CharityProject]:
         """Получает проект по его ID.
 
+        Одинаковые параллельные запросы с сессией чтения выполняются
+        один раз, объект проекта у них общий.
+
         Args:
             project_id: ID проекта.
             session: Асинхронная сессия базы данных.
@@ -130,6 +227,22 @@ class CharityProjectService:
         """
         return await charity_project_crud.get(project_id, session)
 
+    async def get_project_allocations(
+        self, project_id: int, session: AsyncSession
+    ) -> List[Investment]:
+        """Получает вложения пожертвований в проект.
+
+        Args:
+            project_id: ID проекта.
+            session: Асинхронная сессия базы данных.
+
+        Returns:
+            Список вложений в проект.
+        """
+        return list(
+            await investment_crud.get_by_project(project_id, session)
+        )
+
     def _is_fully_funded(self, project: CharityProject) -> bool:
         """Проект достиг полного финансирования.
 
@@ -0,0 +1,150 @@
+import asyncio
+import functools
+import inspect
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import ReadOnlySession
+from app.core.generations import table_generations
+from app.core.metrics import metrics
+
+
+ResultType = TypeVar('ResultType')
+
+CALLS_METRIC = 'qrkot_read_calls_total'
+COALESCED_METRIC = 'qrkot_read_coalesced_total'
+
+metrics.describe(CALLS_METRIC, 'Вызовы объединяемых методов чтения.')
+metrics.describe(
+    COALESCED_METRIC,
+    'Вызовы, получившие результат уже выполняемого запроса.',
+)
+
+
+class LeaderCancelled(Exception):
+    """Запрос, результата которого ждали, был отменен."""
+
+
+class SingleFlight:
+    """Объединяет одинаковые параллельные вызовы в один запрос.
+
+    Первый вызов с ключом выполняет запрос, а вызовы с тем же
+    ключом, пришедшие до его завершения, ждут и получают тот же
+    результат или то же исключение. Если первый вызов отменен
+    (например, клиент закрыл соединение), ожидающие выполняют
+    запрос заново.
+
+    Attributes:
+        name: Имя метода для меток метрик.
+    """
+
+    def __init__(self, name: str) -> None:
+        """Создает объединитель без выполняемых запросов."""
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def run(
+        self, key: Hashable, call: Callable[[], Awaitable[ResultType]]
+    ) -> ResultType:
+        """Выполняет запрос или присоединяется к выполняемому.
+
+        Args:
+            key: Ключ, одинаковый у взаимозаменяемых вызовов.
+            call: Корутинная функция без аргументов, выполняющая
+                запрос.
+
+        Returns:
+            Результат запроса.
+        """
+        metrics.inc(CALLS_METRIC, method=self.name)
+        coalesced = False
+        while key in self._calls:
+            if not coalesced:
+                metrics.inc(COALESCED_METRIC, method=self.name)
+                coalesced = True
+            try:
+                return await asyncio.shield(self._calls[key])
+            except LeaderCancelled:
+                continue
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            future.set_exception(LeaderCancelled())
+            raise
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+            if future.done() and not future.cancelled():
+                # Исключение без ожидающих не должно попадать в лог.
+                future.exception()
+
+
+def freeze(value: Any) -> Hashable:
+    """Превращает аргумент вызова в хешируемую часть ключа."""
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted(
+            (name, freeze(item)) for name, item in value.items()
+        ))
+    return value
+
+
+def coalesce(table: str):
+    """Объединяет одинаковые параллельные вызовы метода чтения.
+
+    Ключ вызова составляется из аргументов метода, кроме `self` и
+    `session`, базы данных сессии и поколения таблицы `table`.
+    Вызов после commit записи получает новое поколение и не
+    присоединяется к запросу, начатому до этой записи.
+
+    Объединяются только вызовы с сессией только для чтения: объекты
+    ORM, полученные другими вызовами, принадлежат сессии первого
+    вызова, и изменять их нельзя. Вызовы с сессией записи
+    выполняются как обычно.
+
+    Args:
+        table: Таблица, из которой читает метод.
+
+    Returns:
+        Декоратор асинхронного метода сервиса с аргументом `session`.
+    """
+
+    def decorator(
+        method: Callable[..., Awaitable[ResultType]]
+    ) -> Callable[..., Awaitable[ResultType]]:
+        signature = inspect.signature(method)
+        flight = SingleFlight(method.__name__)
+
+        @functools.wraps(method)
+        async def wrapper(*args, **kwargs) -> ResultType:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            arguments.pop('self', None)
+            session: AsyncSession = arguments.pop('session')
+            sync_session = session.sync_session
+            if not isinstance(sync_session, ReadOnlySession):
+                return await method(*args, **kwargs)
+            key = (
+                freeze(arguments),
+                sync_session.get_bind(),
+                table_generations.get(table),
+                id(asyncio.get_running_loop()),
+            )
+            return await flight.run(key, lambda: method(*args, **kwargs))
+
+        wrapper.single_flight = flight
+        return wrapper
+
+    return decorator
@@ -0,0 +1,147 @@
+import asyncio
+from contextlib import asynccontextmanager
+import logging
+import random
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Optional,
+    Sequence,
+    TypeVar,
+)
+from weakref import WeakKeyDictionary
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.core.config import settings
+from app.core.db import Base
+
+
+logger = logging.getLogger(__name__)
+
+ResultType = TypeVar('ResultType')
+
+
+class WriterLock:
+    """Сериализует транзакции распределения к SQLite внутри процесса.
+
+    В SQLite нет блокировок строк, а параллельные транзакции
+    записи получают `database is locked`. Для PostgreSQL
+    блокировка не берется: там работают `FOR UPDATE SKIP LOCKED`
+    и проверка версий записей.
+
+    Для каждого event loop создается своя блокировка, поэтому
+    объект можно использовать из разных циклов событий.
+    """
+
+    def __init__(self) -> None:
+        """Создает блокировку без привязки к циклу событий."""
+        self._locks: WeakKeyDictionary = WeakKeyDictionary()
+
+    def _lock(self) -> asyncio.Lock:
+        """Возвращает блокировку текущего цикла событий."""
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+        return lock
+
+    @asynccontextmanager
+    async def hold(self, session: AsyncSession) -> AsyncIterator[None]:
+        """Удерживает блокировку записи, если сессия работает с SQLite.
+
+        Args:
+            session: Асинхронная сессия базы данных.
+        """
+        if session.bind.dialect.name != 'sqlite':
+            yield
+            return
+        async with self._lock():
+            yield
+
+
+writer_lock = WriterLock()
+
+
+def is_retryable(error: Exception) -> bool:
+    """Ошибку записи можно исправить повтором транзакции.
+
+    Повторяются конфликты версий записей и ошибки блокировки
+    SQLite (`database is locked`), возникающие, когда другая
+    транзакция держит блокировку записи дольше `busy_timeout`
+    или изменила базу после начала чтения.
+
+    Args:
+        error: Исключение, прервавшее транзакцию.
+
+    Returns:
+        True, если транзакцию стоит повторить.
+    """
+    if isinstance(error, StaleDataError):
+        return True
+    return isinstance(error, OperationalError) and (
+        'database is locked' in str(error.orig)
+    )
+
+
+async def run_with_retry(
+    operation: Callable[[], Awaitable[ResultType]],
+    session: AsyncSession,
+    reload: Sequence[Base] = (),
+    check: Optional[Callable[[], Awaitable[None]]] = None,
+) -> ResultType:
+    """Выполняет транзакцию записи с повтором при конфликте.
+
+    Операция должна сама фиксировать транзакцию. Если другая
+    транзакция успела изменить прочитанные записи (`StaleDataError`)
+    или SQLite вернул `database is locked`, сессия откатывается и
+    операция выполняется заново, но не более
+    `allocation_retry_attempts` раз. Паузы между попытками растут
+    экспоненциально от `allocation_retry_delay` со случайным
+    разбросом, чтобы конкурирующие транзакции не повторялись
+    одновременно.
+
+    Args:
+        operation: Корутинная функция без аргументов, выполняющая
+            транзакцию целиком.
+        session: Асинхронная сессия базы данных.
+        reload: Объекты сессии, которые операция использует повторно.
+            После отката они перечитываются из БД.
+        check: Проверка перечитанных объектов перед повтором.
+            Проверки, пройденные до первой попытки, могли устареть
+            из-за конкурирующей транзакции, и ее исключение
+            прерывает повторы.
+
+    Returns:
+        Результат операции.
+
+    Raises:
+        StaleDataError: Если конфликт версий повторился на последней
+            попытке.
+        OperationalError: Если база осталась заблокированной на
+            последней попытке.
+    """
+    attempts = settings.allocation_retry_attempts
+    for attempt in range(1, attempts + 1):
+        try:
+            async with writer_lock.hold(session):
+                return await operation()
+        except (StaleDataError, OperationalError) as error:
+            if not is_retryable(error):
+                raise
+            await session.rollback()
+            if attempt == attempts:
+                raise
+            logger.warning(
+                'Конфликт параллельной записи (%s), попытка %s из %s.',
+                type(error).__name__, attempt, attempts,
+            )
+            delay = settings.allocation_retry_delay * 2 ** (attempt - 1)
+            await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+            for obj in reload:
+                await session.refresh(obj)
+            if check is not None:
+                await check()
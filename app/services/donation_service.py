@@ -1,13 +1,22 @@
-from typing import List
+from typing import Any, List, Optional, Sequence, Tuple, Union
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.crud.base import Page
 from app.crud.charity_project import charity_project_crud
 from app.crud.donation import donation_crud
+from app.crud.investment import investment_crud
 from app.models.donation import Donation
+from app.models.investment import Investment
 from app.models.user import User
 from app.schemas.donation import DonationCreate
-from app.services.investing import invest
+from app.services.allocation_worker import (
+    allocate_or_defer,
+    allocation_worker,
+    pending_allocation_data,
+)
+from app.services.coalescing import coalesce
+from app.services.concurrency import is_retryable, run_with_retry
 
 
 class DonationService:
@@ -28,6 +37,13 @@ class DonationService:
         Средства автоматически инвестируются в активные
         благотворительные проекты в порядке их создания (FIFO).
 
+        Создание, распределение и фиксация выполняются в одной
+        транзакции, поэтому запись не бывает сохранена без
+        распределения средств. При конфликте с параллельной
+        транзакцией она повторяется. При `allocation_mode = 'async'`
+        пожертвование только сохраняется, а средства распределяет
+        фоновый обработчик.
+
         Args:
             donation_data: Данные для создания пожертвования.
             user: Пользователь, создающий пожертвование.
@@ -36,49 +52,212 @@ class DonationService:
         Returns:
             Созданное и распределенное пожертвование.
         """
-        new_donation = await donation_crud.create(
-            donation_data,
+        user_id = user.id
+
+        async def create() -> Donation:
+            new_donation = await donation_crud.create(
+                donation_data,
+                session,
+                extra_data={'user_id': user_id, **pending_allocation_data()},
+                commit=False,
+            )
+            await allocate_or_defer(
+                [new_donation], charity_project_crud, session
+            )
+            await session.commit()
+            return new_donation
+
+        new_donation = await run_with_retry(create, session)
+        await donation_crud.refresh_multi([new_donation], session)
+        allocation_worker.notify()
+
+        return new_donation
+
+    async def create_donations(
+        self,
+        donations_data: List[DonationCreate],
+        user: User,
+        session: AsyncSession,
+    ) -> List[Donation]:
+        """Создает пачку пожертвований в одной транзакции.
+
+        Пожертвования вставляются одним flush, средства всех
+        пожертвований распределяются за один проход по открытым
+        проектам в порядке поступления (FIFO), после чего
+        транзакция фиксируется один раз.
+
+        Args:
+            donations_data: Данные пожертвований в порядке поступления.
+            user: Пользователь, создающий пожертвования.
+            session: Асинхронная сессия базы данных.
+
+        Returns:
+            Созданные пожертвования в исходном порядке.
+        """
+        return await self.create_user_donations(
+            [(donation_data, user) for donation_data in donations_data],
             session,
-            extra_data={'user_id': user.id},
         )
 
-        active_projects = await charity_project_crud.get_active_projects(
-            session
-        )
-        updated_projects = invest(target=new_donation, sources=active_projects)
+    async def create_user_donations(
+        self,
+        entries: Sequence[Tuple[DonationCreate, User]],
+        session: AsyncSession,
+    ) -> List[Donation]:
+        """Создает пожертвования разных пользователей в одной транзакции.
 
-        session.add_all(updated_projects)
-        await session.commit()
-        await session.refresh(new_donation)
+        Общая часть пакетного приема и группового commit: пачка
+        вставляется одним flush, распределяется одним проходом и
+        фиксируется один раз.
 
-        return new_donation
+        Args:
+            entries: Пары `(данные пожертвования, пользователь)`
+                в порядке поступления.
+            session: Асинхронная сессия базы данных.
+
+        Returns:
+            Созданные пожертвования в порядке `entries`.
+        """
+        user_ids = [{'user_id': user.id} for _, user in entries]
+
+        async def create() -> List[Donation]:
+            new_donations = await donation_crud.create_multi(
+                [donation_data for donation_data, _ in entries],
+                session,
+                extra_data=pending_allocation_data(),
+                extra_data_items=user_ids,
+            )
+            await allocate_or_defer(
+                new_donations, charity_project_crud, session
+            )
+            await session.commit()
+            return new_donations
+
+        new_donations = await run_with_retry(create, session)
+        await donation_crud.refresh_multi(new_donations, session)
+        allocation_worker.notify()
 
-    async def get_all_donations(self, session: AsyncSession) -> List[Donation]:
-        """Получает все пожертвования в системе.
+        return new_donations
+
+    async def create_user_donations_isolated(
+        self,
+        entries: Sequence[Tuple[DonationCreate, User]],
+        session: AsyncSession,
+    ) -> List[Union[Donation, Exception]]:
+        """Создает пожертвования в одной транзакции, каждое в SAVEPOINT.
+
+        Ошибка пожертвования откатывает только его SAVEPOINT, и
+        остальные пожертвования фиксируются. Конфликты параллельной
+        записи повторяют транзакцию целиком.
+
+        Args:
+            entries: Пары `(данные пожертвования, пользователь)`
+                в порядке поступления.
+            session: Асинхронная сессия базы данных.
+
+        Returns:
+            Созданные пожертвования или исключения, прервавшие их
+            создание, в порядке `entries`.
+        """
+        async def create() -> List[Union[Donation, Exception]]:
+            results = []
+            for donation_data, user in entries:
+                try:
+                    async with session.begin_nested():
+                        new_donation = await donation_crud.create(
+                            donation_data,
+                            session,
+                            extra_data={
+                                'user_id': user.id,
+                                **pending_allocation_data(),
+                            },
+                            commit=False,
+                        )
+                        await allocate_or_defer(
+                            [new_donation], charity_project_crud, session
+                        )
+                except Exception as error:
+                    if is_retryable(error):
+                        raise
+                    results.append(error)
+                else:
+                    results.append(new_donation)
+            await session.commit()
+            return results
+
+        results = await run_with_retry(create, session)
+        await donation_crud.refresh_multi(
+            [obj for obj in results if isinstance(obj, Donation)], session
+        )
+        allocation_worker.notify()
+
+        return results
+
+    async def get_donations_page(
+        self,
+        session: AsyncSession,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[Any, ...]] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Page:
+        """Получает страницу всех пожертвований в системе.
 
         Метод доступен только для суперпользователей.
 
         Args:
             session: Асинхронная сессия базы данных.
+            limit: Размер страницы, без него - все пожертвования.
+            after: Значения ключа из курсора предыдущей страницы.
+            fields: Поля для выборки строк вместо объектов ORM.
 
         Returns:
-            Список всех пожертвований.
+            Страница пожертвований в порядке создания.
         """
-        return list(await donation_crud.get_multi(session))
+        return await donation_crud.get_page(session, limit, after, fields)
 
-    async def get_user_donations(
-        self, user_id: int, session: AsyncSession
-    ) -> List[Donation]:
-        """Получает все пожертвования конкретного пользователя.
+    @coalesce(Donation.__tablename__)
+    async def get_user_donations_page(
+        self,
+        user_id: int,
+        session: AsyncSession,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[Any, ...]] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Page:
+        """Получает страницу пожертвований конкретного пользователя.
+
+        Одинаковые параллельные запросы с сессией чтения выполняются
+        один раз.
 
         Args:
             user_id: ID пользователя.
             session: Асинхронная сессия базы данных.
+            limit: Размер страницы, без него - все пожертвования.
+            after: Значения ключа из курсора предыдущей страницы.
+            fields: Поля для выборки строк вместо объектов ORM.
+
+        Returns:
+            Страница пожертвований пользователя в порядке создания.
+        """
+        return await donation_crud.get_page(
+            session, limit, after, fields, user_id=user_id
+        )
+
+    async def get_donation_allocations(
+        self, donation_id: int, session: AsyncSession
+    ) -> List[Investment]:
+        """Получает вложения пожертвования по проектам.
+
+        Args:
+            donation_id: ID пожертвования.
+            session: Асинхронная сессия базы данных.
 
         Returns:
-            Список пожертвований пользователя.
+            Список вложений пожертвования.
         """
-        return list(await donation_crud.get_by_user(session, user_id))
+        return list(
+            await investment_crud.get_by_donation(donation_id, session)
+        )
 
 
 donation_service = DonationService()
@@ -0,0 +1,177 @@
+"""Потоковая выгрузка пожертвований и проектов в NDJSON и CSV.
+
+Строки читаются серверным курсором (`session.stream`) пачками по
+`export_chunk_size` и сразу превращаются в текст, поэтому память
+не зависит от размера таблицы.
+
+Запуск из командной строки::
+
+    python -m app.services.export donation --format csv \\
+        --output donations.csv
+"""
+import argparse
+import asyncio
+import csv
+from datetime import datetime
+import io
+import json
+import sys
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    TextIO,
+    Type,
+)
+
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.db import AsyncReadSessionLocal
+from app.models import CharityProject, Donation
+from app.models.base_investment import BaseInvestment
+
+
+EXPORT_MODELS: Dict[str, Type[BaseInvestment]] = {
+    'donation': Donation,
+    'charity_project': CharityProject,
+}
+EXPORT_COLUMNS: Dict[Type[BaseInvestment], Sequence[str]] = {
+    Donation: (
+        'id', 'user_id', 'full_amount', 'invested_amount',
+        'fully_invested', 'create_date', 'close_date', 'comment',
+    ),
+    CharityProject: (
+        'id', 'name', 'description', 'full_amount', 'invested_amount',
+        'fully_invested', 'create_date', 'close_date',
+    ),
+}
+ExportFormat = Literal['ndjson', 'csv']
+
+MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def export_value(value: Any) -> Any:
+    """Приводит значение столбца к виду для выгрузки."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def ndjson_chunk(columns: Sequence[str], rows: Iterable[Row]) -> str:
+    """Форматирует пачку строк как NDJSON, по объекту на строку."""
+    return ''.join(
+        json.dumps(
+            dict(zip(columns, map(export_value, row), strict=True)),
+            ensure_ascii=False,
+        ) + '\n'
+        for row in rows
+    )
+
+
+def csv_chunk(rows: Iterable[Sequence[Any]]) -> str:
+    """Форматирует пачку строк как CSV."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        [export_value(value) for value in row] for row in rows
+    )
+    return buffer.getvalue()
+
+
+async def stream_export(
+    model: Type[BaseInvestment],
+    export_format: ExportFormat,
+    session: AsyncSession,
+    chunk_size: Optional[int] = None,
+) -> AsyncIterator[str]:
+    """Выгружает таблицу модели пачками строк.
+
+    Строки читаются в порядке `id` серверным курсором, в памяти
+    одновременно находится не больше одной пачки. ORM-объекты и
+    схемы pydantic не создаются.
+
+    Args:
+        model: Модель выгружаемой таблицы.
+        export_format: `ndjson` или `csv`. CSV начинается со
+            строки заголовка.
+        session: Асинхронная сессия базы данных.
+        chunk_size: Размер пачки, по умолчанию `export_chunk_size`.
+
+    Yields:
+        Текст очередной пачки строк.
+    """
+    chunk_size = chunk_size or settings.export_chunk_size
+    columns = EXPORT_COLUMNS[model]
+    if export_format == 'csv':
+        yield csv_chunk([columns])
+    result = await session.stream(
+        select(*(getattr(model, name) for name in columns))
+        .order_by(model.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    async for rows in result.partitions(chunk_size):
+        if export_format == 'csv':
+            yield csv_chunk(rows)
+        else:
+            yield ndjson_chunk(columns, rows)
+
+
+async def export_to_file(
+    model: Type[BaseInvestment],
+    export_format: ExportFormat,
+    output: TextIO,
+    chunk_size: Optional[int] = None,
+) -> None:
+    """Выгружает таблицу модели в файл через сессию чтения.
+
+    Args:
+        model: Модель выгружаемой таблицы.
+        export_format: `ndjson` или `csv`.
+        output: Текстовый файл для записи.
+        chunk_size: Размер пачки, по умолчанию `export_chunk_size`.
+    """
+    async with AsyncReadSessionLocal() as session:
+        async for chunk in stream_export(
+            model, export_format, session, chunk_size
+        ):
+            output.write(chunk)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Выгружает таблицу из командной строки.
+
+    Returns:
+        Код возврата.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('table', choices=EXPORT_MODELS)
+    parser.add_argument('--format', choices=MEDIA_TYPES, default='ndjson')
+    parser.add_argument('--output', help='Файл выгрузки, по умолчанию stdout')
+    parser.add_argument('--chunk-size', type=int)
+    args = parser.parse_args(argv)
+
+    model = EXPORT_MODELS[args.table]
+    if args.output is None:
+        asyncio.run(
+            export_to_file(model, args.format, sys.stdout, args.chunk_size)
+        )
+        return 0
+    with open(args.output, 'w', encoding='utf-8', newline='') as output:
+        asyncio.run(
+            export_to_file(model, args.format, output, args.chunk_size)
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
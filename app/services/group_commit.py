@@ -0,0 +1,155 @@
+import asyncio
+import logging
+from typing import List, Optional, Tuple, Union
+
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.models.donation import Donation
+from app.models.user import User
+from app.schemas.donation import DonationCreate
+from app.services.donation_service import donation_service
+
+
+logger = logging.getLogger(__name__)
+
+PendingDonation = Tuple[DonationCreate, User, asyncio.Future]
+
+
+class DonationGroupCommitter:
+    """Групповой commit синхронного приема пожертвований.
+
+    Запросы, пришедшие в течение окна `group_commit_window` секунд
+    или до накопления `group_commit_max_size` запросов, объединяются
+    в одну транзакцию с одним проходом распределения. Каждый
+    запрос получает свое полностью распределенное пожертвование,
+    но фиксация на диск выполняется один раз на группу.
+
+    Если транзакция группы не удалась, группа повторяется с
+    SAVEPOINT на каждое пожертвование: ошибку получает только
+    запрос, пожертвование которого ее вызвало.
+
+    Attributes:
+        session_factory: Фабрика сессий для транзакций группы.
+    """
+
+    def __init__(
+        self, session_factory: sessionmaker = AsyncSessionLocal
+    ) -> None:
+        """Создает пустой накопитель запросов."""
+        self.session_factory = session_factory
+        self._pending: List[PendingDonation] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        """Групповой commit включен настройками."""
+        return settings.group_commit_window > 0
+
+    async def submit(
+        self, donation_data: DonationCreate, user: User
+    ) -> Donation:
+        """Добавляет пожертвование в текущую группу и ждет ее commit.
+
+        Без группового commit пожертвование сразу создается в
+        отдельной транзакции.
+
+        Args:
+            donation_data: Данные для создания пожертвования.
+            user: Пользователь, создающий пожертвование.
+
+        Returns:
+            Созданное и распределенное пожертвование.
+        """
+        if not self.enabled:
+            async with self.session_factory() as session:
+                return await donation_service.create_donation(
+                    donation_data, user, session
+                )
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((donation_data, user, future))
+        if self._task is not None:
+            return await future
+        if len(self._pending) >= settings.group_commit_max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(
+                settings.group_commit_window, self._flush
+            )
+        return await future
+
+    def _flush(self) -> None:
+        """Отправляет накопленную группу на commit.
+
+        Одновременно выполняется только одна транзакция группы.
+        Запросы, пришедшие во время нее, образуют следующую группу,
+        которая отправляется сразу после завершения текущей.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._task is not None or not self._pending:
+            return
+        max_size = settings.group_commit_max_size
+        group = self._pending[:max_size]
+        self._pending = self._pending[max_size:]
+        self._task = asyncio.create_task(self._commit(group))
+        self._task.add_done_callback(self._on_commit_done)
+
+    def _on_commit_done(self, task: asyncio.Task) -> None:
+        """Отправляет следующую группу после завершения commit."""
+        self._task = None
+        self._flush()
+
+    async def _commit(self, group: List[PendingDonation]) -> None:
+        """Создает пожертвования группы в одной транзакции."""
+        entries = [(donation_data, user) for donation_data, user, _ in group]
+        try:
+            async with self.session_factory() as session:
+                results = await donation_service.create_user_donations(
+                    entries, session
+                )
+        except Exception as error:
+            if len(group) == 1:
+                results = [error]
+            else:
+                logger.warning(
+                    'Не удалось зафиксировать группу пожертвований (%s), '
+                    'пожертвования создаются по отдельности.',
+                    type(error).__name__,
+                )
+                results = await self._commit_isolated(entries)
+        for (_, _, future), result in zip(group, results, strict=True):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _commit_isolated(
+        self, entries: List[Tuple[DonationCreate, User]]
+    ) -> List[Union[Donation, Exception]]:
+        """Создает пожертвования группы, изолируя ошибки SAVEPOINT."""
+        try:
+            async with self.session_factory() as session:
+                return await (
+                    donation_service.create_user_donations_isolated(
+                        entries, session
+                    )
+                )
+        except Exception as error:
+            logger.exception('Не удалось зафиксировать группу пожертвований.')
+            return [error] * len(entries)
+
+    async def stop(self) -> None:
+        """Фиксирует накопленные запросы и ждет завершения групп."""
+        self._flush()
+        while self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+donation_group_committer = DonationGroupCommitter()
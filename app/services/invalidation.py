@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.core.generations import table_generations
+from app.core.metrics import metrics
+from app.models.table_generation import TableGeneration
+
+
+logger = logging.getLogger(__name__)
+
+DELAY_SUM_METRIC = 'qrkot_invalidation_delay_seconds_sum'
+DELAY_COUNT_METRIC = 'qrkot_invalidation_delay_seconds_count'
+DELAY_LAST_METRIC = 'qrkot_invalidation_delay_seconds_last'
+
+metrics.describe(
+    DELAY_SUM_METRIC,
+    'Суммарная задержка сброса кэшей после записей других воркеров.',
+)
+metrics.describe(
+    DELAY_COUNT_METRIC,
+    'Число сбросов кэшей после записей других воркеров.',
+)
+metrics.describe(
+    DELAY_LAST_METRIC,
+    'Задержка последнего сброса кэшей после записи другого воркера.',
+    kind='gauge',
+)
+
+
+class InvalidationPoller:
+    """Фоновый опрос общих счетчиков записей в таблицы.
+
+    Транзакции записи увеличивают счетчик `TableGeneration` каждой
+    измененной таблицы (см. `app.core.generations`). Воркер раз в
+    `invalidation_poll_interval` секунд читает все счетчики одним
+    запросом по маленькой таблице. Если счетчик изменил другой
+    процесс, поколение таблицы в этом процессе увеличивается, и
+    кэши ответов и запросов перестают выдавать старые данные.
+    Поэтому данные в кэшах отстают от записей других воркеров не
+    больше чем на интервал опроса.
+
+    Задержка от commit записи до ее обнаружения публикуется в
+    метриках `qrkot_invalidation_delay_seconds_*`.
+
+    Attributes:
+        session_factory: Фабрика сессий для чтения счетчиков.
+    """
+
+    def __init__(
+        self, session_factory: sessionmaker = AsyncSessionLocal
+    ) -> None:
+        """Создает остановленный опрос."""
+        self.session_factory = session_factory
+        self._task: Optional[asyncio.Task] = None
+        self._polled = False
+
+    async def poll(self) -> List[str]:
+        """Читает счетчики и учитывает записи других воркеров.
+
+        При первом опросе счетчики только запоминаются: записи,
+        сделанные до запуска процесса, не относятся к его кэшам.
+
+        Returns:
+            Имена таблиц, кэши которых устарели.
+        """
+        async with self.session_factory() as session:
+            result = await session.execute(select(
+                TableGeneration.name,
+                TableGeneration.generation,
+                TableGeneration.changed_at,
+            ))
+            rows = result.all()
+        now = time.time()
+        changed = []
+        for name, generation, changed_at in rows:
+            if not table_generations.observe(name, generation):
+                continue
+            changed.append(name)
+            if not self._polled:
+                continue
+            delay = max(0.0, now - changed_at)
+            metrics.inc(DELAY_SUM_METRIC, delay)
+            metrics.inc(DELAY_COUNT_METRIC)
+            metrics.set(DELAY_LAST_METRIC, delay)
+        self._polled = True
+        return changed
+
+    async def _poll_forever(self) -> None:
+        """Периодически опрашивает счетчики."""
+        while True:
+            try:
+                await self.poll()
+            except Exception:
+                logger.exception('Не удалось прочитать счетчики таблиц.')
+            await asyncio.sleep(settings.invalidation_poll_interval)
+
+    def start(self) -> None:
+        """Запускает периодический опрос."""
+        if self._task is None:
+            self._polled = False
+            self._task = asyncio.create_task(self._poll_forever())
+
+    async def stop(self) -> None:
+        """Останавливает периодический опрос."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+invalidation_poller = InvalidationPoller()
@@ -1,8 +1,22 @@
+from bisect import bisect_left
 from datetime import datetime, timezone
-from typing import List, Sequence, TypeVar
+from itertools import accumulate
+import logging
+from typing import Callable, Dict, List, Sequence, Tuple, TypeVar
 
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.core.config import settings
+from app.crud.base_investment import CRUDBaseInvestment
+from app.crud.fund_pool import fund_pool_crud
+from app.crud.investment import investment_crud
 from app.models.base_investment import BaseInvestment
+from app.models.donation import Donation
+from app.services.ledger import open_pool_ledger
+
 
+logger = logging.getLogger(__name__)
 
 InvestableType = TypeVar('InvestableType', bound=BaseInvestment)
 
@@ -18,15 +32,10 @@ def close_investment_if_fully_funded(obj: InvestableType) -> None:
         obj.close_date = datetime.now(timezone.utc)
 
 
-def invest(
+def invest_loop(
     target: InvestableType, sources: Sequence[InvestableType]
 ) -> List[InvestableType]:
-    """Перераспределяет средства между источниками и целью.
-
-    Функция распределяет средства из активных источников
-    (пожертвований или проектов) в целевой объект до его
-    полного финансирования. Обработка происходит в порядке
-    поступления источников (FIFO).
+    """Распределяет средства, последовательно обходя источники.
 
     Args:
         target: Целевой объект (проект или пожертвование).
@@ -34,11 +43,6 @@ def invest(
 
     Returns:
         Список обновленных источников.
-
-    Example:
-        >>> project = CharityProject(full_amount=1000)
-        >>> donations = get_active_donations()
-        >>> updated = invest(target=project, sources=donations)
     """
     updated_sources = []
 
@@ -62,3 +66,443 @@ def invest(
         updated_sources.append(source)
 
     return updated_sources
+
+
+def split_by_prefix_sum(
+    required: int, available: Sequence[int]
+) -> List[int]:
+    """Делит требуемую сумму между источниками по префиксным суммам.
+
+    Граница распределения находится бинарным поиском по
+    накопленным суммам, поэтому остаток массива не обходится.
+
+    Args:
+        required: Сумма, которую нужно распределить.
+        available: Свободные остатки источников в порядке FIFO.
+
+    Returns:
+        Суммы вложений для затронутого префикса источников.
+
+    Example:
+        >>> split_by_prefix_sum(250, [100, 100, 100, 100])
+        [100, 100, 50]
+    """
+    if required <= 0 or not available:
+        return []
+    cumulative = list(accumulate(available))
+    cutoff = bisect_left(cumulative, required)
+    if cutoff == len(cumulative):
+        return list(available)
+    consumed_before = cumulative[cutoff - 1] if cutoff else 0
+    amounts = list(available[:cutoff])
+    amounts.append(required - consumed_before)
+    return amounts
+
+
+def _add_to_target(target: InvestableType, amount: int) -> None:
+    """Зачисляет распределенную сумму в целевой объект.
+
+    Args:
+        target: Целевой объект (проект или пожертвование).
+        amount: Распределенная сумма.
+    """
+    if amount:
+        target.invested_amount += amount
+        close_investment_if_fully_funded(target)
+
+
+def invest_prefix_sum(
+    target: InvestableType, sources: Sequence[InvestableType]
+) -> List[InvestableType]:
+    """Распределяет средства с помощью префиксных сумм.
+
+    Дает тот же результат, что и `invest_loop`, но изменяет
+    только те источники, которые действительно получают вложения.
+
+    Args:
+        target: Целевой объект (проект или пожертвование).
+        sources: Последовательность источников средств.
+
+    Returns:
+        Список обновленных источников.
+    """
+    if target.fully_invested:
+        return []
+    available = [
+        max(source.full_amount - source.invested_amount, 0)
+        for source in sources
+    ]
+    amounts = split_by_prefix_sum(
+        target.full_amount - target.invested_amount, available
+    )
+
+    updated_sources = []
+    close_date = datetime.now(timezone.utc)
+    # Суммы есть только у затронутого префикса источников.
+    for source, amount in zip(sources, amounts, strict=False):
+        if amount <= 0:
+            continue
+        source.invested_amount += amount
+        if source.invested_amount >= source.full_amount:
+            source.fully_invested = True
+            source.close_date = close_date
+        updated_sources.append(source)
+
+    _add_to_target(target, sum(amounts))
+    return updated_sources
+
+
+INVESTING_ENGINES: Dict[str, Callable[..., List[BaseInvestment]]] = {
+    'loop': invest_loop,
+    'prefix_sum': invest_prefix_sum,
+}
+
+DB_INVESTING_ENGINES: Dict[str, str] = {
+    'sql': 'invest_in_db',
+    'interval': 'invest_by_interval',
+}
+
+
+def invest(
+    target: InvestableType, sources: Sequence[InvestableType]
+) -> List[InvestableType]:
+    """Перераспределяет средства между источниками и целью.
+
+    Функция распределяет средства из активных источников
+    (пожертвований или проектов) в целевой объект до его
+    полного финансирования. Обработка происходит в порядке
+    поступления источников (FIFO). Алгоритм выбирается
+    настройкой `investing_engine`.
+
+    Args:
+        target: Целевой объект (проект или пожертвование).
+        sources: Последовательность источников средств.
+
+    Returns:
+        Список обновленных источников.
+
+    Example:
+        >>> project = CharityProject(full_amount=1000)
+        >>> donations = get_active_donations()
+        >>> updated = invest(target=project, sources=donations)
+    """
+    engine = INVESTING_ENGINES.get(settings.investing_engine, invest_loop)
+    return engine(target, sources)
+
+
+def invest_many_loop(
+    targets: Sequence[InvestableType], sources: Sequence[InvestableType]
+) -> List[InvestableType]:
+    """Распределяет средства источников по нескольким целям за один проход.
+
+    Цели и источники обходятся двумя указателями в порядке FIFO,
+    поэтому результат совпадает с последовательными вызовами
+    `invest_loop` для каждой цели, а каждый источник
+    просматривается один раз.
+
+    Args:
+        targets: Цели в порядке создания.
+        sources: Последовательность источников средств.
+
+    Returns:
+        Список обновленных источников без повторов.
+    """
+    updated_sources = {}
+    position = 0
+    for target in targets:
+        while not target.fully_invested and position < len(sources):
+            source = sources[position]
+            investment_amount = min(
+                target.full_amount - target.invested_amount,
+                source.full_amount - source.invested_amount,
+            )
+            if investment_amount > 0:
+                target.invested_amount += investment_amount
+                source.invested_amount += investment_amount
+                close_investment_if_fully_funded(source)
+                close_investment_if_fully_funded(target)
+                updated_sources[id(source)] = source
+            if source.invested_amount >= source.full_amount:
+                position += 1
+    return list(updated_sources.values())
+
+
+def invest_many_prefix_sum(
+    targets: Sequence[InvestableType], sources: Sequence[InvestableType]
+) -> List[InvestableType]:
+    """Распределяет средства по нескольким целям префиксными суммами.
+
+    Суммарная потребность целей делится между источниками одним
+    вызовом `split_by_prefix_sum`, затем полученная сумма
+    раздается целям по очереди. Результат совпадает с
+    `invest_many_loop`.
+
+    Args:
+        targets: Цели в порядке создания.
+        sources: Последовательность источников средств.
+
+    Returns:
+        Список обновленных источников.
+    """
+    targets = [target for target in targets if not target.fully_invested]
+    available = [
+        max(source.full_amount - source.invested_amount, 0)
+        for source in sources
+    ]
+    amounts = split_by_prefix_sum(
+        sum(
+            target.full_amount - target.invested_amount
+            for target in targets
+        ),
+        available,
+    )
+
+    updated_sources = []
+    close_date = datetime.now(timezone.utc)
+    # Суммы есть только у затронутого префикса источников.
+    for source, amount in zip(sources, amounts, strict=False):
+        if amount <= 0:
+            continue
+        source.invested_amount += amount
+        if source.invested_amount >= source.full_amount:
+            source.fully_invested = True
+            source.close_date = close_date
+        updated_sources.append(source)
+
+    invested_total = sum(amounts)
+    for target in targets:
+        amount = min(
+            invested_total, target.full_amount - target.invested_amount
+        )
+        _add_to_target(target, amount)
+        invested_total -= amount
+    return updated_sources
+
+
+MULTI_INVESTING_ENGINES: Dict[str, Callable[..., List[BaseInvestment]]] = {
+    'loop': invest_many_loop,
+    'prefix_sum': invest_many_prefix_sum,
+}
+
+
+def invest_many(
+    targets: Sequence[InvestableType], sources: Sequence[InvestableType]
+) -> List[InvestableType]:
+    """Распределяет средства источников по нескольким целям.
+
+    Результат совпадает с последовательными вызовами `invest`
+    для каждой цели. Алгоритм выбирается настройкой
+    `investing_engine`, как и в `invest`.
+
+    Args:
+        targets: Цели в порядке создания.
+        sources: Последовательность источников средств.
+
+    Returns:
+        Список обновленных источников.
+    """
+    engine = MULTI_INVESTING_ENGINES.get(
+        settings.investing_engine, invest_many_loop
+    )
+    return engine(targets, sources)
+
+
+def pair_allocations(
+    received: Sequence[Tuple[int, int]], given: Sequence[Tuple[int, int]]
+) -> List[Tuple[int, int, int]]:
+    """Сопоставляет полученные и отданные суммы в порядке FIFO.
+
+    Цели получают средства по очереди, а источники отдают их
+    с начала очереди, поэтому пары восстанавливаются слиянием
+    двух последовательностей двумя указателями.
+
+    Args:
+        received: Пары `(id цели, полученная сумма)` в порядке целей.
+        given: Пары `(id источника, отданная сумма)` в порядке FIFO.
+
+    Returns:
+        Тройки `(id цели, id источника, сумма)`.
+
+    Example:
+        >>> pair_allocations([(1, 30), (2, 20)], [(7, 40), (8, 10)])
+        [(1, 7, 30), (2, 7, 10), (2, 8, 10)]
+    """
+    pairs = []
+    received = [list(item) for item in received if item[1] > 0]
+    given = [list(item) for item in given if item[1] > 0]
+    target_position = source_position = 0
+    while target_position < len(received) and source_position < len(given):
+        target = received[target_position]
+        source = given[source_position]
+        amount = min(target[1], source[1])
+        pairs.append((target[0], source[0], amount))
+        target[1] -= amount
+        source[1] -= amount
+        if not target[1]:
+            target_position += 1
+        if not source[1]:
+            source_position += 1
+    return pairs
+
+
+async def record_allocations(
+    targets: Sequence[InvestableType],
+    invested_before: Sequence[int],
+    given: Sequence[Tuple[int, int]],
+    source_crud: CRUDBaseInvestment,
+    session: AsyncSession,
+) -> None:
+    """Сохраняет записи о вложениях одного распределения.
+
+    Args:
+        targets: Цели распределения.
+        invested_before: Вложенные суммы целей до распределения.
+        given: Пары `(id источника, отданная сумма)` в порядке FIFO.
+        source_crud: CRUD модели источников средств.
+        session: Асинхронная сессия базы данных.
+    """
+    received = [
+        (target.id, target.invested_amount - before)
+        for target, before in zip(targets, invested_before, strict=True)
+    ]
+    pairs = pair_allocations(received, given)
+    if source_crud.model is Donation:
+        allocations = [
+            (source_id, target_id, amount)
+            for target_id, source_id, amount in pairs
+        ]
+    else:
+        allocations = pairs
+    await investment_crud.create_allocations(allocations, session)
+
+
+async def take_from_ledger(
+    source_crud: CRUDBaseInvestment,
+    required: int,
+    session: AsyncSession,
+) -> Dict[int, int]:
+    """Резервирует сумму в реестре и записывает ее источникам в БД.
+
+    Запись выполняется в SAVEPOINT. Если реестр устарел и БД
+    отклонила запись (`StaleDataError`), SAVEPOINT откатывается,
+    пул источников перечитывается из БД и запись повторяется
+    один раз.
+
+    Args:
+        source_crud: CRUD модели источников средств.
+        required: Сумма, которую нужно распределить.
+        session: Асинхронная сессия базы данных.
+
+    Returns:
+        Словарь `id источника -> вложенная сумма` в порядке FIFO.
+
+    Raises:
+        StaleDataError: Если запись не удалась и после перечитывания.
+    """
+    await open_pool_ledger.ensure_loaded(session)
+    for attempt in range(2):
+        amounts = open_pool_ledger.take(session, source_crud.model, required)
+        try:
+            async with session.begin_nested():
+                await source_crud.add_invested_amounts(amounts, session)
+        except StaleDataError:
+            if attempt:
+                raise
+            logger.warning(
+                'Реестр %s устарел, пул перечитывается из БД.',
+                source_crud.model.__name__,
+            )
+            await open_pool_ledger.reload_pool(session, source_crud.model)
+        else:
+            return amounts
+
+
+async def allocate_many(
+    targets: Sequence[InvestableType],
+    source_crud: CRUDBaseInvestment,
+    session: AsyncSession,
+) -> None:
+    """Распределяет средства нескольких целей по открытым источникам.
+
+    Открытый пул читается один раз, а цели получают средства
+    по очереди, как при последовательных вызовах `allocate`.
+
+    При `investing_engine = 'sql'` распределение выполняется
+    оконной функцией в базе данных, при `'interval'` - через
+    накопленные отрезки записей. В обоих случаях открытый пул
+    не загружается в память. При `'ledger'` открытый пул
+    читается из реестра процесса, а в БД записываются только
+    изменившиеся строки. Иначе источники загружаются и
+    распределяются в памяти.
+
+    Если счетчики `fund_pool` показывают, что у источников
+    нет свободных средств, выборка и распределение не
+    выполняются. Каждое вложение сохраняется в таблицу
+    `investment` одним executemany.
+
+    Args:
+        targets: Цели (проекты или пожертвования) в порядке создания.
+        source_crud: CRUD модели источников средств.
+        session: Асинхронная сессия базы данных.
+    """
+    targets = [target for target in targets if not target.fully_invested]
+    if not targets:
+        return
+    available = await fund_pool_crud.get_available(
+        source_crud.model, session
+    )
+    if available is not None and available <= 0:
+        return
+    invested_before = [target.invested_amount for target in targets]
+    engine = settings.investing_engine
+    if engine not in DB_INVESTING_ENGINES and engine != 'ledger':
+        sources = await source_crud.get_active(session)
+        sources_before = [source.invested_amount for source in sources]
+        session.add_all(invest_many(targets, sources))
+        given = [
+            (source.id, source.invested_amount - before)
+            for source, before in zip(sources, sources_before, strict=True)
+        ]
+        await record_allocations(
+            targets, invested_before, given, source_crud, session
+        )
+        return
+
+    required = sum(
+        target.full_amount - target.invested_amount for target in targets
+    )
+    if engine == 'ledger':
+        amounts = await take_from_ledger(source_crud, required, session)
+    else:
+        await session.flush()
+        amounts = await getattr(source_crud, DB_INVESTING_ENGINES[engine])(
+            required, session
+        )
+    invested_total = sum(amounts.values())
+    await fund_pool_crud.shift(
+        {source_crud.model: -invested_total}, session
+    )
+    for target in targets:
+        amount = min(
+            invested_total, target.full_amount - target.invested_amount
+        )
+        _add_to_target(target, amount)
+        invested_total -= amount
+    await record_allocations(
+        targets, invested_before, list(amounts.items()), source_crud, session
+    )
+
+
+async def allocate(
+    target: InvestableType,
+    source_crud: CRUDBaseInvestment,
+    session: AsyncSession,
+) -> None:
+    """Распределяет средства цели по открытым источникам.
+
+    Args:
+        target: Целевой объект (проект или пожертвование).
+        source_crud: CRUD модели источников средств.
+        session: Асинхронная сессия базы данных.
+    """
+    await allocate_many([target], source_crud, session)
@@ -0,0 +1,382 @@
+import asyncio
+from collections import deque
+import logging
+from typing import Deque, Dict, Iterable, List, Optional, Type
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.models import CharityProject, Donation
+from app.models.base_investment import BaseInvestment
+
+
+logger = logging.getLogger(__name__)
+
+PENDING_CHANGES_KEY = 'open_pool_ledger_changes'
+PENDING_RESERVATIONS_KEY = 'open_pool_ledger_reservations'
+
+
+class LedgerEntry:
+    """Компактная запись открытого проекта или пожертвования.
+
+    Attributes:
+        id: ID записи в базе данных.
+        full_amount: Полная сумма записи.
+        invested_amount: Уже распределенная сумма.
+    """
+
+    __slots__ = ('id', 'full_amount', 'invested_amount')
+
+    def __init__(
+        self, obj_id: int, full_amount: int, invested_amount: int
+    ) -> None:
+        """Создает запись реестра."""
+        self.id = obj_id
+        self.full_amount = full_amount
+        self.invested_amount = invested_amount
+
+    @property
+    def available(self) -> int:
+        """Возвращает нераспределенный остаток записи."""
+        return self.full_amount - self.invested_amount
+
+
+class OpenPool:
+    """Открытые записи одной модели в порядке FIFO.
+
+    Хранит записи в deque и поддерживает счетчик суммарного
+    свободного остатка, чтобы не пересчитывать его при каждом
+    запросе.
+    """
+
+    def __init__(self, entries: Iterable[LedgerEntry] = ()) -> None:
+        """Создает пул из записей, упорядоченных по дате создания."""
+        self.entries: Deque[LedgerEntry] = deque()
+        self.by_id: Dict[int, LedgerEntry] = {}
+        self.total_available = 0
+        for entry in entries:
+            self._append(entry)
+
+    def __len__(self) -> int:
+        """Возвращает число открытых записей."""
+        return len(self.by_id)
+
+    def _append(self, entry: LedgerEntry) -> None:
+        """Добавляет запись в конец очереди."""
+        self.entries.append(entry)
+        self.by_id[entry.id] = entry
+        self.total_available += entry.available
+
+    def take(self, required: int) -> Dict[int, int]:
+        """Резервирует сумму у записей с начала очереди.
+
+        Args:
+            required: Сумма, которую нужно распределить.
+
+        Returns:
+            Словарь `id -> зарезервированная сумма` в порядке FIFO.
+        """
+        amounts = {}
+        for entry in self.entries:
+            if required <= 0:
+                break
+            amount = min(entry.available, required)
+            if amount <= 0:
+                continue
+            entry.invested_amount += amount
+            amounts[entry.id] = amount
+            required -= amount
+        self.total_available -= sum(amounts.values())
+        return amounts
+
+    def give_back(self, amounts: Dict[int, int]) -> None:
+        """Отменяет резерв, сделанный методом `take`."""
+        for obj_id, amount in amounts.items():
+            entry = self.by_id.get(obj_id)
+            if entry is not None:
+                entry.invested_amount -= amount
+                self.total_available += amount
+
+    def upsert(
+        self,
+        obj_id: int,
+        full_amount: int,
+        invested_amount: int,
+        fully_invested: bool,
+    ) -> None:
+        """Добавляет, обновляет или убирает запись по ее состоянию в БД."""
+        if fully_invested:
+            self.discard(obj_id)
+            return
+        entry = self.by_id.get(obj_id)
+        if entry is None:
+            self._append(LedgerEntry(obj_id, full_amount, invested_amount))
+            return
+        self.total_available -= entry.available
+        entry.full_amount = full_amount
+        entry.invested_amount = invested_amount
+        self.total_available += entry.available
+
+    def discard(self, obj_id: int) -> None:
+        """Убирает запись из пула."""
+        entry = self.by_id.pop(obj_id, None)
+        if entry is None:
+            return
+        self.total_available -= entry.available
+        self.entries.remove(entry)
+
+    def drop_closed(self) -> None:
+        """Убирает полностью распределенные записи из начала очереди."""
+        while self.entries and self.entries[0].available <= 0:
+            del self.by_id[self.entries.popleft().id]
+
+
+class OpenPoolLedger:
+    """Реестр открытых проектов и пожертвований процесса.
+
+    Загружается при старте приложения, обновляется после
+    каждого зафиксированного распределения и периодически
+    сверяется с базой данных, чтобы исправлять расхождения,
+    внесенные другими процессами.
+    """
+
+    models = (CharityProject, Donation)
+
+    def __init__(self) -> None:
+        """Создает пустой, еще не загруженный реестр."""
+        self.pools: Dict[Type[BaseInvestment], OpenPool] = {
+            model: OpenPool() for model in self.models
+        }
+        self.loaded = False
+        self.snapshot = 0
+        self.version = 0
+        self.reservations = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def reset(self) -> None:
+        """Сбрасывает реестр в незагруженное состояние.
+
+        Следующее распределение загрузит реестр из БД заново,
+        резервы старого снимка в пулы уже не вернутся.
+        """
+        self.pools = {model: OpenPool() for model in self.models}
+        self.loaded = False
+        self.snapshot += 1
+        self.version += 1
+        self.reservations = 0
+
+    def pool(self, model: Type[BaseInvestment]) -> OpenPool:
+        """Возвращает пул открытых записей модели."""
+        return self.pools[model]
+
+    @staticmethod
+    async def _read_pool(
+        session: AsyncSession, model: Type[BaseInvestment]
+    ) -> OpenPool:
+        """Читает открытые записи модели из БД."""
+        rows = await session.execute(
+            select(model.id, model.full_amount, model.invested_amount)
+            .where(
+                model.fully_invested.is_(False),
+                model.allocation_pending.isnot(True),
+            )
+            .order_by(model.create_date, model.id)
+        )
+        return OpenPool(LedgerEntry(*row) for row in rows.all())
+
+    async def _read_pools(
+        self, session: AsyncSession
+    ) -> Dict[Type[BaseInvestment], OpenPool]:
+        """Читает открытые записи всех моделей из БД."""
+        return {
+            model: await self._read_pool(session, model)
+            for model in self.models
+        }
+
+    async def load(self, session: AsyncSession) -> None:
+        """Загружает реестр из БД.
+
+        Args:
+            session: Асинхронная сессия базы данных.
+        """
+        self._replace(await self._read_pools(session))
+
+    async def reload_pool(
+        self, session: AsyncSession, model: Type[BaseInvestment]
+    ) -> None:
+        """Перечитывает из БД пул одной модели.
+
+        Используется, когда запись в БД показала, что пул устарел.
+        Незафиксированные резервы других сессий в старом снимке
+        после этого не возвращаются в пул, недостающий остаток
+        восстановит ближайшая сверка.
+
+        Args:
+            session: Асинхронная сессия базы данных.
+            model: Модель, пул которой нужно перечитать.
+        """
+        self.pools[model] = await self._read_pool(session, model)
+        self.snapshot += 1
+        self.version += 1
+
+    def _replace(self, pools: Dict[Type[BaseInvestment], OpenPool]) -> None:
+        """Заменяет пулы новым снимком из БД."""
+        self.pools = pools
+        self.snapshot += 1
+        self.version += 1
+        self.loaded = True
+
+    async def ensure_loaded(self, session: AsyncSession) -> None:
+        """Загружает реестр, если это еще не сделано."""
+        if not self.loaded:
+            await self.load(session)
+
+    async def reconcile(self) -> bool:
+        """Сверяет реестр с БД и заменяет его свежим снимком.
+
+        Снимок не применяется, если во время чтения реестр
+        изменился или в нем есть незафиксированные резервы.
+
+        Returns:
+            True, если реестр был заменен.
+        """
+        version = self.version
+        async with AsyncSessionLocal() as session:
+            pools = await self._read_pools(session)
+        if self.reservations or version != self.version:
+            return False
+        self._replace(pools)
+        return True
+
+    async def _reconcile_forever(self) -> None:
+        """Периодически сверяет реестр с базой данных."""
+        while True:
+            try:
+                await self.reconcile()
+            except Exception:
+                logger.exception('Не удалось сверить реестр с БД.')
+            await asyncio.sleep(settings.ledger_reconcile_interval)
+
+    def start(self) -> None:
+        """Запускает загрузку и периодическую сверку реестра."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._reconcile_forever())
+
+    async def stop(self) -> None:
+        """Останавливает периодическую сверку реестра."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def take(
+        self,
+        session: AsyncSession,
+        model: Type[BaseInvestment],
+        required: int,
+    ) -> Dict[int, int]:
+        """Резервирует сумму в пуле до фиксации транзакции.
+
+        При откате транзакции резерв возвращается в пул.
+
+        Args:
+            session: Сессия, в которой будет записано распределение.
+            model: Модель источников средств.
+            required: Сумма, которую нужно распределить.
+
+        Returns:
+            Словарь `id -> зарезервированная сумма` в порядке FIFO.
+        """
+        amounts = self.pool(model).take(required)
+        if amounts:
+            session.info.setdefault(PENDING_RESERVATIONS_KEY, []).append(
+                (self.snapshot, model, amounts)
+            )
+            self.reservations += 1
+        return amounts
+
+    def release(self, session: Session, commit: bool) -> None:
+        """Завершает резервы и изменения сессии.
+
+        После commit применяет изменения записей к пулам, после
+        отката возвращает зарезервированные суммы.
+
+        Args:
+            session: Синхронная сессия, завершившая транзакцию.
+            commit: True, если транзакция зафиксирована.
+        """
+        reservations = session.info.pop(PENDING_RESERVATIONS_KEY, [])
+        changes: List[tuple] = session.info.pop(PENDING_CHANGES_KEY, [])
+        self.reservations -= len(reservations)
+        if not commit:
+            for snapshot, model, amounts in reservations:
+                if snapshot == self.snapshot:
+                    self.pool(model).give_back(amounts)
+            self.version += 1
+            return
+        for model, obj_id, state in changes:
+            if state is None:
+                self.pool(model).discard(obj_id)
+            else:
+                self.pool(model).upsert(obj_id, *state)
+        for pool in self.pools.values():
+            pool.drop_closed()
+        self.version += 1
+
+
+open_pool_ledger = OpenPoolLedger()
+
+
+@event.listens_for(Session, 'after_flush')
+def collect_ledger_changes(session, flush_context) -> None:
+    """Запоминает измененные записи для применения после commit.
+
+    Записи, ожидающие фонового распределения, в реестр не
+    попадают до снятия флага `allocation_pending`.
+    """
+    if not open_pool_ledger.loaded:
+        return
+    changes = session.info.setdefault(PENDING_CHANGES_KEY, [])
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, BaseInvestment) and obj.allocation_pending:
+            changes.append((type(obj), obj.id, None))
+        elif isinstance(obj, BaseInvestment):
+            changes.append((type(obj), obj.id, (
+                obj.full_amount,
+                obj.invested_amount or 0,
+                bool(obj.fully_invested),
+            )))
+    for obj in session.deleted:
+        if isinstance(obj, BaseInvestment):
+            changes.append((type(obj), obj.id, None))
+
+
+@event.listens_for(Session, 'after_commit')
+def apply_ledger_changes(session) -> None:
+    """Применяет изменения сессии к реестру после фиксации."""
+    if PENDING_CHANGES_KEY in session.info or (
+        PENDING_RESERVATIONS_KEY in session.info
+    ):
+        open_pool_ledger.release(session, commit=True)
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_ledger_changes(session) -> None:
+    """Возвращает резервы сессии в реестр после отката.
+
+    Откат SAVEPOINT не завершает транзакцию, поэтому резервы и
+    изменения сессии сохраняются до ее commit или отката.
+    """
+    if session.in_nested_transaction():
+        return
+    if PENDING_CHANGES_KEY in session.info or (
+        PENDING_RESERVATIONS_KEY in session.info
+    ):
+        open_pool_ledger.release(session, commit=False)
@@ -0,0 +1,105 @@
+import asyncio
+import json
+from typing import Any, Dict, NamedTuple, Optional
+
+from fastapi import FastAPI
+
+
+class ASGIResponse(NamedTuple):
+    """Ответ ASGI-приложения."""
+
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+    def json(self) -> Any:
+        """Разбирает тело ответа как JSON."""
+        return json.loads(self.body)
+
+
+class ASGIClient:
+    """Минимальный клиент для вызова ASGI-приложения в процессе.
+
+    Запросы передаются приложению напрямую, без сети и HTTP-сервера,
+    поэтому измеряется только время обработки запроса приложением.
+
+    Attributes:
+        app: Вызываемое ASGI-приложение.
+    """
+
+    def __init__(self, app: FastAPI) -> None:
+        """Создает клиент для приложения."""
+        self.app = app
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        json_body: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> ASGIResponse:
+        """Выполняет один запрос к приложению.
+
+        Args:
+            method: HTTP-метод.
+            url: Путь с необязательной строкой запроса.
+            json_body: Тело запроса, сериализуемое в JSON.
+            headers: Дополнительные заголовки запроса.
+
+        Returns:
+            Статус, заголовки и тело ответа.
+        """
+        path, _, query = url.partition('?')
+        body = b'' if json_body is None else json.dumps(json_body).encode()
+        request_headers = {
+            'host': 'benchmark',
+            'content-type': 'application/json',
+            'content-length': str(len(body)),
+            **(headers or {}),
+        }
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': query.encode(),
+            'root_path': '',
+            'headers': [
+                (name.lower().encode(), value.encode())
+                for name, value in request_headers.items()
+            ],
+            'client': ('127.0.0.1', 0),
+            'server': ('benchmark', 80),
+        }
+        request_sent = False
+        response_complete = asyncio.Event()
+        status = 500
+        response_headers: Dict[str, str] = {}
+        chunks = []
+
+        async def receive() -> dict:
+            nonlocal request_sent
+            if request_sent:
+                await response_complete.wait()
+                return {'type': 'http.disconnect'}
+            request_sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        async def send(message: dict) -> None:
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                response_headers.update(
+                    (name.decode(), value.decode())
+                    for name, value in message.get('headers', [])
+                )
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+                if not message.get('more_body', False):
+                    response_complete.set()
+
+        await self.app(scope, receive, send)
+        return ASGIResponse(status, response_headers, b''.join(chunks))
@@ -0,0 +1,186 @@
+"""Сравнение сериализации списков: схемы pydantic и строки выборки.
+
+Для каждого размера таблицы пожертвований список кодируется двумя
+способами:
+
+- `pydantic` - как `GET /donation/` до быстрого пути: объекты ORM
+  проверяются схемой `DonationDB` с `orm_mode`, проходят через
+  `jsonable_encoder` и кодируются `JSONResponse`;
+- `rows` - строки только с полями схемы кодируются в JSON напрямую
+  (`page_response`, orjson при наличии).
+
+Выводится лучшее время из нескольких повторов и проверяется, что
+оба способа дают одинаковый JSON.
+
+Запуск::
+
+    python -m benchmarks.serialization --rows 1000 10000 100000
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+import json
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+
+ROWS = (1000, 10000, 100000)
+
+
+class SerializationReport(NamedTuple):
+    """Результат сравнения для одного размера таблицы."""
+
+    rows: int
+    pydantic: float
+    fast: float
+    same_output: bool
+
+    def format(self) -> str:
+        """Возвращает строку отчета."""
+        status = 'OK' if self.same_output else 'JSON РАЗЛИЧАЕТСЯ'
+        return (
+            f'строк={self.rows:<7} pydantic={self.pydantic * 1000:9.1f} мс  '
+            f'rows={self.fast * 1000:9.1f} мс  '
+            f'ускорение={self.pydantic / self.fast:5.1f}x  {status}'
+        )
+
+
+async def create_donations(session: AsyncSession, rows: int) -> None:
+    """Заполняет таблицу пожертвований разнородными строками."""
+    from app.models import Donation
+
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    await session.execute(insert(Donation), [
+        {
+            'user_id': number % 100 + 1,
+            'full_amount': 100 + number % 900,
+            'invested_amount': 100 + number % 900 if number % 3 else 0,
+            'fully_invested': bool(number % 3),
+            'create_date': start + timedelta(seconds=number),
+            'close_date': (
+                start + timedelta(seconds=number + 1) if number % 3 else None
+            ),
+            'comment': f'комментарий {number}' if number % 2 else None,
+        }
+        for number in range(rows)
+    ])
+    await session.commit()
+
+
+async def pydantic_path(session: AsyncSession) -> bytes:
+    """Кодирует список пожертвований через схемы pydantic."""
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+
+    from app.crud.donation import donation_crud
+    from app.schemas.donation import DonationDB
+
+    donations = await donation_crud.get_multi(session)
+    content = await serialize_response(
+        field=create_response_field('response', List[DonationDB]),
+        response_content=donations,
+        exclude_none=True,
+    )
+    return JSONResponse(content).body
+
+
+async def fast_path(session: AsyncSession) -> bytes:
+    """Кодирует список пожертвований из строк выборки."""
+    from app.api.pagination import page_response
+    from app.core.serialization import schema_fields
+    from app.crud.donation import donation_crud
+    from app.schemas.donation import DonationDB
+
+    page = await donation_crud.get_page(
+        session, fields=schema_fields(DonationDB)
+    )
+    return page_response(page, DonationDB).body
+
+
+async def best_time(
+    path: Callable[[AsyncSession], Awaitable[bytes]],
+    session_factory: sessionmaker,
+    repeat: int,
+) -> tuple:
+    """Возвращает лучшее время пути и его результат."""
+    best, body = float('inf'), b''
+    for _ in range(repeat):
+        async with session_factory() as session:
+            started = time.perf_counter()
+            body = await path(session)
+            best = min(best, time.perf_counter() - started)
+    return best, body
+
+
+async def compare(
+    session_factory: sessionmaker, rows: int, repeat: int = 3
+) -> SerializationReport:
+    """Сравнивает оба способа на уже заполненной таблице.
+
+    Args:
+        session_factory: Фабрика сессий базы с данными.
+        rows: Число строк таблицы для отчета.
+        repeat: Число повторов каждого способа.
+
+    Returns:
+        Отчет сравнения.
+    """
+    pydantic_time, pydantic_body = await best_time(
+        pydantic_path, session_factory, repeat
+    )
+    fast_time, fast_body = await best_time(fast_path, session_factory, repeat)
+    return SerializationReport(
+        rows,
+        pydantic_time,
+        fast_time,
+        json.loads(pydantic_body) == json.loads(fast_body),
+    )
+
+
+async def run(rows: int, directory: str, repeat: int) -> SerializationReport:
+    """Создает базу с `rows` пожертвованиями и сравнивает способы."""
+    from app.core.base import Base
+
+    engine = create_async_engine(
+        f'sqlite+aiosqlite:///{directory}/serialization_{rows}.db'
+    )
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession)
+    async with session_factory() as session:
+        await create_donations(session, rows)
+    try:
+        return await compare(session_factory, rows, repeat)
+    finally:
+        await engine.dispose()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Сравнивает способы сериализации для заданных размеров таблицы.
+
+    Returns:
+        Код возврата: 1, если JSON способов различается, иначе 0.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=list(ROWS))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    failed = False
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            report = asyncio.run(run(rows, directory, args.repeat))
+            print(report.format())
+            failed = failed or not report.same_output
+    return int(failed)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
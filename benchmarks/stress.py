@@ -0,0 +1,326 @@
+"""Нагрузочный тест приема пожертвований и создания проектов.
+
+Приложение вызывается в процессе через ASGI, без HTTP-сервера.
+Одновременно выполняются тысячи запросов `POST /donation/` и
+`POST /charity_project/`, после чего проверяются инварианты
+распределения, а для каждого прогона выводятся пропускная
+способность и перцентили задержки.
+
+Проверка прав доступа подменяется, чтобы измерялась только
+работа с пожертвованиями и проектами.
+
+Запуск::
+
+    python -m benchmarks.stress --donations 2000 --projects 200 \\
+        --concurrency 500 --engines loop sql ledger
+
+По умолчанию используется временная база SQLite, другую базу
+можно указать через `--database-url`. С флагом `--sqlite-baseline`
+каждый алгоритм дополнительно прогоняется с настройками SQLite по
+умолчанию (журнал отката, `synchronous=FULL`), чтобы сравнить их
+с профилем из настроек `APP_SQLITE_*`.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from benchmarks.asgi import ASGIClient
+
+
+ENGINES = ('loop', 'prefix_sum', 'sql', 'interval', 'ledger')
+
+# Настройки SQLite по умолчанию для сравнения с профилем из настроек.
+SQLITE_BASELINE = {
+    'sqlite_journal_mode': 'DELETE',
+    'sqlite_synchronous': 'FULL',
+    'sqlite_cache_size': None,
+    'sqlite_mmap_size': None,
+}
+
+
+def percentile(values: Sequence[float], share: float) -> float:
+    """Возвращает перцентиль отсортированной выборки.
+
+    Args:
+        values: Значения, отсортированные по возрастанию.
+        share: Доля от 0 до 1.
+
+    Returns:
+        Значение перцентиля или 0 для пустой выборки.
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(share * len(values)))]
+
+
+class RunReport(NamedTuple):
+    """Результат одного прогона нагрузочного теста."""
+
+    name: str
+    errors: int
+    elapsed: float
+    latencies: List[float]
+    violations: List[str]
+
+    @property
+    def throughput(self) -> float:
+        """Число успешных запросов в секунду."""
+        return (len(self.latencies) - self.errors) / self.elapsed
+
+    def format(self) -> str:
+        """Возвращает строку отчета о прогоне."""
+        latencies = sorted(self.latencies)
+        p50, p95, p99 = (
+            percentile(latencies, share) * 1000
+            for share in (0.5, 0.95, 0.99)
+        )
+        status = 'OK' if not self.violations else 'НАРУШЕНЫ ИНВАРИАНТЫ'
+        return (
+            f'{self.name:<20} запросов={len(self.latencies):<6} '
+            f'ошибок={self.errors:<4} {self.throughput:8.1f} запр/с  '
+            f'p50={p50:7.1f} мс  p95={p95:7.1f} мс  p99={p99:7.1f} мс  '
+            f'{status}'
+        )
+
+
+async def check_invariants(session: AsyncSession) -> List[str]:
+    """Проверяет согласованность распределения средств в БД.
+
+    Проверяется, что сумма вложений в проекты равна сумме
+    распределенных пожертвований и записей таблицы `investment`,
+    вложенная сумма не выходит за `[0, full_amount]`, а флаг
+    `fully_invested` и дата закрытия соответствуют вложенной сумме.
+
+    Args:
+        session: Асинхронная сессия базы данных.
+
+    Returns:
+        Описания найденных нарушений, пустой список, если их нет.
+    """
+    from app.models import CharityProject, Donation, Investment
+
+    violations = []
+    totals = {}
+    for model in (CharityProject, Donation):
+        totals[model] = await session.scalar(
+            select(func.coalesce(func.sum(model.invested_amount), 0))
+        )
+        checks = {
+            'invested_amount вне [0, full_amount]': or_(
+                model.invested_amount < 0,
+                model.invested_amount > model.full_amount,
+            ),
+            'fully_invested не совпадает с вложенной суммой': (
+                model.fully_invested.is_distinct_from(
+                    model.invested_amount == model.full_amount
+                )
+            ),
+            'close_date не совпадает с fully_invested': or_(
+                and_(
+                    model.fully_invested.is_(True),
+                    model.close_date.is_(None),
+                ),
+                and_(
+                    model.fully_invested.is_(False),
+                    model.close_date.isnot(None),
+                ),
+            ),
+        }
+        for description, condition in checks.items():
+            count = await session.scalar(
+                select(func.count()).select_from(model).where(condition)
+            )
+            if count:
+                violations.append(
+                    f'{model.__tablename__}: {description} ({count} строк)'
+                )
+    allocated = await session.scalar(
+        select(func.coalesce(func.sum(Investment.amount), 0))
+    )
+    if not totals[CharityProject] == totals[Donation] == allocated:
+        violations.append(
+            'Суммы не совпадают: проекты '
+            f'{totals[CharityProject]}, пожертвования {totals[Donation]}, '
+            f'investment {allocated}'
+        )
+    return violations
+
+
+async def send_requests(
+    client: ASGIClient,
+    donations: int,
+    projects: int,
+    concurrency: int,
+    seed: int,
+) -> Tuple[List[float], int]:
+    """Отправляет перемешанные запросы с ограничением параллельности.
+
+    Args:
+        client: Клиент приложения.
+        donations: Число запросов `POST /donation/`.
+        projects: Число запросов `POST /charity_project/`.
+        concurrency: Максимальное число одновременных запросов.
+        seed: Зерно генератора сумм и порядка запросов.
+
+    Returns:
+        Задержки всех запросов в секундах и число ошибок.
+    """
+    rng = random.Random(seed)
+    requests = [
+        ('/donation/', {'full_amount': rng.randint(1, 1000)})
+        for _ in range(donations)
+    ] + [
+        ('/charity_project/', {
+            'name': f'stress {number}',
+            'description': 'stress',
+            'full_amount': rng.randint(1000, 10000),
+        })
+        for number in range(projects)
+    ]
+    rng.shuffle(requests)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def send(url: str, body: dict) -> None:
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.request('POST', url, body)
+            latencies.append(time.perf_counter() - started)
+        if response.status >= 300:
+            errors += 1
+
+    await asyncio.gather(*(send(url, body) for url, body in requests))
+    return latencies, errors
+
+
+async def run(
+    name: str,
+    donations: int,
+    projects: int,
+    concurrency: int,
+    seed: int = 0,
+) -> RunReport:
+    """Выполняет один прогон на чистой базе данных.
+
+    Перед прогоном таблицы пересоздаются, после него приложение
+    останавливается, чтобы фоновые задачи завершили распределение,
+    и проверяются инварианты.
+
+    Args:
+        name: Название прогона для отчета.
+        donations: Число пожертвований.
+        projects: Число проектов.
+        concurrency: Максимальное число одновременных запросов.
+        seed: Зерно генератора запросов.
+
+    Returns:
+        Отчет о прогоне.
+    """
+    from app.core.base import Base
+    from app.core.db import AsyncSessionLocal, engine
+    from app.main import app
+    from app.services.ledger import open_pool_ledger
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+    open_pool_ledger.reset()
+
+    await app.router.startup()
+    started = time.perf_counter()
+    try:
+        latencies, errors = await send_requests(
+            ASGIClient(app), donations, projects, concurrency, seed
+        )
+    finally:
+        await app.router.shutdown()
+    elapsed = time.perf_counter() - started
+
+    async with AsyncSessionLocal() as session:
+        violations = await check_invariants(session)
+    await engine.dispose()
+    return RunReport(name, errors, elapsed, latencies, violations)
+
+
+def override_auth() -> None:
+    """Отключает проверку прав доступа для нагрузочного теста."""
+    from app.core.user import current_superuser, current_user
+    from app.main import app
+    from app.models.user import User
+
+    user = User(id=1, is_active=True, is_verified=True, is_superuser=True)
+    app.dependency_overrides[current_user] = lambda: user
+    app.dependency_overrides[current_superuser] = lambda: user
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Запускает прогоны для выбранных алгоритмов распределения.
+
+    Returns:
+        Код возврата: 1, если хотя бы в одном прогоне нарушены
+        инварианты, иначе 0.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--donations', type=int, default=2000)
+    parser.add_argument('--projects', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=500)
+    parser.add_argument(
+        '--engines', nargs='+', choices=ENGINES, default=['loop']
+    )
+    parser.add_argument(
+        '--allocation-mode', choices=('sync', 'async'), default='sync'
+    )
+    parser.add_argument('--group-commit-window', type=float, default=0.0)
+    parser.add_argument('--database-url')
+    parser.add_argument('--sqlite-baseline', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Настройки и движок БД создаются при импорте приложения,
+        # поэтому адрес базы задается до первого импорта `app`.
+        os.environ['APP_DATABASE_URL'] = args.database_url or (
+            f'sqlite+aiosqlite:///{directory}/stress.db'
+        )
+        from app.core.config import settings
+
+        settings.allocation_mode = args.allocation_mode
+        settings.group_commit_window = args.group_commit_window
+        override_auth()
+        configured = settings.dict(include=set(SQLITE_BASELINE))
+        profiles = {'': configured}
+        if args.sqlite_baseline:
+            profiles = {'/baseline': SQLITE_BASELINE, '/profile': configured}
+
+        failed = False
+        for engine in args.engines:
+            for suffix, profile in profiles.items():
+                settings.investing_engine = engine
+                for name, value in profile.items():
+                    setattr(settings, name, value)
+                report = asyncio.run(run(
+                    engine + suffix,
+                    args.donations,
+                    args.projects,
+                    args.concurrency,
+                    args.seed,
+                ))
+                print(report.format())
+                for violation in report.violations:
+                    print(f'  {violation}')
+                failed = failed or bool(report.violations)
+    return int(failed)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
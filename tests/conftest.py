@@ -1,12 +1,15 @@
+import os
 from pathlib import Path
 
+from mixer.backend.sqlalchemy import Mixer as _mixer
 import pytest
 import pytest_asyncio
-from mixer.backend.sqlalchemy import Mixer as _mixer
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
+
 try:
     from app.main import app  # noqa
 except (NameError, ImportError) as error:
@@ -42,6 +45,16 @@ except (NameError, ImportError) as error:
         f'{type(error).__name__}: {error}.'
     )
 
+from app.api.caching import response_cache  # noqa
+from app.core.metrics import metrics  # noqa
+from app.crud.cache import query_cache  # noqa
+from app.core.user_cache import user_cache  # noqa
+from app.core.db import (  # noqa
+    ReadOnlySession, get_async_read_session, read_your_writes
+)
+from app.services.group_commit import donation_group_committer  # noqa
+from app.services.invalidation import invalidation_poller  # noqa
+from app.services.ledger import open_pool_ledger  # noqa
 
 BASE_DIR = Path(__file__).resolve(strict=True).parent.parent
 
@@ -51,21 +64,46 @@ pytest_plugins = [
 ]
 
 TEST_DB = BASE_DIR / 'test.db'
-SQLALCHEMY_DATABASE_URL = f'sqlite+aiosqlite:///{str(TEST_DB)}'
-engine = create_async_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={'check_same_thread': False},
+# Тесты можно запустить на другой СУБД, например на временном
+# PostgreSQL: TEST_DATABASE_URL=postgresql+asyncpg://... pytest
+SQLALCHEMY_DATABASE_URL = os.environ.get(
+    'TEST_DATABASE_URL', f'sqlite+aiosqlite:///{str(TEST_DB)}'
 )
+TEST_DATABASE_URL = make_url(SQLALCHEMY_DATABASE_URL)
+if TEST_DATABASE_URL.get_backend_name() == 'sqlite':
+    engine = create_async_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={'check_same_thread': False},
+    )
+else:
+    engine = create_async_engine(SQLALCHEMY_DATABASE_URL)
 TestingSessionLocal = sessionmaker(
     class_=AsyncSession, autocommit=False, autoflush=False, bind=engine,
 )
 
+TestingReadSessionLocal = sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=ReadOnlySession,
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+)
+# Опрос общих счетчиков таблиц запускается вместе с приложением.
+invalidation_poller.session_factory = TestingSessionLocal
+# Эндпоинт POST /donation/ открывает транзакции через накопитель.
+donation_group_committer.session_factory = TestingSessionLocal
+
 
 async def override_db():
     async with TestingSessionLocal() as session:
         yield session
 
 
+async def override_read_db():
+    async with TestingReadSessionLocal() as session:
+        yield session
+
+
 @pytest_asyncio.fixture(autouse=True)
 async def init_db():
     async with engine.begin() as conn:
@@ -75,8 +113,26 @@ async def init_db():
         await conn.run_sync(Base.metadata.drop_all)
 
 
+@pytest.fixture(autouse=True)
+def reset_ledger():
+    yield
+    open_pool_ledger.reset()
+    read_your_writes.reset()
+    response_cache.clear()
+    metrics.reset()
+    query_cache.clear()
+    user_cache.clear()
+
+
 @pytest.fixture
 def mixer():
-    mixer_engine = create_engine(f'sqlite:///{str(TEST_DB)}')
-    session = sessionmaker(bind=mixer_engine)
-    return _mixer(session=session(), commit=True)
+    mixer_engine = create_engine(
+        TEST_DATABASE_URL.set(
+            drivername=TEST_DATABASE_URL.get_backend_name()
+        )
+    )
+    session = sessionmaker(bind=mixer_engine)()
+    yield _mixer(session=session, commit=True)
+    # Открытая транзакция блокировала бы удаление таблиц в PostgreSQL.
+    session.close()
+    mixer_engine.dispose()
@@ -0,0 +1,152 @@
+from datetime import datetime
+
+from conftest import TestingSessionLocal
+import pytest
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.models import CharityProject, Donation
+from app.services.allocation_worker import AllocationWorker
+
+
+DONATION_URL = '/donation/'
+MY_DONATIONS_URL = DONATION_URL + 'my'
+
+
+@pytest.fixture
+def async_mode(monkeypatch):
+    monkeypatch.setattr(settings, 'allocation_mode', 'async')
+
+
+def get_statuses(client):
+    donations = client.get(MY_DONATIONS_URL).json()
+    return [item['allocation_status'] for item in donations]
+
+
+async def get_invested(project_id):
+    async with TestingSessionLocal() as session:
+        return await session.scalar(
+            select(CharityProject.invested_amount)
+            .where(CharityProject.id == project_id)
+        )
+
+
+@pytest.mark.usefixtures('async_mode')
+@pytest.mark.parametrize(
+    'engine', ['loop', 'prefix_sum', 'sql', 'interval', 'ledger']
+)
+async def test_async_donation_intake(
+        engine, monkeypatch, user_client, charity_project):
+    monkeypatch.setattr(settings, 'investing_engine', engine)
+    response = user_client.post(DONATION_URL, json={'full_amount': 300})
+    assert response.status_code == 202, (
+        'В асинхронном режиме POST-запрос к эндпоинту '
+        f'`{DONATION_URL}` должен возвращать статус-код 202.'
+    )
+    assert response.json()['allocation_status'] == 'pending', (
+        'Принятое пожертвование должно ожидать распределения.'
+    )
+    user_client.post(DONATION_URL + 'batch', json=[
+        {'full_amount': 200}, {'full_amount': 100},
+    ])
+    assert get_statuses(user_client) == ['pending'] * 3, (
+        'До работы обработчика пожертвования должны быть в статусе pending.'
+    )
+    assert await get_invested(charity_project.id) == 0, (
+        'В асинхронном режиме эндпоинт не должен распределять средства.'
+    )
+
+    worker = AllocationWorker(TestingSessionLocal)
+    assert await worker.process_pending() == 3, (
+        'Обработчик должен распределить все ожидающие пожертвования.'
+    )
+    assert get_statuses(user_client) == ['done'] * 3, (
+        'После работы обработчика пожертвования должны быть в статусе done.'
+    )
+    assert await get_invested(charity_project.id) == 600, (
+        'Обработчик должен распределить средства по открытым проектам.'
+    )
+
+
+async def get_invested_totals():
+    async with TestingSessionLocal() as session:
+        return [
+            await session.scalar(select(func.sum(model.invested_amount)))
+            for model in (CharityProject, Donation)
+        ]
+
+
+@pytest.mark.usefixtures('async_mode')
+@pytest.mark.parametrize(
+    'engine', ['loop', 'prefix_sum', 'sql', 'interval', 'ledger']
+)
+async def test_worker_skips_pending_sources(engine, monkeypatch, mixer):
+    monkeypatch.setattr(settings, 'investing_engine', engine)
+    old_donation, pending_donation = [
+        mixer.blend(
+            'app.models.donation.Donation',
+            user_id=2,
+            full_amount=full_amount,
+            allocation_pending=pending,
+            create_date=datetime(2020, 1, day),
+        )
+        for day, full_amount, pending in ((1, 30, False), (2, 100, True))
+    ]
+    project = mixer.blend(
+        'app.models.charity_project.CharityProject',
+        name='pending',
+        description='pending',
+        full_amount=50,
+        allocation_pending=True,
+        create_date=datetime(2020, 1, 3),
+    )
+
+    worker = AllocationWorker(TestingSessionLocal)
+    assert await worker.process_pending() == 2, (
+        'Обработчик должен распределить все ожидающие записи.'
+    )
+    projects_total, donations_total = await get_invested_totals()
+    assert projects_total == donations_total, (
+        'Сумма вложений в проекты должна совпадать с суммой '
+        'распределенных пожертвований.'
+    )
+    assert await get_invested(project.id) == 50, (
+        'Проект должен получить средства старого пожертвования и '
+        'пожертвования, обработанного перед ним.'
+    )
+    async with TestingSessionLocal() as session:
+        invested = await session.scalar(
+            select(Donation.invested_amount)
+            .where(Donation.id == pending_donation.id)
+        )
+    assert invested == 20, (
+        'Ожидающее пожертвование должно распределяться в порядке FIFO '
+        f'после пожертвования #{old_donation.id}.'
+    )
+
+
+@pytest.mark.usefixtures('async_mode')
+async def test_worker_drains_queue_on_stop(user_client, charity_project):
+    user_client.post(DONATION_URL, json={'full_amount': 50})
+    worker = AllocationWorker(TestingSessionLocal)
+    worker.start()
+    worker.notify()
+    await worker.stop()
+    assert get_statuses(user_client) == ['done'], (
+        'При остановке обработчик должен распределить ожидающие '
+        'пожертвования.'
+    )
+    assert await get_invested(charity_project.id) == 50, (
+        'При остановке обработчик должен распределить ожидающие '
+        'пожертвования.'
+    )
+
+
+def test_sync_mode_has_no_allocation_status(user_client, charity_project):
+    response = user_client.post(DONATION_URL, json={'full_amount': 10})
+    assert response.status_code == 200, (
+        'В синхронном режиме POST-запрос должен возвращать статус-код 200.'
+    )
+    assert 'allocation_status' not in response.json(), (
+        'В синхронном режиме статус распределения не возвращается.'
+    )
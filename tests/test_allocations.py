@@ -0,0 +1,94 @@
+import pytest
+
+from app.core.config import settings
+from app.services.investing import pair_allocations
+
+
+DONATION_URL = '/donation/'
+PROJECTS_URL = '/charity_project/'
+ENGINES = ['loop', 'prefix_sum', 'sql', 'interval', 'ledger']
+
+
+@pytest.mark.parametrize('received, given, expected', [
+    ([(1, 30), (2, 20)], [(7, 40), (8, 10)],
+     [(1, 7, 30), (2, 7, 10), (2, 8, 10)]),
+    ([(1, 50)], [(7, 10), (8, 0), (9, 40)], [(1, 7, 10), (1, 9, 40)]),
+    ([(1, 0), (2, 5)], [(7, 5)], [(2, 7, 5)]),
+    ([], [(7, 5)], []),
+])
+def test_pair_allocations(received, given, expected):
+    assert pair_allocations(received, given) == expected, (
+        'Суммы целей и источников должны сопоставляться в порядке FIFO.'
+    )
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_donation_allocations(
+        engine, monkeypatch, user_client, charity_project,
+        charity_project_nunchaku):
+    monkeypatch.setattr(settings, 'investing_engine', engine)
+    donation_id = user_client.post(
+        DONATION_URL, json={'full_amount': 1500000}
+    ).json()['id']
+    response = user_client.get(f'{DONATION_URL}{donation_id}/allocations')
+    assert response.status_code == 200, (
+        'GET-запрос владельца к распределению пожертвования '
+        'должен возвращать статус-код 200.'
+    )
+    assert [
+        (item['donation_id'], item['project_id'], item['amount'])
+        for item in response.json()
+    ] == [
+        (donation_id, charity_project.id, 1000000),
+        (donation_id, charity_project_nunchaku.id, 500000),
+    ], (
+        'Распределение пожертвования должно перечислять вложения '
+        'в проекты в порядке FIFO.'
+    )
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_project_allocations(
+        engine, monkeypatch, superuser_client, donation, another_donation):
+    monkeypatch.setattr(settings, 'investing_engine', engine)
+    project_id = superuser_client.post(PROJECTS_URL, json={
+        'name': 'allocations', 'description': 'allocations',
+        'full_amount': donation.full_amount + 1,
+    }).json()['id']
+    response = superuser_client.get(
+        f'{PROJECTS_URL}{project_id}/allocations'
+    )
+    assert response.status_code == 200, (
+        'GET-запрос суперпользователя к распределению проекта '
+        'должен возвращать статус-код 200.'
+    )
+    assert [
+        (item['donation_id'], item['amount']) for item in response.json()
+    ] == [(donation.id, donation.full_amount), (another_donation.id, 1)], (
+        'Распределение проекта должно перечислять вложенные '
+        'пожертвования в порядке FIFO.'
+    )
+
+
+def test_donation_allocations_forbidden(user_client, mixer):
+    donation = mixer.blend(
+        'app.models.donation.Donation', user_id=1, full_amount=10,
+    )
+    response = user_client.get(f'{DONATION_URL}{donation.id}/allocations')
+    assert response.status_code == 403, (
+        'Пользователь не должен видеть распределение чужого пожертвования.'
+    )
+    response = user_client.get(f'{DONATION_URL}0/allocations')
+    assert response.status_code == 404, (
+        'Для несуществующего пожертвования должен возвращаться '
+        'статус-код 404.'
+    )
+
+
+def test_project_allocations_usual_user(user_client, charity_project):
+    response = user_client.get(
+        f'{PROJECTS_URL}{charity_project.id}/allocations'
+    )
+    assert response.status_code == 403, (
+        'Распределение проекта доступно только суперпользователю.'
+    )
@@ -728,3 +728,53 @@ def test_get_all_charity_project_not_auth_user(test_client):
         f'пользователя к эндпоинту `{PROJECTS_URL}` возвращается список '
         'существующих проектов.'
     )
+
+
+@pytest.mark.parametrize(
+    'engine', ['loop', 'prefix_sum', 'sql', 'interval', 'ledger']
+)
+def test_create_charity_projects_batch(
+        engine, monkeypatch, superuser_client, donation, another_donation):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, 'investing_engine', engine)
+    response = superuser_client.post(PROJECTS_URL + 'batch', json=[
+        {'name': 'first', 'description': 'first', 'full_amount': 60},
+        {'name': 'second', 'description': 'second', 'full_amount': 60},
+        {'name': 'third', 'description': 'third', 'full_amount': 10 ** 9},
+    ])
+    assert response.status_code == 200, (
+        f'Корректный POST-запрос к эндпоинту `{PROJECTS_URL}batch` '
+        'должен возвращать ответ со статус-кодом 200.'
+    )
+    data = response.json()
+    assert [item['name'] for item in data] == ['first', 'second', 'third'], (
+        'Пакетный эндпоинт должен возвращать проекты в порядке запроса.'
+    )
+    open_amount = donation.full_amount + another_donation.full_amount - 120
+    assert [
+        (item['invested_amount'], item['fully_invested']) for item in data
+    ] == [(60, True), (60, True), (open_amount, False)], (
+        'Открытые пожертвования должны распределяться по пачке проектов '
+        'в порядке FIFO так же, как при последовательном создании.'
+    )
+
+
+@pytest.mark.parametrize('names', [
+    ['chimichangas4life', 'unique'],
+    ['twice', 'twice'],
+])
+def test_create_charity_projects_batch_same_name(
+        superuser_client, charity_project, names):
+    response = superuser_client.post(PROJECTS_URL + 'batch', json=[
+        {'name': name, 'description': 'batch', 'full_amount': 10}
+        for name in names
+    ])
+    assert response.status_code == 400, (
+        'При повторяющемся имени в пачке или совпадении с существующим '
+        'проектом должен вернуться статус-код 400.'
+    )
+    projects = superuser_client.get(PROJECTS_URL).json()
+    assert len(projects) == 1, (
+        'При ошибке валидации ни один проект из пачки не должен создаваться.'
+    )
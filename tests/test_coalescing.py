@@ -0,0 +1,131 @@
+import asyncio
+
+from conftest import TestingReadSessionLocal, TestingSessionLocal
+import pytest
+
+from app.core.generations import table_generations
+from app.core.metrics import metrics
+from app.crud.charity_project import charity_project_crud
+from app.models import CharityProject
+from app.services.charity_project_service import charity_project_service
+from app.services.coalescing import (
+    CALLS_METRIC,
+    COALESCED_METRIC,
+    SingleFlight,
+)
+
+
+@pytest.fixture
+def slow_get_page(monkeypatch):
+    calls = []
+    get_page = charity_project_crud.get_page
+
+    async def counting_get_page(*args, **kwargs):
+        calls.append(args)
+        await asyncio.sleep(0.01)
+        return await get_page(*args, **kwargs)
+
+    monkeypatch.setattr(charity_project_crud, 'get_page', counting_get_page)
+    return calls
+
+
+async def get_projects(session_factory, **kwargs):
+    async with session_factory() as session:
+        return await charity_project_service.get_projects_page(
+            session, **kwargs
+        )
+
+
+async def test_identical_reads_share_one_query(mixer, slow_get_page):
+    # Фикстуры проектов останавливают часы event loop, а запрос
+    # должен выполняться дольше, чем приходят одинаковые вызовы.
+    project = mixer.blend(
+        'app.models.charity_project.CharityProject', full_amount=100
+    )
+    pages = await asyncio.gather(*(
+        get_projects(TestingReadSessionLocal, fields=['id', 'name'])
+        for _ in range(10)
+    ))
+    assert len(slow_get_page) == 1, (
+        'Одинаковые параллельные чтения должны выполнять один запрос.'
+    )
+    assert all(page == pages[0] for page in pages)
+    assert pages[0].items[0].name == project.name
+    assert metrics.value(CALLS_METRIC, method='get_projects_page') == 10
+    assert metrics.value(COALESCED_METRIC, method='get_projects_page') == 9
+
+
+async def test_different_arguments_not_coalesced(slow_get_page):
+    await asyncio.gather(
+        get_projects(TestingReadSessionLocal, limit=1),
+        get_projects(TestingReadSessionLocal, limit=2),
+    )
+    assert len(slow_get_page) == 2
+
+
+async def test_write_sessions_not_coalesced(slow_get_page):
+    await asyncio.gather(*(
+        get_projects(TestingSessionLocal) for _ in range(3)
+    ))
+    assert len(slow_get_page) == 3, (
+        'Объекты сессии записи нельзя делить между запросами.'
+    )
+
+
+async def test_reads_after_write_not_joined(slow_get_page):
+    first = asyncio.ensure_future(get_projects(TestingReadSessionLocal))
+    await asyncio.sleep(0)
+    table_generations.bump([CharityProject.__tablename__])
+    await asyncio.gather(first, get_projects(TestingReadSessionLocal))
+    assert len(slow_get_page) == 2, (
+        'Чтение после записи не должно получать результат запроса, '
+        'начатого до нее.'
+    )
+
+
+async def test_error_shared_with_waiters():
+    flight = SingleFlight('failing')
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError('failed')
+
+    results = await asyncio.gather(
+        *(flight.run('key', fail) for _ in range(3)),
+        return_exceptions=True,
+    )
+    assert len(calls) == 1
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+async def test_waiters_retry_after_leader_cancelled():
+    flight = SingleFlight('cancelled')
+    calls = []
+
+    async def query():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    leader = asyncio.ensure_future(flight.run('key', query))
+    await asyncio.sleep(0)
+    waiter = asyncio.ensure_future(flight.run('key', query))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await waiter == 2, (
+        'После отмены первого вызова ожидающий должен выполнить '
+        'запрос сам.'
+    )
+
+
+def test_metrics_endpoint(user_client, charity_project):
+    user_client.get('/charity_project/')
+    response = user_client.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain')
+    assert (
+        f'{CALLS_METRIC}{{method="get_projects_page"}} 1' in response.text
+    ), 'Эндпоинт метрик должен отдавать счетчики чтений.'
+    assert f'# TYPE {COALESCED_METRIC} counter' in response.text
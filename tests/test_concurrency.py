@@ -0,0 +1,160 @@
+import asyncio
+from functools import partial
+
+from conftest import TestingSessionLocal
+from fastapi import HTTPException
+import pytest
+from sqlalchemy import func, select, update
+
+from app.api.validators import (
+    check_project_can_be_deleted,
+    check_project_can_be_updated,
+)
+from app.core.config import settings
+from app.crud.base_investment import CRUDBaseInvestment
+from app.models import CharityProject, Donation
+from app.models.user import User
+from app.schemas.charity_project import (
+    CharityProjectCreate,
+    CharityProjectUpdate,
+)
+from app.schemas.donation import DonationCreate
+from app.services import charity_project_service, donation_service
+
+
+ENGINES = ['loop', 'prefix_sum', 'sql', 'interval', 'ledger']
+
+
+async def create_donation(full_amount):
+    async with TestingSessionLocal() as session:
+        await donation_service.create_donation(
+            DonationCreate(full_amount=full_amount), User(id=2), session
+        )
+
+
+async def create_project(number, full_amount):
+    async with TestingSessionLocal() as session:
+        await charity_project_service.create_project(
+            CharityProjectCreate(
+                name=f'project {number}',
+                description='concurrency',
+                full_amount=full_amount,
+            ),
+            session,
+        )
+
+
+async def get_rows(model):
+    async with TestingSessionLocal() as session:
+        return (await session.execute(select(model))).scalars().all()
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+async def test_concurrent_allocations_keep_totals(engine, monkeypatch):
+    monkeypatch.setattr(settings, 'investing_engine', engine)
+    await asyncio.gather(*(
+        create_donation(100 + number) if number % 3 else
+        create_project(number, 250)
+        for number in range(30)
+    ))
+
+    projects = await get_rows(CharityProject)
+    donations = await get_rows(Donation)
+    assert sum(obj.invested_amount for obj in projects) == sum(
+        obj.invested_amount for obj in donations
+    ), (
+        'При параллельной записи сумма вложений в проекты должна '
+        'совпадать с суммой распределенных пожертвований.'
+    )
+    for obj in projects + donations:
+        assert 0 <= obj.invested_amount <= obj.full_amount, (
+            'Вложенная сумма не должна превышать полную сумму.'
+        )
+        assert obj.fully_invested == (
+            obj.invested_amount == obj.full_amount
+        ), 'Флаг fully_invested должен соответствовать вложенной сумме.'
+        assert obj.fully_invested == (obj.close_date is not None), (
+            'Дата закрытия должна быть только у закрытых записей.'
+        )
+
+
+async def test_stale_sources_are_retried(monkeypatch, donation):
+    monkeypatch.setattr(settings, 'investing_engine', 'loop')
+    # freezer фикстуры donation останавливает часы event loop.
+    monkeypatch.setattr(settings, 'allocation_retry_delay', 0)
+    get_active = CRUDBaseInvestment.get_active
+    calls = []
+
+    async def get_active_changed_concurrently(self, session):
+        sources = await get_active(self, session)
+        calls.append(len(sources))
+        if len(calls) == 1:
+            await session.execute(
+                update(Donation)
+                .where(Donation.id == donation.id)
+                .values(version_id=Donation.version_id + 1)
+                .execution_options(synchronize_session=False)
+            )
+        return sources
+
+    monkeypatch.setattr(
+        CRUDBaseInvestment, 'get_active', get_active_changed_concurrently
+    )
+    await create_project(1, 40)
+
+    assert calls == [1, 1], (
+        'При конфликте версий транзакция должна выполняться повторно.'
+    )
+    async with TestingSessionLocal() as session:
+        invested = await session.scalar(
+            select(func.sum(Donation.invested_amount))
+        )
+    assert invested == 40, (
+        'Повторная транзакция должна распределить средства один раз.'
+    )
+
+
+async def test_retried_update_rechecks_project():
+    await create_project(1, 100)
+    async with TestingSessionLocal() as session:
+        project = await session.scalar(select(CharityProject))
+        # Пожертвование закрывает проект после проверок эндпоинта.
+        await create_donation(100)
+        project_update = CharityProjectUpdate(full_amount=200)
+        with pytest.raises(HTTPException) as error:
+            await charity_project_service.update_project(
+                project,
+                project_update,
+                session,
+                check=partial(
+                    check_project_can_be_updated,
+                    project_update=project_update,
+                ),
+            )
+    assert error.value.status_code == 400, (
+        'Повтор обновления должен заново проверить перечитанный проект.'
+    )
+    project, = await get_rows(CharityProject)
+    assert (project.full_amount, project.invested_amount) == (100, 100)
+    assert project.fully_invested and project.close_date is not None
+
+
+async def test_retried_delete_rechecks_project():
+    await create_project(1, 100)
+    async with TestingSessionLocal() as session:
+        project = await session.scalar(select(CharityProject))
+        await check_project_can_be_deleted(project)
+        # Пожертвование вкладывает средства после проверки эндпоинта.
+        await create_donation(30)
+        with pytest.raises(HTTPException) as error:
+            await charity_project_service.delete_project(
+                project, session, check=check_project_can_be_deleted
+            )
+    assert error.value.status_code == 400, (
+        'Повтор удаления должен заново проверить перечитанный проект.'
+    )
+    project, = await get_rows(CharityProject)
+    donation, = await get_rows(Donation)
+    assert project.invested_amount == donation.invested_amount == 30, (
+        'Проект с вложенными средствами не должен удаляться.'
+    )
@@ -221,3 +221,84 @@ def test_create_donation_check_create_date(user_client):
         'Убедитесь, что при неодновременном создании двух пожертвований '
         'у них отличаются значения в поле `create_date`.'
     )
+
+
+@pytest.mark.parametrize(
+    'engine', ['loop', 'prefix_sum', 'sql', 'interval', 'ledger']
+)
+async def test_create_donations_batch(
+        engine, monkeypatch, user_client, charity_project,
+        charity_project_nunchaku):
+    from conftest import TestingSessionLocal
+    from sqlalchemy import select
+
+    from app.core.config import settings
+    from app.models import Donation
+
+    monkeypatch.setattr(settings, 'investing_engine', engine)
+    response = user_client.post(DONATIONS_URL + 'batch', json=[
+        {'full_amount': 700000},
+        {'full_amount': 600000, 'comment': 'second'},
+        {'full_amount': 5000000},
+    ])
+    assert response.status_code == 200, (
+        f'Корректный POST-запрос к эндпоинту `{DONATIONS_URL}batch` '
+        'должен возвращать ответ со статус-кодом 200.'
+    )
+    assert [item['full_amount'] for item in response.json()] == [
+        700000, 600000, 5000000
+    ], (
+        'Пакетный эндпоинт должен возвращать пожертвования '
+        'в порядке их поступления.'
+    )
+    async with TestingSessionLocal() as session:
+        donations = (await session.execute(
+            select(Donation.invested_amount, Donation.fully_invested)
+            .order_by(Donation.id)
+        )).all()
+    assert [tuple(row) for row in donations] == [
+        (700000, True), (600000, True), (4700000, False)
+    ], (
+        'Пакетные пожертвования должны распределяться по проектам '
+        'в порядке FIFO так же, как последовательные.'
+    )
+
+
+def test_create_donations_batch_incorrect(user_client):
+    response = user_client.post(DONATIONS_URL + 'batch', json=[])
+    assert response.status_code == 422, (
+        f'Пустой список в POST-запросе к `{DONATIONS_URL}batch` '
+        'должен возвращать статус-код 422.'
+    )
+    response = user_client.post(
+        DONATIONS_URL + 'batch', json=[{'full_amount': 10}, {'full_amount': -1}]
+    )
+    assert response.status_code == 422, (
+        'Некорректный элемент пакета должен отклонять весь запрос '
+        'со статус-кодом 422.'
+    )
+
+
+async def test_create_donation_single_transaction(
+        monkeypatch, user_client, charity_project):
+    from conftest import TestingSessionLocal
+    from sqlalchemy import func, select
+
+    from importlib import import_module
+
+    from app.models import Donation
+
+    service_module = import_module('app.services.donation_service')
+
+    async def fail(*args, **kwargs):
+        raise RuntimeError('allocation failed')
+
+    monkeypatch.setattr(service_module, 'allocate_or_defer', fail)
+    with pytest.raises(RuntimeError):
+        user_client.post(DONATIONS_URL, json={'full_amount': 10})
+    async with TestingSessionLocal() as session:
+        count = await session.scalar(select(func.count(Donation.id)))
+    assert count == 0, (
+        'Пожертвование должно сохраняться в одной транзакции '
+        'с распределением средств.'
+    )
@@ -0,0 +1,51 @@
+from conftest import TestingSessionLocal
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.db import engine_options
+from app.models import CharityProject
+
+
+def test_sqlite_uses_default_pool():
+    assert engine_options('sqlite+aiosqlite:///./fastapi.db') == {}, (
+        'Для SQLite параметры пула задаваться не должны.'
+    )
+
+
+def test_asyncpg_pool_options(monkeypatch):
+    monkeypatch.setattr(settings, 'pool_size', 20)
+    monkeypatch.setattr(settings, 'pool_max_overflow', 0)
+    monkeypatch.setattr(settings, 'asyncpg_statement_cache_size', 0)
+    options = engine_options('postgresql+asyncpg://user:pass@db/fund')
+    assert options == {
+        'pool_size': 20,
+        'max_overflow': 0,
+        'pool_timeout': settings.pool_timeout,
+        'pool_recycle': settings.pool_recycle,
+        'pool_pre_ping': settings.pool_pre_ping,
+        'connect_args': {
+            'prepared_statement_cache_size': 0,
+            'statement_cache_size': 0,
+        },
+    }, 'Параметры пула asyncpg должны браться из настроек.'
+
+
+def test_other_drivers_skip_asyncpg_options():
+    options = engine_options('postgresql+psycopg2://user:pass@db/fund')
+    assert 'connect_args' not in options, (
+        'Кэш выражений asyncpg не должен передаваться другим драйверам.'
+    )
+
+
+@pytest.mark.parametrize('invested_amount', [-1, 101])
+async def test_invested_amount_range_is_checked(invested_amount):
+    async with TestingSessionLocal() as session:
+        session.add(CharityProject(
+            name='range',
+            description='range',
+            full_amount=100,
+            invested_amount=invested_amount,
+        ))
+        with pytest.raises(IntegrityError):
+            await session.commit()
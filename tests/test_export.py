@@ -0,0 +1,87 @@
+import csv
+import io
+import json
+
+from conftest import TestingReadSessionLocal
+
+from app.models import CharityProject, Donation
+from app.services import export
+from app.services.export import stream_export
+
+
+DONATION_EXPORT_URL = '/donation/export'
+PROJECT_EXPORT_URL = '/charity_project/export'
+
+
+def test_export_donations_ndjson(superuser_client, donation, another_donation):
+    response = superuser_client.get(DONATION_EXPORT_URL)
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row['id'] for row in rows] == [donation.id, another_donation.id]
+    assert rows[0]['full_amount'] == donation.full_amount
+    assert set(rows[0]) == set(export.EXPORT_COLUMNS[Donation]), (
+        'Строка NDJSON должна содержать все выгружаемые столбцы.'
+    )
+
+
+def test_export_projects_csv(superuser_client, charity_project):
+    response = superuser_client.get(
+        PROJECT_EXPORT_URL, params={'format': 'csv'}
+    )
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/csv')
+    header, *rows = csv.reader(io.StringIO(response.text))
+    assert header == list(export.EXPORT_COLUMNS[CharityProject]), (
+        'CSV должен начинаться со строки заголовка.'
+    )
+    assert [row[1] for row in rows] == [charity_project.name]
+
+
+def test_export_requires_superuser(user_client):
+    for url in (DONATION_EXPORT_URL, PROJECT_EXPORT_URL):
+        response = user_client.get(url)
+        assert response.status_code == 403, (
+            'Выгрузка должна быть доступна только суперпользователю.'
+        )
+
+
+def test_export_rejects_unknown_format(superuser_client):
+    response = superuser_client.get(
+        DONATION_EXPORT_URL, params={'format': 'xml'}
+    )
+    assert response.status_code == 422
+
+
+async def test_export_streams_in_chunks(mixer):
+    mixer.cycle(5).blend(
+        'app.models.charity_project.CharityProject',
+        name=mixer.sequence('export {0}'),
+        full_amount=100,
+    )
+    async with TestingReadSessionLocal() as session:
+        chunks = [
+            chunk async for chunk in stream_export(
+                CharityProject, 'ndjson', session, chunk_size=2
+            )
+        ]
+    assert [chunk.count('\n') for chunk in chunks] == [2, 2, 1], (
+        'Строки должны читаться и выдаваться пачками по chunk_size.'
+    )
+
+
+async def test_export_to_file(mixer, monkeypatch):
+    mixer.cycle(3).blend(
+        'app.models.charity_project.CharityProject',
+        name=mixer.sequence('export {0}'),
+        full_amount=100,
+    )
+    monkeypatch.setattr(
+        export, 'AsyncReadSessionLocal', TestingReadSessionLocal
+    )
+    output = io.StringIO()
+    await export.export_to_file(CharityProject, 'csv', output)
+    output.seek(0)
+    assert len(list(csv.reader(output))) == 4, (
+        'Файл выгрузки должен содержать заголовок и все строки.'
+    )
@@ -0,0 +1,84 @@
+from conftest import TestingSessionLocal
+import pytest
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.crud.base_investment import CRUDBaseInvestment
+from app.crud.fund_pool import fund_pool_crud
+from app.models import CharityProject, Donation
+from app.services.allocation_worker import AllocationWorker
+
+
+DONATION_URL = '/donation/'
+PROJECTS_URL = '/charity_project/'
+
+
+async def get_counters_and_aggregates():
+    async with TestingSessionLocal() as session:
+        counters = await fund_pool_crud.get_counters(session)
+        aggregates = []
+        for model in (CharityProject, Donation):
+            aggregates.append(await session.scalar(
+                select(func.coalesce(
+                    func.sum(model.full_amount - model.invested_amount), 0
+                )).where(model.fully_invested.is_(False))
+            ))
+    return tuple(counters.values()), tuple(aggregates)
+
+
+@pytest.mark.parametrize(
+    'engine', ['loop', 'prefix_sum', 'sql', 'interval', 'ledger']
+)
+async def test_fund_pool_counters_follow_allocations(
+        engine, monkeypatch, superuser_client, charity_project, donation):
+    monkeypatch.setattr(settings, 'investing_engine', engine)
+    superuser_client.post(DONATION_URL, json={'full_amount': 300})
+    superuser_client.post(PROJECTS_URL, json={
+        'name': 'counters', 'description': 'counters', 'full_amount': 50,
+    })
+    superuser_client.patch(
+        PROJECTS_URL + str(charity_project.id), json={'full_amount': 500}
+    )
+    superuser_client.post(DONATION_URL, json={'full_amount': 700})
+
+    counters, aggregates = await get_counters_and_aggregates()
+    assert counters == aggregates, (
+        'Счетчики `fund_pool` должны совпадать с остатками открытых '
+        'проектов и пожертвований.'
+    )
+
+
+@pytest.mark.usefixtures('small_fully_charity_project')
+def test_donation_skips_allocation_without_open_projects(
+        monkeypatch, user_client):
+    user_client.post(DONATION_URL, json={'full_amount': 10})
+
+    def fail(*args, **kwargs):
+        raise AssertionError('Открытые проекты не должны запрашиваться.')
+
+    monkeypatch.setattr(CRUDBaseInvestment, 'get_active', fail)
+    response = user_client.post(DONATION_URL, json={'full_amount': 10})
+    assert response.status_code == 200, (
+        'Пожертвование без открытых проектов должно создаваться без '
+        'выборки открытого пула.'
+    )
+
+
+async def test_pending_donations_not_counted(
+        monkeypatch, user_client, charity_project):
+    # Режим включается после запуска приложения: обработчик не стартует.
+    monkeypatch.setattr(settings, 'allocation_mode', 'async')
+    user_client.post(DONATION_URL, json={'full_amount': 300})
+    async with TestingSessionLocal() as session:
+        available = await fund_pool_crud.get_available(Donation, session)
+    assert available == 0, (
+        'Пожертвования, ожидающие фонового распределения, не должны '
+        'учитываться в счетчиках открытого пула.'
+    )
+
+    await AllocationWorker(TestingSessionLocal).process_pending()
+    counters, aggregates = await get_counters_and_aggregates()
+    assert counters == aggregates, (
+        'После распределения счетчики `fund_pool` должны совпадать с '
+        'остатками открытых проектов и пожертвований.'
+    )
@@ -0,0 +1,121 @@
+import asyncio
+
+from conftest import TestingSessionLocal
+import pytest
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.donation import Donation
+from app.models.user import User
+from app.schemas.donation import DonationCreate
+from app.services.donation_service import donation_service
+from app.services.group_commit import DonationGroupCommitter
+
+
+DONATION_URL = '/donation/'
+
+
+@pytest.fixture
+def open_project(mixer):
+    # Без freezer: замороженное время останавливает таймер окна.
+    return mixer.blend(
+        'app.models.charity_project.CharityProject',
+        name='group commit',
+        description='group commit',
+        full_amount=1000000,
+    )
+
+
+@pytest.fixture
+def committed_groups(monkeypatch):
+    groups = []
+    create_user_donations = donation_service.create_user_donations
+
+    async def track(entries, session):
+        groups.append(len(entries))
+        return await create_user_donations(entries, session)
+
+    monkeypatch.setattr(donation_service, 'create_user_donations', track)
+    return groups
+
+
+@pytest.mark.parametrize('max_size, expected_groups', [
+    (100, [5]),
+    (2, [2, 2, 1]),
+])
+async def test_group_commit_merges_concurrent_donations(
+        monkeypatch, committed_groups, open_project, max_size,
+        expected_groups):
+    monkeypatch.setattr(settings, 'group_commit_window', 0.05)
+    monkeypatch.setattr(settings, 'group_commit_max_size', max_size)
+    committer = DonationGroupCommitter(TestingSessionLocal)
+    users = [User(id=user_id) for user_id in (1, 2, 1, 2, 1)]
+    donations = await asyncio.gather(*(
+        committer.submit(DonationCreate(full_amount=100 * (i + 1)), user)
+        for i, user in enumerate(users)
+    ))
+    await committer.stop()
+    assert committed_groups == expected_groups, (
+        'Одновременные пожертвования должны фиксироваться группами '
+        'в пределах окна и максимального размера группы.'
+    )
+    assert [
+        (donation.user_id, donation.full_amount, donation.invested_amount)
+        for donation in donations
+    ] == [
+        (user.id, 100 * (i + 1), 100 * (i + 1))
+        for i, user in enumerate(users)
+    ], (
+        'Каждый запрос группы должен получить свое распределенное '
+        'пожертвование.'
+    )
+
+
+def test_group_commit_endpoint(monkeypatch, user_client, open_project):
+    monkeypatch.setattr(settings, 'group_commit_window', 0.001)
+    response = user_client.post(DONATION_URL, json={'full_amount': 10})
+    assert response.status_code == 200, (
+        'С групповым commit эндпоинт должен сохранять синхронный '
+        'контракт и возвращать статус-код 200.'
+    )
+    assert response.json()['full_amount'] == 10, (
+        'С групповым commit эндпоинт должен возвращать созданное '
+        'пожертвование.'
+    )
+
+
+async def test_failed_donation_fails_only_its_request(
+        monkeypatch, open_project):
+    from importlib import import_module
+
+    service_module = import_module('app.services.donation_service')
+    allocate_or_defer = service_module.allocate_or_defer
+
+    async def fail_on_13(targets, source_crud, session):
+        if any(target.full_amount == 13 for target in targets):
+            raise RuntimeError('allocation failed')
+        await allocate_or_defer(targets, source_crud, session)
+
+    monkeypatch.setattr(service_module, 'allocate_or_defer', fail_on_13)
+    monkeypatch.setattr(settings, 'group_commit_window', 0.05)
+    committer = DonationGroupCommitter(TestingSessionLocal)
+    results = await asyncio.gather(*(
+        committer.submit(DonationCreate(full_amount=amount), User(id=2))
+        for amount in (10, 13, 20)
+    ), return_exceptions=True)
+    await committer.stop()
+    assert isinstance(results[1], RuntimeError), (
+        'Запрос с ошибочным пожертвованием должен получить ошибку.'
+    )
+    assert [
+        (donation.full_amount, donation.invested_amount)
+        for donation in (results[0], results[2])
+    ] == [(10, 10), (20, 20)], (
+        'Ошибка одного пожертвования не должна отменять остальные '
+        'пожертвования группы.'
+    )
+    async with TestingSessionLocal() as session:
+        amounts = await session.scalars(
+            select(Donation.full_amount).order_by(Donation.id)
+        )
+        assert amounts.all() == [10, 20]
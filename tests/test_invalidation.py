@@ -0,0 +1,142 @@
+import time
+
+from conftest import TestingSessionLocal, engine
+import pytest
+from sqlalchemy import select, text
+
+from app.core.config import settings
+from app.core.generations import publish_generations, table_generations
+from app.core.metrics import metrics
+from app.models import CharityProject, TableGeneration
+from app.services.invalidation import (
+    DELAY_COUNT_METRIC,
+    DELAY_LAST_METRIC,
+    InvalidationPoller,
+)
+
+
+TABLE = CharityProject.__tablename__
+PROJECTS_URL = '/charity_project/'
+
+
+@pytest.fixture(autouse=True)
+def process_scope(monkeypatch):
+    # Общие счетчики ведутся только для общего кэша процесса.
+    monkeypatch.setattr(settings, 'query_cache_scope', 'process')
+
+
+async def shared_generations():
+    async with TestingSessionLocal() as session:
+        result = await session.execute(
+            select(TableGeneration.name, TableGeneration.generation)
+        )
+        return dict(result.all())
+
+
+async def write_from_other_worker(statement, changed_at=None):
+    # Соединение без сессии ORM не меняет поколения этого процесса,
+    # как запись, сделанная другим воркером.
+    async with engine.begin() as connection:
+        await connection.execute(text(statement))
+        await connection.run_sync(publish_generations, [TABLE])
+        if changed_at is not None:
+            await connection.execute(
+                TableGeneration.__table__.update().values(
+                    changed_at=changed_at
+                )
+            )
+
+
+async def test_commit_publishes_shared_generation(mixer):
+    mixer.blend('app.models.charity_project.CharityProject', full_amount=10)
+    mixer.blend('app.models.charity_project.CharityProject', full_amount=20)
+    assert (await shared_generations())[TABLE] == 2, (
+        'Каждый commit записи должен увеличивать общий счетчик таблицы.'
+    )
+
+
+@pytest.mark.parametrize('name, value', (
+    ('invalidation_poll_interval', 0),
+    ('query_cache_scope', 'request'),
+    ('query_cache_scope', 'off'),
+))
+async def test_disabled_bus_keeps_local_generations(
+    monkeypatch, mixer, name, value
+):
+    monkeypatch.setattr(settings, name, value)
+    generation = table_generations.get(TABLE)
+    mixer.blend('app.models.charity_project.CharityProject', full_amount=10)
+    assert await shared_generations() == {}, (
+        'Без общего кэша процесса commit не должен обновлять общие '
+        'счетчики таблиц.'
+    )
+    assert table_generations.get(TABLE) == generation + 1
+
+
+async def test_poll_detects_other_worker_writes(mixer):
+    mixer.blend('app.models.charity_project.CharityProject', full_amount=10)
+    poller = InvalidationPoller(TestingSessionLocal)
+    await poller.poll()
+    assert await poller.poll() == [], (
+        'Собственные записи процесса не должны сбрасывать кэши повторно.'
+    )
+    generation = table_generations.get(TABLE)
+    await write_from_other_worker(
+        "UPDATE charityproject SET name = 'remote'", time.time() - 0.5
+    )
+    assert await poller.poll() == [TABLE]
+    assert table_generations.get(TABLE) == generation + 1
+    assert metrics.value(DELAY_COUNT_METRIC) == 1
+    assert metrics.value(DELAY_LAST_METRIC) >= 0.5, (
+        'Задержка сброса должна отсчитываться от записи другого воркера.'
+    )
+
+
+async def test_first_poll_does_not_report_delay(mixer):
+    mixer.blend('app.models.charity_project.CharityProject', full_amount=10)
+    table_generations.observe(TABLE, -1)
+    assert await InvalidationPoller(TestingSessionLocal).poll() == [TABLE]
+    assert metrics.value(DELAY_COUNT_METRIC) == 0
+
+
+async def test_recreated_counter_still_invalidates(mixer):
+    mixer.blend('app.models.charity_project.CharityProject', full_amount=10)
+    table_generations.observe(TABLE, 100)
+    generation = table_generations.get(TABLE)
+    await InvalidationPoller(TestingSessionLocal).poll()
+    assert table_generations.get(TABLE) == generation + 1, (
+        'Меньшее значение счетчика после пересоздания БД тоже должно '
+        'сбрасывать кэши.'
+    )
+
+
+async def test_own_write_bumps_seen_shared_generation(mixer):
+    table_generations.observe(TABLE, 1)
+    generation = table_generations.get(TABLE)
+    mixer.blend('app.models.charity_project.CharityProject', full_amount=10)
+    assert table_generations.get(TABLE) == generation + 1, (
+        'Собственная запись должна увеличивать поколение, даже если '
+        'значение общего счетчика уже встречалось.'
+    )
+
+
+@pytest.fixture
+def slow_poll(monkeypatch):
+    # Опрос приложения не должен успеть сработать во время теста.
+    monkeypatch.setattr(settings, 'invalidation_poll_interval', 3600)
+
+
+async def test_response_cache_dropped_after_remote_write(
+    slow_poll, charity_project, user_client
+):
+    poller = InvalidationPoller(TestingSessionLocal)
+    await poller.poll()
+    assert user_client.get(PROJECTS_URL).json()[0]['name'] != 'remote'
+    await write_from_other_worker("UPDATE charityproject SET name = 'remote'")
+    assert user_client.get(PROJECTS_URL).json()[0]['name'] != 'remote', (
+        'До опроса счетчиков ответ выдается из кэша.'
+    )
+    await poller.poll()
+    assert user_client.get(PROJECTS_URL).json()[0]['name'] == 'remote', (
+        'После опроса счетчиков кэш ответов должен сбрасываться.'
+    )
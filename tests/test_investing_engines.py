@@ -0,0 +1,244 @@
+from datetime import datetime, timedelta
+import random
+
+from conftest import TestingSessionLocal
+import pytest
+from sqlalchemy import select
+
+from app.crud.charity_project import charity_project_crud
+from app.crud.donation import donation_crud
+from app.models import CharityProject, Donation
+from app.services.investing import (
+    invest_loop,
+    invest_many_loop,
+    invest_many_prefix_sum,
+    invest_prefix_sum,
+    split_by_prefix_sum,
+)
+
+
+def make_donations(amounts, invested=None):
+    invested = invested or [0] * len(amounts)
+    return [
+        Donation(
+            id=index,
+            full_amount=amount,
+            invested_amount=already,
+            fully_invested=already >= amount,
+        )
+        for index, (amount, already) in enumerate(
+            zip(amounts, invested, strict=True)
+        )
+    ]
+
+
+def snapshot(objects):
+    return [
+        (obj.invested_amount, bool(obj.fully_invested),
+         obj.close_date is not None)
+        for obj in objects
+    ]
+
+
+@pytest.mark.parametrize('required, available, expected', [
+    (250, [100, 100, 100, 100], [100, 100, 50]),
+    (200, [100, 100, 100], [100, 100]),
+    (500, [100, 100], [100, 100]),
+    (50, [0, 0, 100], [0, 0, 50]),
+    (0, [100], []),
+    (100, [], []),
+])
+def test_split_by_prefix_sum(required, available, expected):
+    assert split_by_prefix_sum(required, available) == expected, (
+        'Функция `split_by_prefix_sum` должна распределять сумму '
+        'по источникам в порядке FIFO.'
+    )
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_prefix_sum_engine_matches_loop(seed):
+    rng = random.Random(seed)
+    amounts = [rng.randint(1, 500) for _ in range(rng.randint(0, 30))]
+    invested = [rng.choice([0, 0, amount // 2]) for amount in amounts]
+    full_amount = rng.randint(1, 5000)
+
+    loop_target = CharityProject(
+        full_amount=full_amount, invested_amount=0, fully_invested=False
+    )
+    loop_sources = make_donations(amounts, invested)
+    loop_updated = invest_loop(loop_target, loop_sources)
+
+    fast_target = CharityProject(
+        full_amount=full_amount, invested_amount=0, fully_invested=False
+    )
+    fast_sources = make_donations(amounts, invested)
+    fast_updated = invest_prefix_sum(fast_target, fast_sources)
+
+    assert [obj.id for obj in fast_updated] == [
+        obj.id for obj in loop_updated
+    ], 'Оба алгоритма должны обновлять одни и те же источники.'
+    assert snapshot(fast_sources) == snapshot(loop_sources), (
+        'Состояние источников после распределения должно совпадать.'
+    )
+    assert snapshot([fast_target]) == snapshot([loop_target]), (
+        'Состояние цели после распределения должно совпадать.'
+    )
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_prefix_sum_batch_matches_loop(seed):
+    rng = random.Random(seed)
+    amounts = [rng.randint(1, 500) for _ in range(rng.randint(0, 30))]
+    invested = [rng.choice([0, 0, amount // 2]) for amount in amounts]
+    required = [rng.randint(1, 2000) for _ in range(rng.randint(1, 5))]
+
+    def make_targets():
+        return [
+            CharityProject(
+                full_amount=amount, invested_amount=0, fully_invested=False
+            )
+            for amount in required
+        ]
+
+    loop_targets, loop_sources = make_targets(), make_donations(
+        amounts, invested
+    )
+    loop_updated = invest_many_loop(loop_targets, loop_sources)
+    fast_targets, fast_sources = make_targets(), make_donations(
+        amounts, invested
+    )
+    fast_updated = invest_many_prefix_sum(fast_targets, fast_sources)
+
+    assert [obj.id for obj in fast_updated] == [
+        obj.id for obj in loop_updated
+    ], 'Оба алгоритма должны обновлять одни и те же источники.'
+    assert snapshot(fast_sources) == snapshot(loop_sources), (
+        'Состояние источников после распределения должно совпадать.'
+    )
+    assert snapshot(fast_targets) == snapshot(loop_targets), (
+        'Состояние целей после распределения должно совпадать.'
+    )
+
+
+@pytest.mark.parametrize('engine', ['invest_in_db', 'invest_by_interval'])
+@pytest.mark.parametrize('seed', range(5))
+async def test_db_engines_match_loop(engine, seed):
+    rng = random.Random(seed)
+    amounts = [rng.randint(1, 500) for _ in range(rng.randint(1, 30))]
+    requests = [rng.randint(1, 2000) for _ in range(3)]
+
+    async with TestingSessionLocal() as session:
+        session.add_all([
+            Donation(user_id=1, full_amount=amount, create_date=datetime(
+                2020, 1, 1) + timedelta(minutes=index))
+            for index, amount in enumerate(amounts)
+        ])
+        await session.commit()
+        invested_totals = []
+        for required in requests:
+            amounts_by_id = await getattr(donation_crud, engine)(
+                required, session
+            )
+            await session.commit()
+            invested_totals.append(sum(amounts_by_id.values()))
+        donations = await donation_crud.get_multi(session)
+
+    loop_sources = make_donations(amounts)
+    loop_totals = []
+    for required in requests:
+        loop_target = CharityProject(
+            full_amount=required, invested_amount=0, fully_invested=False
+        )
+        invest_loop(loop_target, loop_sources)
+        loop_totals.append(loop_target.invested_amount)
+
+    assert snapshot(sorted(donations, key=lambda obj: obj.id)) == snapshot(
+        loop_sources
+    ), 'Распределение средствами SQL должно совпадать с обходом в цикле.'
+    assert invested_totals == loop_totals, (
+        'Сумма вложений должна совпадать с суммой, полученной целью.'
+    )
+
+
+async def test_cumulative_interval_follows_full_amount_changes():
+    async with TestingSessionLocal() as session:
+        projects = [
+            CharityProject(
+                name=str(index), description='-', full_amount=amount
+            )
+            for index, amount in enumerate([100, 200, 300])
+        ]
+        session.add_all(projects)
+        await session.commit()
+        projects = list(await charity_project_crud.get_multi(session))
+        assert [
+            (obj.cumulative_start, obj.cumulative_end) for obj in projects
+        ] == [(0, 100), (100, 300), (300, 600)], (
+            'Новые записи должны занимать отрезки подряд в порядке вставки.'
+        )
+
+        projects[1].full_amount = 250
+        await session.commit()
+        await session.delete(projects[0])
+        await session.commit()
+        projects = list(await charity_project_crud.get_multi(session))
+        assert [
+            (obj.cumulative_start, obj.cumulative_end) for obj in projects
+        ] == [(0, 250), (250, 550)], (
+            'Изменение и удаление записи должно сдвигать последующие отрезки.'
+        )
+
+
+async def test_cumulative_interval_follows_create_date_order():
+    async with TestingSessionLocal() as session:
+        for amount, day in [(100, 3), (200, 1), (300, 2)]:
+            session.add(Donation(
+                user_id=1, full_amount=amount,
+                create_date=datetime(2020, 1, day),
+            ))
+            await session.commit()
+        session.add_all([
+            Donation(user_id=1, full_amount=40, create_date=datetime(
+                2020, 1, 5)),
+            Donation(user_id=1, full_amount=50, create_date=datetime(
+                2020, 1, 4)),
+        ])
+        await session.commit()
+        donations = (await session.execute(
+            select(Donation).order_by(Donation.create_date, Donation.id)
+        )).scalars().all()
+    assert [
+        (obj.full_amount, obj.cumulative_start, obj.cumulative_end)
+        for obj in donations
+    ] == [
+        (200, 0, 200), (300, 200, 500), (100, 500, 600),
+        (50, 600, 650), (40, 650, 690),
+    ], (
+        'Числовая прямая должна следовать порядку `(create_date, id)`, '
+        'даже если записи вставлены не по порядку.'
+    )
+
+
+async def test_interval_engine_falls_back_on_closed_rows():
+    async with TestingSessionLocal() as session:
+        session.add_all([
+            Donation(user_id=1, full_amount=100, create_date=datetime(
+                2020, 1, 1)),
+            Donation(user_id=1, full_amount=100, invested_amount=100,
+                     fully_invested=True, create_date=datetime(2020, 1, 2)),
+            Donation(user_id=1, full_amount=100, invested_amount=30,
+                     create_date=datetime(2020, 1, 3)),
+        ])
+        await session.commit()
+        amounts = await donation_crud.invest_by_interval(150, session)
+        await session.commit()
+        invested = (await session.execute(
+            select(Donation.invested_amount).order_by(Donation.id)
+        )).scalars().all()
+    assert list(amounts.values()) == [100, 50], (
+        'Алгоритм отрезков должен пропускать закрытые записи так же, '
+        'как остальные алгоритмы.'
+    )
+    assert invested == [100, 100, 80], (
+        'Вложенные суммы должны совпадать с обходом в порядке FIFO.'
+    )
@@ -0,0 +1,85 @@
+import pytest
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.models import CharityProject, Donation
+from app.services.ledger import open_pool_ledger
+
+
+DONATION_URL = '/donation/'
+PROJECTS_URL = '/charity_project/'
+
+
+@pytest.fixture
+def ledger_engine(monkeypatch):
+    monkeypatch.setattr(settings, 'investing_engine', 'ledger')
+    return open_pool_ledger
+
+
+def test_ledger_engine_allocates_from_memory(
+        ledger_engine, user_client, charity_project,
+        charity_project_nunchaku):
+    [user_client.post(
+        DONATION_URL, json={'full_amount': 500000}) for _ in range(2)]
+    user_client.post(DONATION_URL, json={'full_amount': 100})
+
+    assert charity_project.fully_invested, (
+        'Реестр должен распределять пожертвования в порядке FIFO.'
+    )
+    assert charity_project_nunchaku.invested_amount == 100, (
+        'Остаток пожертвований должен попасть во второй проект.'
+    )
+    projects = ledger_engine.pool(CharityProject)
+    assert list(projects.by_id) == [charity_project_nunchaku.id], (
+        'Закрытые проекты должны убираться из реестра после commit.'
+    )
+    assert projects.total_available == 5000000 - 100, (
+        'Счетчик свободного остатка должен совпадать с данными БД.'
+    )
+    assert len(ledger_engine.pool(Donation)) == 0, (
+        'Полностью распределенные пожертвования не должны '
+        'оставаться в реестре.'
+    )
+
+
+def test_ledger_keeps_unallocated_donations(
+        ledger_engine, superuser_client, donation):
+    superuser_client.post(PROJECTS_URL, json={
+        'name': 'ledger', 'description': 'ledger', 'full_amount': 40,
+    })
+    donations = ledger_engine.pool(Donation)
+    assert donations.total_available == donation.full_amount - 40, (
+        'Новый проект должен забирать средства из реестра пожертвований.'
+    )
+    assert donation.invested_amount == 40, (
+        'Реестр должен записывать в БД только изменившиеся строки.'
+    )
+
+
+def test_ledger_reloads_stale_pool(
+        ledger_engine, user_client, mixer, charity_project,
+        charity_project_nunchaku):
+    user_client.post(DONATION_URL, json={'full_amount': 100})
+    session = mixer.params['session']
+    session.execute(
+        update(CharityProject)
+        .where(CharityProject.id == charity_project.id)
+        .values(invested_amount=charity_project.full_amount - 10)
+    )
+    session.commit()
+
+    response = user_client.post(DONATION_URL, json={'full_amount': 50})
+    assert response.status_code == 200, (
+        'Устаревший реестр не должен приводить к ошибке запроса.'
+    )
+    session.refresh(charity_project)
+    session.refresh(charity_project_nunchaku)
+    assert charity_project.fully_invested, (
+        'После перечитывания пула проект должен получить остаток из БД.'
+    )
+    assert charity_project_nunchaku.invested_amount == 40, (
+        'Оставшаяся сумма должна перейти в следующий проект.'
+    )
+    assert ledger_engine.pool(CharityProject).total_available == (
+        charity_project_nunchaku.full_amount - 40
+    ), 'Реестр должен совпадать с БД после перечитывания пула.'
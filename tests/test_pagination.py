@@ -0,0 +1,101 @@
+from datetime import datetime
+
+import pytest
+
+from app.core.config import settings
+from app.crud.charity_project import charity_project_crud
+
+
+PROJECTS_URL = '/charity_project/'
+DONATIONS_URL = '/donation/'
+MY_DONATIONS_URL = '/donation/my'
+NEXT_CURSOR = 'X-Next-Cursor'
+
+
+@pytest.fixture
+def projects(mixer):
+    # Одинаковая дата создания проверяет порядок по id внутри даты.
+    return mixer.cycle(5).blend(
+        'app.models.charity_project.CharityProject',
+        name=mixer.sequence('project {0}'),
+        description='pagination',
+        full_amount=100,
+        create_date=datetime(2010, 10, 10),
+    )
+
+
+def read_all_pages(client, url, limit):
+    ids, pages, params = [], 0, {'limit': limit}
+    while True:
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        pages += 1
+        ids.extend(item['id'] for item in response.json())
+        if NEXT_CURSOR not in response.headers:
+            return ids, pages
+        params = {'limit': limit, 'cursor': response.headers[NEXT_CURSOR]}
+
+
+def test_projects_keyset_pages(user_client, projects):
+    ids, pages = read_all_pages(user_client, PROJECTS_URL, 2)
+    assert ids == [project.id for project in projects], (
+        'Страницы должны содержать все проекты по одному разу '
+        'в порядке создания.'
+    )
+    assert pages == 3, (
+        'Курсор не должен выдаваться для последней страницы.'
+    )
+
+
+def test_my_donations_pages(user_client):
+    for amount in range(1, 4):
+        user_client.post(DONATIONS_URL, json={'full_amount': amount})
+    response = user_client.get(MY_DONATIONS_URL, params={'limit': 2})
+    assert [item['full_amount'] for item in response.json()] == [1, 2]
+    response = user_client.get(MY_DONATIONS_URL, params={
+        'limit': 2, 'cursor': response.headers[NEXT_CURSOR],
+    })
+    assert [item['full_amount'] for item in response.json()] == [3], (
+        'Вторая страница должна продолжать первую.'
+    )
+    assert NEXT_CURSOR not in response.headers
+
+
+def test_default_page_size(user_client, projects, monkeypatch):
+    monkeypatch.setattr(settings, 'page_size_default', 3)
+    response = user_client.get(PROJECTS_URL)
+    assert len(response.json()) == 3, (
+        'Без `limit` должна выдаваться страница размера по умолчанию.'
+    )
+    assert NEXT_CURSOR in response.headers
+
+
+def test_legacy_unpaginated_lists(user_client, projects, monkeypatch):
+    monkeypatch.setattr(settings, 'page_size_default', 3)
+    monkeypatch.setattr(settings, 'legacy_unpaginated_lists', True)
+    response = user_client.get(PROJECTS_URL)
+    assert len(response.json()) == 5, (
+        'В режиме совместимости запрос без `limit` должен возвращать '
+        'весь список.'
+    )
+    assert NEXT_CURSOR not in response.headers
+
+
+@pytest.mark.parametrize('params', [
+    {'cursor': 'not a cursor'},
+    {'cursor': 'WzFd'},
+    {'limit': 0},
+    {'limit': settings.page_size_max + 1},
+])
+def test_invalid_page_params(user_client, params):
+    response = user_client.get(PROJECTS_URL, params=params)
+    assert response.status_code == 422, (
+        'Некорректные параметры страницы должны возвращать 422.'
+    )
+
+
+def test_cursor_round_trip(projects):
+    cursor = charity_project_crud.encode_cursor(projects[0])
+    assert charity_project_crud.decode_cursor(cursor) == (
+        projects[0].create_date, projects[0].id
+    ), 'Курсор должен восстанавливать ключ объекта.'
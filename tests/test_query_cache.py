@@ -0,0 +1,136 @@
+from conftest import TestingSessionLocal
+import pytest
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.crud.cache import HITS_METRIC, MISSES_METRIC
+from app.crud.charity_project import charity_project_crud
+from app.models.user import User
+from app.schemas.charity_project import (
+    CharityProjectCreate,
+    CharityProjectUpdate,
+)
+from app.schemas.donation import DonationCreate
+from app.services import donation_service
+
+
+TABLE = 'charityproject'
+
+
+@pytest.fixture
+def project(mixer):
+    return mixer.blend(
+        'app.models.charity_project.CharityProject',
+        name='cached',
+        full_amount=100,
+        invested_amount=0,
+    )
+
+
+def hits(scope):
+    return metrics.value(HITS_METRIC, table=TABLE, scope=scope)
+
+
+def misses(scope):
+    return metrics.value(MISSES_METRIC, table=TABLE, scope=scope)
+
+
+@pytest.mark.parametrize('scope', ['request', 'process'])
+async def test_repeated_lookup_served_from_cache(scope, monkeypatch, project):
+    monkeypatch.setattr(settings, 'query_cache_scope', scope)
+    async with TestingSessionLocal() as session:
+        first = await charity_project_crud.get(project.id, session)
+        second = await charity_project_crud.get(project.id, session)
+        found = await charity_project_crud.get_by_name('cached', session)
+    assert second.name == found.name == 'cached'
+    if scope == 'request':
+        assert second is first
+    assert hits(scope) == 1 and misses(scope) == 2, (
+        'Повторное чтение с теми же аргументами должно выдаваться '
+        'из кэша.'
+    )
+
+
+async def test_cache_off(monkeypatch, project):
+    monkeypatch.setattr(settings, 'query_cache_scope', 'off')
+    async with TestingSessionLocal() as session:
+        await charity_project_crud.get(project.id, session)
+        await charity_project_crud.get(project.id, session)
+    assert hits('off') == misses('off') == 0
+
+
+@pytest.mark.parametrize('scope', ['request', 'process'])
+async def test_own_uncommitted_writes_bypass_cache(scope, monkeypatch):
+    monkeypatch.setattr(settings, 'query_cache_scope', scope)
+    async with TestingSessionLocal() as session:
+        assert await charity_project_crud.get_by_name('new', session) is None
+        await charity_project_crud.create(
+            CharityProjectCreate(
+                name='new', description='cache', full_amount=10
+            ),
+            session,
+            commit=False,
+        )
+        found = await charity_project_crud.get_by_name('new', session)
+    assert found is not None, (
+        'Сессия должна видеть свои незафиксированные изменения.'
+    )
+
+
+async def test_process_cache_shared_between_sessions(monkeypatch, project):
+    monkeypatch.setattr(settings, 'query_cache_scope', 'process')
+    async with TestingSessionLocal() as session:
+        await charity_project_crud.get(project.id, session)
+    async with TestingSessionLocal() as session:
+        cached = await charity_project_crud.get(project.id, session)
+        assert hits('process') == 1, (
+            'Общий кэш должен обслуживать чтения других сессий.'
+        )
+        assert cached in session, (
+            'Объект из общего кэша должен принадлежать сессии вызова.'
+        )
+        await charity_project_crud.update(
+            cached, CharityProjectUpdate(description='updated'), session
+        )
+    async with TestingSessionLocal() as session:
+        updated = await charity_project_crud.get(project.id, session)
+    assert updated.description == 'updated', (
+        'Commit изменения должен делать запись кэша устаревшей.'
+    )
+
+
+async def test_allocation_commit_invalidates_process_cache(
+    monkeypatch, project
+):
+    monkeypatch.setattr(settings, 'query_cache_scope', 'process')
+    async with TestingSessionLocal() as session:
+        await charity_project_crud.get(project.id, session)
+        await donation_service.create_donation(
+            DonationCreate(full_amount=30), User(id=2), session
+        )
+    async with TestingSessionLocal() as session:
+        cached = await charity_project_crud.get(project.id, session)
+    assert cached.invested_amount == 30, (
+        'Распределение пожертвования должно обновлять кэш проектов.'
+    )
+
+
+async def test_process_cache_ttl_and_capacity(monkeypatch, mixer):
+    monkeypatch.setattr(settings, 'query_cache_scope', 'process')
+    monkeypatch.setattr(settings, 'query_cache_max_entries', 1)
+    projects = mixer.cycle(2).blend(
+        'app.models.charity_project.CharityProject',
+        name=mixer.sequence('project {0}'),
+        full_amount=100,
+    )
+    async with TestingSessionLocal() as session:
+        for obj in projects + projects:
+            await charity_project_crud.get(obj.id, session)
+    assert hits('process') == 0, (
+        'Сверх лимита записей старые записи должны вытесняться.'
+    )
+    monkeypatch.setattr(settings, 'query_cache_ttl', 0)
+    async with TestingSessionLocal() as session:
+        await charity_project_crud.get(projects[0].id, session)
+        await charity_project_crud.get(projects[0].id, session)
+    assert hits('process') == 0, 'Записи старше TTL не должны выдаваться.'
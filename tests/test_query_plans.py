@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta
+
+from conftest import TestingSessionLocal, engine
+import pytest
+from sqlalchemy import event, insert
+
+from app.crud.charity_project import charity_project_crud
+from app.crud.donation import donation_crud
+from app.models import CharityProject, Donation
+from app.models.user import User
+
+
+HISTORY_SIZE = 2000
+OPEN_EVERY = 100
+
+USERS = 50
+
+HOT_QUERIES = [
+    pytest.param(
+        lambda session: charity_project_crud.get_active_projects(session),
+        'ix_charityproject_open_create_date',
+        id='active_projects',
+    ),
+    pytest.param(
+        lambda session: donation_crud.get_active_donations(session),
+        'ix_donation_open_create_date',
+        id='active_donations',
+    ),
+    pytest.param(
+        lambda session: donation_crud.get_by_user(session, 1),
+        'ix_donation_user_id_create_date',
+        id='user_donations',
+    ),
+    pytest.param(
+        lambda session: charity_project_crud.get_page(
+            session, 10, (datetime(2024, 1, 2), 1000)
+        ),
+        'ix_charityproject_create_date_id',
+        id='projects_page',
+    ),
+    pytest.param(
+        lambda session: donation_crud.get_page(
+            session, 10, (datetime(2024, 1, 2), 1000), user_id=1
+        ),
+        'ix_donation_user_id_create_date',
+        id='user_donations_page',
+    ),
+]
+
+
+async def create_history():
+    """Создает историю, в которой открыта лишь малая часть записей."""
+    start = datetime(2024, 1, 1)
+    rows = [
+        {
+            'full_amount': 10,
+            'invested_amount': 0 if number % OPEN_EVERY == 0 else 10,
+            'fully_invested': number % OPEN_EVERY != 0,
+            'create_date': start + timedelta(minutes=number),
+        }
+        for number in range(HISTORY_SIZE)
+    ]
+    async with TestingSessionLocal() as session:
+        await session.execute(insert(User), [
+            {'email': f'user{number}@example.com', 'hashed_password': '-'}
+            for number in range(1, USERS + 1)
+        ])
+        await session.execute(insert(CharityProject), [
+            dict(row, name=f'project {number}', description='history')
+            for number, row in enumerate(rows)
+        ])
+        await session.execute(insert(Donation), [
+            dict(row, user_id=number % USERS + 1)
+            for number, row in enumerate(rows)
+        ])
+        await session.commit()
+    async with engine.begin() as connection:
+        for table in ('charityproject', 'donation'):
+            await connection.exec_driver_sql(f'ANALYZE {table}')
+
+
+async def explain(query):
+    """Выполняет запрос CRUD и возвращает план его последнего SQL."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', capture)
+    try:
+        async with TestingSessionLocal() as session:
+            await query(session)
+    finally:
+        event.remove(engine.sync_engine, 'before_cursor_execute', capture)
+    statement, parameters = statements[-1]
+    async with engine.connect() as connection:
+        if connection.dialect.name == 'postgresql':
+            # На небольшой таблице PostgreSQL выбрал бы Seq Scan
+            # по стоимости, поэтому проверяется сама возможность
+            # выполнить запрос по индексу.
+            await connection.exec_driver_sql('SET enable_seqscan = off')
+            prefix = 'EXPLAIN '
+        else:
+            prefix = 'EXPLAIN QUERY PLAN '
+        result = await connection.exec_driver_sql(
+            prefix + statement, parameters
+        )
+        return [str(row[-1]) for row in result]
+
+
+def find_scans(plan):
+    """Возвращает шаги плана с полным просмотром или сортировкой."""
+    return [
+        step for step in plan
+        if 'Seq Scan' in step
+        or 'TEMP B-TREE' in step
+        or step.startswith('SCAN') and 'USING' not in step
+    ]
+
+
+@pytest.mark.parametrize('query, index', HOT_QUERIES)
+async def test_hot_query_uses_index(query, index):
+    await create_history()
+    plan = await explain(query)
+    assert not find_scans(plan), (
+        'Частый запрос не должен просматривать таблицу целиком или '
+        'сортировать результат:\n' + '\n'.join(plan)
+    )
+    assert any(index in step for step in plan), (
+        f'Частый запрос должен использовать индекс `{index}`:\n'
+        + '\n'.join(plan)
+    )
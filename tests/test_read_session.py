@@ -0,0 +1,72 @@
+from conftest import TestingReadSessionLocal, read_your_writes
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.exc import InvalidRequestError
+
+from app.core import db
+from app.core.config import settings
+from app.models import CharityProject
+
+
+MY_DONATIONS_URL = '/donation/my'
+
+
+async def test_read_session_rejects_flush():
+    async with TestingReadSessionLocal() as session:
+        session.add(CharityProject(
+            name='read only', description='read only', full_amount=10
+        ))
+        with pytest.raises(InvalidRequestError):
+            await session.commit()
+
+
+async def test_read_session_rejects_bulk_update():
+    async with TestingReadSessionLocal() as session:
+        with pytest.raises(InvalidRequestError):
+            await session.execute(
+                update(CharityProject).values(full_amount=1)
+            )
+
+
+def test_read_primary_switches_replica_to_primary(monkeypatch):
+    replica = create_engine('sqlite://')
+    monkeypatch.setattr(db.read_engine, 'sync_engine', replica)
+    session = db.ReadOnlySession(bind=replica)
+    assert session.get_bind() is replica, (
+        'Сессия чтения должна работать с репликой.'
+    )
+    session.info[db.READ_PRIMARY] = True
+    assert session.get_bind() is db.engine.sync_engine, (
+        'После записи пользователь должен читать с основной БД.'
+    )
+
+
+def test_read_your_writes_window(monkeypatch):
+    read_your_writes.mark(1)
+    assert read_your_writes.use_primary(1), (
+        'Сразу после записи чтение должно идти с основной БД.'
+    )
+    assert not read_your_writes.use_primary(2), (
+        'Другие пользователи должны читать с реплики.'
+    )
+    monkeypatch.setattr(settings, 'read_your_writes_window', 0)
+    assert not read_your_writes.use_primary(1), (
+        'После окна чтение должно вернуться на реплику.'
+    )
+    read_your_writes.mark(2)
+    assert not read_your_writes._writes, (
+        'Устаревшие записи должны удаляться из реестра.'
+    )
+
+
+def test_donation_marks_user_for_primary_reads(user_client):
+    response = user_client.post('/donation/', json={'full_amount': 10})
+    assert response.status_code == 200
+    assert read_your_writes.use_primary(2), (
+        'После пожертвования пользователь должен читать с основной БД.'
+    )
+    response = user_client.get(MY_DONATIONS_URL)
+    assert response.status_code == 200
+    assert [donation['full_amount'] for donation in response.json()] == [
+        10
+    ], 'Список пожертвований должен содержать только что созданное.'
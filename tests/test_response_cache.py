@@ -0,0 +1,165 @@
+from conftest import TestingSessionLocal
+import pytest
+from sqlalchemy import update
+
+from app.api.caching import ResponseCache, etag_matches, response_cache
+from app.core.config import settings
+from app.core.generations import table_generations
+from app.models import CharityProject
+from app.services.charity_project_service import charity_project_service
+
+
+PROJECTS_URL = '/charity_project/'
+TABLE = CharityProject.__tablename__
+
+
+class DummyResponse:
+
+    def __init__(self, body):
+        self.body = body
+        self.headers = {
+            'content-length': str(len(body)),
+            'content-type': 'application/json',
+        }
+
+
+@pytest.fixture
+def count_queries(monkeypatch):
+    calls = []
+    get_projects_page = charity_project_service.get_projects_page
+
+    async def counting_get_projects_page(*args, **kwargs):
+        calls.append(args)
+        return await get_projects_page(*args, **kwargs)
+
+    monkeypatch.setattr(
+        charity_project_service, 'get_projects_page',
+        counting_get_projects_page,
+    )
+    return calls
+
+
+def test_projects_served_from_cache(
+    user_client, charity_project, count_queries
+):
+    first = user_client.get(PROJECTS_URL)
+    second = user_client.get(PROJECTS_URL)
+    assert first.status_code == second.status_code == 200
+    assert second.content == first.content
+    assert second.headers['etag'] == first.headers['etag'], (
+        'Повторный ответ должен иметь тот же ETag.'
+    )
+    assert len(count_queries) == 1, (
+        'Повторный запрос без изменений проектов должен обслуживаться '
+        'из кэша.'
+    )
+
+
+def test_projects_not_modified(user_client, charity_project):
+    etag = user_client.get(PROJECTS_URL).headers['etag']
+    response = user_client.get(
+        PROJECTS_URL, headers={'If-None-Match': etag}
+    )
+    assert response.status_code == 304, (
+        'Запрос с совпадающим If-None-Match должен получать 304.'
+    )
+    assert response.content == b''
+    assert response.headers['etag'] == etag
+
+
+def test_project_write_invalidates_cache(
+    superuser_client, charity_project, count_queries
+):
+    etag = superuser_client.get(PROJECTS_URL).headers['etag']
+    superuser_client.patch(
+        f'{PROJECTS_URL}{charity_project.id}', json={'name': 'renamed'}
+    )
+    response = superuser_client.get(
+        PROJECTS_URL, headers={'If-None-Match': etag}
+    )
+    assert response.status_code == 200, (
+        'После изменения проекта кэшированный ответ устаревает.'
+    )
+    assert response.json()[0]['name'] == 'renamed'
+    assert response.headers['etag'] != etag
+    assert len(count_queries) == 2
+
+
+def test_allocation_invalidates_cache(user_client, charity_project):
+    before = user_client.get(PROJECTS_URL).json()
+    user_client.post('/donation/', json={'full_amount': 100})
+    after = user_client.get(PROJECTS_URL).json()
+    assert after[0]['invested_amount'] == (
+        before[0]['invested_amount'] + 100
+    ), 'Распределение пожертвования должно обновлять список проектов.'
+
+
+def test_query_parameters_are_cached_separately(user_client, mixer):
+    mixer.cycle(3).blend(
+        'app.models.charity_project.CharityProject',
+        name=mixer.sequence('cached {0}'),
+        full_amount=100,
+    )
+    assert len(user_client.get(PROJECTS_URL).json()) == 3
+    assert len(user_client.get(PROJECTS_URL, params={'limit': 1}).json()) == 1
+    assert len(response_cache) == 2
+
+
+async def test_generation_bumped_after_commit_only():
+    generation = table_generations.get(TABLE)
+    async with TestingSessionLocal() as session:
+        await session.execute(
+            update(CharityProject).values(description='rolled back')
+        )
+        await session.rollback()
+        assert table_generations.get(TABLE) == generation, (
+            'Откат транзакции не должен менять поколение таблицы.'
+        )
+        await session.execute(
+            update(CharityProject).values(description='committed')
+        )
+        assert table_generations.get(TABLE) == generation, (
+            'Поколение должно меняться только после commit.'
+        )
+        await session.commit()
+    assert table_generations.get(TABLE) == generation + 1
+
+
+def test_lru_eviction_under_memory_budget(monkeypatch):
+    cache = ResponseCache()
+    bodies = {key: key.encode() * 100 for key in ('a', 'b', 'c')}
+    entries = {
+        key: cache.put(key, 0, DummyResponse(body))
+        for key, body in list(bodies.items())[:2]
+    }
+    monkeypatch.setattr(
+        settings, 'response_cache_max_bytes',
+        sum(entry.size for entry in entries.values()) + 10,
+    )
+    cache.get('a', 0)
+    cache.put('c', 0, DummyResponse(bodies['c']))
+    assert cache.get('b', 0) is None, (
+        'Сверх бюджета памяти должен вытесняться давно не '
+        'запрашивавшийся ответ.'
+    )
+    assert cache.get('a', 0) is not None
+    assert cache.get('c', 0) is not None
+    assert cache.size <= settings.response_cache_max_bytes
+    assert cache.get('a', 1) is None and len(cache) == 1, (
+        'Ответ устаревшего поколения должен удаляться.'
+    )
+
+
+def test_oversized_response_is_not_cached(monkeypatch):
+    monkeypatch.setattr(settings, 'response_cache_max_bytes', 10)
+    cache = ResponseCache()
+    entry = cache.put('a', 0, DummyResponse(b'x' * 100))
+    assert entry.etag and len(cache) == 0 and cache.size == 0
+
+
+def test_etag_matches():
+    assert etag_matches('"a", "b"', '"b"')
+    assert etag_matches('W/"b"', '"b"')
+    assert etag_matches('*', '"b"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
@@ -0,0 +1,88 @@
+from typing import List
+
+from conftest import TestingSessionLocal
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+import pytest
+
+from app.api.pagination import page_response
+from app.core import serialization
+from app.core.serialization import dumps, rows_to_dicts, schema_fields
+from app.crud.charity_project import charity_project_crud
+from app.crud.donation import donation_crud
+from app.schemas.charity_project import CharityProjectDB
+from app.schemas.donation import DonationDB, DonationUserDB
+from benchmarks.serialization import compare
+
+
+CASES = [
+    pytest.param(charity_project_crud, CharityProjectDB, id='projects'),
+    pytest.param(donation_crud, DonationDB, id='donations'),
+    pytest.param(donation_crud, DonationUserDB, id='user_donations'),
+]
+
+
+async def pydantic_body(crud, schema, session):
+    content = await serialize_response(
+        field=create_response_field('response', List[schema]),
+        response_content=await crud.get_multi(session),
+        exclude_none=True,
+    )
+    return JSONResponse(content).body
+
+
+async def fast_body(crud, schema, session):
+    page = await crud.get_page(session, fields=schema_fields(schema))
+    return page_response(page, schema).body
+
+
+@pytest.mark.parametrize('crud, schema', CASES)
+async def test_fast_path_matches_response_model(
+    crud, schema, mixer, charity_project_nunchaku, closed_charity_project,
+    donation,
+):
+    mixer.blend(
+        'app.models.donation.Donation',
+        user_id=1,
+        comment=None,
+        full_amount=50,
+        allocation_pending=True,
+    )
+    async with TestingSessionLocal() as session:
+        expected = await pydantic_body(crud, schema, session)
+        actual = await fast_body(crud, schema, session)
+    assert actual == expected, (
+        'Быстрый путь должен выдавать тот же JSON, что и response_model '
+        'с response_model_exclude_none.'
+    )
+
+
+def test_rows_to_dicts_skips_none():
+    rows = [(1, None, 'a', 'cursor'), (2, 'text', None, 'cursor')]
+    assert rows_to_dicts(['id', 'comment', 'name'], rows) == [
+        {'id': 1, 'name': 'a'},
+        {'id': 2, 'comment': 'text'},
+    ], 'Поля со значением None и лишние столбцы не должны попадать в ответ.'
+
+
+async def test_json_fallback_matches_orjson(
+    monkeypatch, charity_project, donation
+):
+    async with TestingSessionLocal() as session:
+        page = await donation_crud.get_page(
+            session, fields=schema_fields(DonationDB)
+        )
+    content = rows_to_dicts(schema_fields(DonationDB), page.items)
+    expected = dumps(content)
+    monkeypatch.setattr(serialization, 'orjson', None)
+    assert dumps(content) == expected, (
+        'Без orjson ответ должен кодироваться в те же байты.'
+    )
+
+
+async def test_serialization_benchmark_compares_outputs(donation):
+    report = await compare(TestingSessionLocal, rows=1, repeat=1)
+    assert report.same_output, (
+        'Бенчмарк должен получать одинаковый JSON обоими способами.'
+    )
@@ -0,0 +1,89 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.core.config import settings
+from app.core.db import configure_sqlite
+from app.services.concurrency import is_retryable, run_with_retry
+
+
+async def test_sqlite_profile_pragmas(tmp_path):
+    engine = create_async_engine(
+        f'sqlite+aiosqlite:///{tmp_path / "profile.db"}'
+    )
+    configure_sqlite(engine)
+    async with engine.connect() as connection:
+        pragmas = {
+            name: await connection.scalar(text(f'PRAGMA {name}'))
+            for name in ('journal_mode', 'busy_timeout', 'synchronous')
+        }
+    await engine.dispose()
+    assert pragmas == {
+        'journal_mode': 'wal', 'busy_timeout': 5000, 'synchronous': 1,
+    }, 'Новое соединение SQLite должно получать PRAGMA из настроек.'
+
+
+async def test_sqlite_profile_skips_empty_pragmas(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'sqlite_journal_mode', None)
+    engine = create_async_engine(
+        f'sqlite+aiosqlite:///{tmp_path / "profile.db"}'
+    )
+    configure_sqlite(engine)
+    async with engine.connect() as connection:
+        journal_mode = await connection.scalar(text('PRAGMA journal_mode'))
+    await engine.dispose()
+    assert journal_mode == 'delete', (
+        'Пустая настройка PRAGMA должна оставлять значение SQLite.'
+    )
+
+
+class FakeSession:
+    bind = create_async_engine('sqlite+aiosqlite://')
+    rollbacks = 0
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+def database_locked():
+    return OperationalError('BEGIN', {}, Exception('database is locked'))
+
+
+async def test_retry_on_database_locked(monkeypatch):
+    monkeypatch.setattr(settings, 'allocation_retry_delay', 0)
+    session = FakeSession()
+    calls = []
+
+    async def operation():
+        calls.append(1)
+        if len(calls) < 3:
+            raise database_locked()
+        return 'done'
+
+    assert await run_with_retry(operation, session) == 'done', (
+        'Транзакция должна завершиться после снятия блокировки.'
+    )
+    assert session.rollbacks == 2, (
+        'Перед каждым повтором транзакция должна откатываться.'
+    )
+
+
+async def test_retry_gives_up(monkeypatch):
+    monkeypatch.setattr(settings, 'allocation_retry_delay', 0)
+    monkeypatch.setattr(settings, 'allocation_retry_attempts', 2)
+
+    async def operation():
+        raise database_locked()
+
+    with pytest.raises(OperationalError):
+        await run_with_retry(operation, FakeSession())
+
+
+def test_is_retryable():
+    assert is_retryable(database_locked())
+    assert is_retryable(StaleDataError())
+    assert not is_retryable(
+        OperationalError('SELECT', {}, Exception('no such table'))
+    )
@@ -0,0 +1,67 @@
+from conftest import (
+    TestingSessionLocal,
+    app,
+    current_superuser,
+    current_user,
+    get_async_session,
+    override_db,
+)
+import pytest
+
+from app.core.config import settings
+from app.models.user import User
+from benchmarks.asgi import ASGIClient
+from benchmarks.stress import check_invariants, percentile, send_requests
+
+
+superuser = User(id=1, is_active=True, is_verified=True, is_superuser=True)
+
+
+@pytest.fixture
+def asgi_client():
+    app.dependency_overrides = {}
+    app.dependency_overrides[get_async_session] = override_db
+    app.dependency_overrides[current_user] = lambda: superuser
+    app.dependency_overrides[current_superuser] = lambda: superuser
+    yield ASGIClient(app)
+    app.dependency_overrides = {}
+
+
+@pytest.mark.parametrize('engine', ['loop', 'sql', 'ledger'])
+async def test_stress_run_keeps_invariants(engine, monkeypatch, asgi_client):
+    monkeypatch.setattr(settings, 'investing_engine', engine)
+    latencies, errors = await send_requests(
+        asgi_client, donations=60, projects=6, concurrency=20, seed=1
+    )
+    assert len(latencies) == 66 and errors == 0, (
+        'Все запросы нагрузочного теста должны выполняться успешно.'
+    )
+    async with TestingSessionLocal() as session:
+        assert await check_invariants(session) == [], (
+            'После параллельной нагрузки инварианты распределения '
+            'должны соблюдаться.'
+        )
+
+
+async def test_check_invariants_reports_mismatch(mixer, charity_project):
+    mixer.blend(
+        'app.models.donation.Donation',
+        user_id=2,
+        full_amount=100,
+        invested_amount=100,
+    )
+    async with TestingSessionLocal() as session:
+        violations = await check_invariants(session)
+    assert any('Суммы не совпадают' in item for item in violations), (
+        'Проверка должна находить расхождение сумм вложений.'
+    )
+    assert any('fully_invested' in item for item in violations), (
+        'Проверка должна находить незакрытые полностью вложенные записи.'
+    )
+
+
+def test_percentile():
+    values = [index / 100 for index in range(1, 101)]
+    assert percentile(values, 0.5) == 0.51
+    assert percentile(values, 0.99) == 1.0
+    assert percentile([], 0.5) == 0.0
@@ -0,0 +1,106 @@
+from conftest import TestingReadSessionLocal, TestingSessionLocal
+import pytest
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.user import ReadUserDatabase, UserManager, get_jwt_strategy
+from app.core.user_cache import HITS_METRIC, MISSES_METRIC
+from app.models.user import User
+
+
+ME_URL = '/users/me'
+
+
+@pytest.fixture
+def donor(mixer):
+    return mixer.blend(
+        'app.models.user.User',
+        email='donor@fund.ru',
+        is_active=True,
+        is_superuser=False,
+    )
+
+
+async def token_for(user):
+    return await get_jwt_strategy().write_token(user)
+
+
+async def read_token(token):
+    async with TestingReadSessionLocal() as session:
+        manager = UserManager(ReadUserDatabase(session, User))
+        return await get_jwt_strategy().read_token(token, manager)
+
+
+async def update_donor(donor, **values):
+    async with TestingSessionLocal() as session:
+        user = await session.get(User, donor.id)
+        for key, value in values.items():
+            setattr(user, key, value)
+        await session.commit()
+
+
+async def test_repeated_token_served_from_cache(donor):
+    token = await token_for(donor)
+    first = await read_token(token)
+    second = await read_token(token)
+    assert first.id == second.id == donor.id
+    assert second.email == 'donor@fund.ru'
+    assert second is not first, (
+        'Каждое попадание в кэш должно создавать новый объект '
+        'пользователя.'
+    )
+    assert metrics.value(HITS_METRIC) == 1, (
+        'Повторная проверка токена должна брать пользователя из кэша.'
+    )
+    assert metrics.value(MISSES_METRIC) == 1
+
+
+async def test_user_update_invalidates_cache(donor):
+    token = await token_for(donor)
+    await read_token(token)
+    await update_donor(donor, is_active=False)
+    user = await read_token(token)
+    assert user.is_active is False, (
+        'После изменения пользователя проверка токена должна '
+        'прочитать его из БД.'
+    )
+    assert metrics.value(MISSES_METRIC) == 2
+
+
+async def test_entry_expires_after_ttl(donor, freezer, monkeypatch):
+    monkeypatch.setattr(settings, 'user_cache_ttl', 10)
+    token = await token_for(donor)
+    await read_token(token)
+    freezer.tick(11)
+    assert await read_token(token) is not None
+    assert metrics.value(MISSES_METRIC) == 2, (
+        'Запись кэша должна устаревать через `user_cache_ttl` секунд.'
+    )
+
+
+async def test_entry_expires_with_token(donor, freezer):
+    token = await token_for(donor)
+    await read_token(token)
+    freezer.tick(3601)
+    assert await read_token(token) is None, (
+        'Истекший токен не должен проходить проверку через кэш.'
+    )
+
+
+async def test_cache_off(donor, monkeypatch):
+    monkeypatch.setattr(settings, 'user_cache_ttl', 0)
+    token = await token_for(donor)
+    await read_token(token)
+    await read_token(token)
+    assert metrics.value(HITS_METRIC) == metrics.value(MISSES_METRIC) == 0
+
+
+async def test_deactivated_user_rejected(superuser_client, donor):
+    headers = {'Authorization': f'Bearer {await token_for(donor)}'}
+    assert superuser_client.get(ME_URL, headers=headers).status_code == 200
+    await update_donor(donor, is_active=False)
+    response = superuser_client.get(ME_URL, headers=headers)
+    assert response.status_code == 401, (
+        'После снятия флага `is_active` токен пользователя не должен '
+        'проходить проверку из кэша.'
+    )